@@ -1,16 +1,41 @@
 from __future__ import annotations
 
 from collections.abc import Generator
+from typing import Optional
 
+from fastapi import Depends, Header, HTTPException
 from sqlalchemy.orm import Session
 
-from backend.models.database import SessionLocal
+from backend.models.database import (
+    DEFAULT_WORKSPACE,
+    SessionLocal,
+    WorkspaceError,
+    validate_workspace_id,
+    workspace_pool,
+)
 
 
-def get_db() -> Generator[Session, None, None]:
+def get_workspace_id(
+    x_workspace_id: Optional[str] = Header(default=None, alias="X-Workspace-Id"),
+) -> str:
+    if not x_workspace_id:
+        return DEFAULT_WORKSPACE
+    try:
+        return validate_workspace_id(x_workspace_id)
+    except WorkspaceError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+def get_db(workspace_id: str = Depends(get_workspace_id)) -> Generator[Session, None, None]:
+    with workspace_pool.session(workspace_id) as db:
+        yield db
+
+
+def get_jobs_db(workspace_id: str = Depends(get_workspace_id)) -> Generator[Session, None, None]:
+    # 任务队列统一放在默认库，由单个后台调度器处理
     db = SessionLocal()
+    db.info["workspace_id"] = workspace_id
     try:
         yield db
     finally:
         db.close()
-
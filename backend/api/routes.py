@@ -1,32 +1,93 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Response
+import asyncio
+import json
+import logging
+from typing import Optional
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Response,
+    WebSocket,
+    WebSocketDisconnect,
+)
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
 
-from backend.api.deps import get_db
+from backend.api.deps import get_db, get_jobs_db
+from backend.models.database import Project, workspace_pool
 from backend.models.schemas import (
     BranchCreateRequest,
+    BulkBranchCreateRequest,
+    BulkBranchCreateResponse,
+    CalculationDiff,
+    CalculationPatch,
+    CalculationSession,
     DeleteProjectsResponse,
     FBACalculationResult,
     FBACalculatorInput,
+    FeeEstimate,
+    FeeEstimateRequest,
+    FeeScheduleInfo,
+    JobInfo,
+    JobStatus,
+    JobSubmitRequest,
+    ParetoOptimizeRequest,
+    ParetoOptimizeResponse,
     ProjectCreateRequest,
     ProjectNode,
+    ProjectRevisionDetail,
+    ProjectRevisionDiff,
+    ProjectRevisionInfo,
+    ProjectSearchResponse,
     ProjectUpdateRequest,
     SavedProject,
     Settings,
+    WorkspacePoolMetrics,
+)
+from backend.services.calc_sessions import (
+    create_calculation_session,
+    delete_calculation_session,
+    patch_calculation_session,
+)
+from backend.services.calculator import calculate_fba_profit, estimate_fees
+from backend.services.fees import list_fee_schedules
+from backend.services.jobs import (
+    JobResultUnavailable,
+    cancel_job,
+    get_job,
+    get_job_result,
+    list_jobs,
+    submit_job,
 )
-from backend.services.calculator import calculate_fba_profit
+from backend.services.live_calc import LiveCalculation, get_coalesce_seconds
+from backend.services.optimizer import optimize_pareto
 from backend.services.project import (
+    BranchPatchError,
     create_branch,
+    create_branches_bulk,
     create_project,
     delete_project_cascade,
     export_project,
     get_project,
     get_settings,
-    list_projects_tree,
+    saved_project_json,
+    search_projects,
     update_project,
     update_settings,
 )
+from backend.services.project_tree import project_tree_json
+from backend.services.revisions import diff_revisions, get_revision_json, list_revisions
+from backend.services.simulation import (
+    DEFAULT_HORIZON_DAYS,
+    DEFAULT_RETURN_LAG_DAYS,
+    simulate_daily,
+)
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api")
 
@@ -36,8 +97,209 @@ router = APIRouter(prefix="/api")
     response_model=FBACalculationResult,
     response_model_by_alias=True,
 )
-def calculate(input_data: FBACalculatorInput) -> FBACalculationResult:
-    return calculate_fba_profit(input_data)
+def calculate(
+    input_data: FBACalculatorInput,
+    daily_series: bool = Query(default=False, alias="dailySeries"),
+    horizon_days: int = Query(default=DEFAULT_HORIZON_DAYS, ge=1, le=3650, alias="horizonDays"),
+    return_lag_days: int = Query(
+        default=DEFAULT_RETURN_LAG_DAYS, ge=0, le=365, alias="returnLagDays"
+    ),
+) -> FBACalculationResult:
+    result = calculate_fba_profit(input_data)
+    if daily_series:
+        result.daily_series = simulate_daily(input_data, horizon_days, return_lag_days)
+    return result
+
+
+@router.post(
+    "/calculate/sessions",
+    response_model=CalculationSession,
+    response_model_by_alias=True,
+)
+def create_calculation_session_endpoint(input_data: FBACalculatorInput) -> CalculationSession:
+    return create_calculation_session(input_data)
+
+
+@router.patch(
+    "/calculate/sessions/{session_id}",
+    response_model=CalculationDiff,
+    response_model_by_alias=True,
+)
+def patch_calculation_session_endpoint(
+    session_id: str, payload: CalculationPatch
+) -> CalculationDiff:
+    try:
+        diff = patch_calculation_session(session_id, payload.patch)
+    except ValidationError as exc:
+        raise HTTPException(
+            status_code=422,
+            detail=exc.errors(include_url=False, include_context=False, include_input=False),
+        ) from exc
+    if diff is None:
+        raise HTTPException(status_code=404, detail="Calculation session not found")
+    return diff
+
+
+@router.delete("/calculate/sessions/{session_id}", status_code=204)
+def delete_calculation_session_endpoint(session_id: str) -> Response:
+    if not delete_calculation_session(session_id):
+        raise HTTPException(status_code=404, detail="Calculation session not found")
+    return Response(status_code=204)
+
+
+@router.websocket("/calculate/live")
+async def live_calculation(websocket: WebSocket) -> None:
+    await websocket.accept()
+    live = LiveCalculation()
+    coalesce_seconds = get_coalesce_seconds()
+    wake = asyncio.Event()
+
+    async def flush_loop() -> None:
+        while True:
+            await wake.wait()
+            # 窗口内到达的补丁合并为一次计算
+            await asyncio.sleep(coalesce_seconds)
+            wake.clear()
+            try:
+                message = live.flush()
+            except Exception:
+                # 单个补丁的意外错误不能终止刷新任务，否则之后的补丁都收不到回复
+                logger.exception("Live calculation flush failed")
+                message = {"type": "error", "detail": "Calculation failed"}
+            if message is not None:
+                await websocket.send_json(message)
+
+    flusher = asyncio.create_task(flush_loop())
+    try:
+        while True:
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", 1000), frame.get("reason"))
+            try:
+                message = json.loads(frame.get("text") or frame.get("bytes") or "")
+            except ValueError:
+                await websocket.send_json({"type": "error", "detail": "Invalid JSON"})
+                continue
+            kind = message.get("type") if isinstance(message, dict) else None
+            if kind == "init":
+                await websocket.send_json(live.reset(message.get("input")))
+            elif kind == "patch" and isinstance(message.get("patch"), dict):
+                live.queue(message["patch"])
+                wake.set()
+            else:
+                await websocket.send_json({"type": "error", "detail": "Unknown message"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        flusher.cancel()
+
+
+@router.post(
+    "/optimize/pareto",
+    response_model=ParetoOptimizeResponse,
+    response_model_by_alias=True,
+)
+def optimize_pareto_endpoint(payload: ParetoOptimizeRequest) -> ParetoOptimizeResponse:
+    return optimize_pareto(payload)
+
+
+@router.get(
+    "/fees/schedules",
+    response_model=list[FeeScheduleInfo],
+    response_model_by_alias=True,
+)
+def fee_schedules() -> list[FeeScheduleInfo]:
+    return list_fee_schedules()
+
+
+@router.post(
+    "/fees/estimate",
+    response_model=FeeEstimate,
+    response_model_by_alias=True,
+)
+def fee_estimate(payload: FeeEstimateRequest) -> FeeEstimate:
+    return estimate_fees(payload)
+
+
+@router.get(
+    "/workspaces/metrics",
+    response_model=WorkspacePoolMetrics,
+    response_model_by_alias=True,
+)
+def workspace_metrics() -> WorkspacePoolMetrics:
+    return WorkspacePoolMetrics.model_validate(workspace_pool.metrics())
+
+
+@router.post(
+    "/jobs",
+    response_model=JobInfo,
+    response_model_by_alias=True,
+)
+def submit_job_endpoint(
+    payload: JobSubmitRequest, db: Session = Depends(get_jobs_db)
+) -> JobInfo:
+    try:
+        return submit_job(db, payload)
+    except ValidationError as exc:
+        raise HTTPException(
+            status_code=422,
+            detail=exc.errors(include_url=False, include_context=False, include_input=False),
+        ) from exc
+
+
+@router.get(
+    "/jobs",
+    response_model=list[JobInfo],
+    response_model_by_alias=True,
+)
+def jobs(
+    status: Optional[JobStatus] = Query(default=None),
+    limit: int = Query(default=50, ge=1, le=500),
+    db: Session = Depends(get_jobs_db),
+) -> list[JobInfo]:
+    return list_jobs(db, status=status, limit=limit)
+
+
+@router.get(
+    "/jobs/{job_id}",
+    response_model=JobInfo,
+    response_model_by_alias=True,
+)
+def job(job_id: str, db: Session = Depends(get_jobs_db)) -> JobInfo:
+    job_info = get_job(db, job_id)
+    if job_info is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_info
+
+
+@router.post(
+    "/jobs/{job_id}/cancel",
+    response_model=JobInfo,
+    response_model_by_alias=True,
+)
+def cancel_job_endpoint(job_id: str, db: Session = Depends(get_jobs_db)) -> JobInfo:
+    job_info = cancel_job(db, job_id)
+    if job_info is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_info
+
+
+@router.get("/jobs/{job_id}/result")
+def job_result(job_id: str, db: Session = Depends(get_jobs_db)) -> Response:
+    try:
+        found = get_job_result(db, job_id)
+    except JobResultUnavailable as exc:
+        raise HTTPException(status_code=410, detail=str(exc)) from exc
+    if found is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    status, result_json = found
+    if status != "succeeded" or result_json is None:
+        raise HTTPException(status_code=409, detail=f"Job is {status}")
+    return Response(content=result_json, media_type="application/json")
+
+
+def _saved_project_response(project_obj: Project) -> Response:
+    return Response(content=saved_project_json(project_obj), media_type="application/json")
 
 
 @router.get(
@@ -45,8 +307,22 @@ def calculate(input_data: FBACalculatorInput) -> FBACalculationResult:
     response_model=list[ProjectNode],
     response_model_by_alias=True,
 )
-def projects(db: Session = Depends(get_db)) -> list[ProjectNode]:
-    return list_projects_tree(db)
+def projects(db: Session = Depends(get_db)) -> Response:
+    return Response(content=project_tree_json(db), media_type="application/json")
+
+
+@router.get(
+    "/projects/search",
+    response_model=ProjectSearchResponse,
+    response_model_by_alias=True,
+)
+def search_projects_endpoint(
+    q: str = Query(min_length=1, max_length=200),
+    limit: int = Query(default=20, ge=1, le=100),
+    offset: int = Query(default=0, ge=0),
+    db: Session = Depends(get_db),
+) -> ProjectSearchResponse:
+    return search_projects(db, q, limit=limit, offset=offset)
 
 
 @router.get(
@@ -54,11 +330,11 @@ def projects(db: Session = Depends(get_db)) -> list[ProjectNode]:
     response_model=SavedProject,
     response_model_by_alias=True,
 )
-def project(project_id: str, db: Session = Depends(get_db)) -> SavedProject:
+def project(project_id: str, db: Session = Depends(get_db)) -> Response:
     project_obj = get_project(db, project_id)
     if project_obj is None:
         raise HTTPException(status_code=404, detail="Project not found")
-    return project_obj
+    return _saved_project_response(project_obj)
 
 
 @router.post(
@@ -68,8 +344,8 @@ def project(project_id: str, db: Session = Depends(get_db)) -> SavedProject:
 )
 def create_project_endpoint(
     payload: ProjectCreateRequest, db: Session = Depends(get_db)
-) -> SavedProject:
-    return create_project(db, payload)
+) -> Response:
+    return _saved_project_response(create_project(db, payload))
 
 
 @router.put(
@@ -79,11 +355,11 @@ def create_project_endpoint(
 )
 def update_project_endpoint(
     project_id: str, payload: ProjectUpdateRequest, db: Session = Depends(get_db)
-) -> SavedProject:
+) -> Response:
     updated = update_project(db, project_id, payload)
     if updated is None:
         raise HTTPException(status_code=404, detail="Project not found")
-    return updated
+    return _saved_project_response(updated)
 
 
 @router.delete(
@@ -107,13 +383,79 @@ def delete_project_endpoint(
 )
 def create_branch_endpoint(
     project_id: str, payload: BranchCreateRequest, db: Session = Depends(get_db)
-) -> SavedProject:
+) -> Response:
     created = create_branch(db, project_id, payload)
+    if created is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return _saved_project_response(created)
+
+
+@router.post(
+    "/projects/{project_id}/branches/bulk",
+    response_model=BulkBranchCreateResponse,
+    response_model_by_alias=True,
+)
+def create_branches_bulk_endpoint(
+    project_id: str, payload: BulkBranchCreateRequest, db: Session = Depends(get_db)
+) -> BulkBranchCreateResponse:
+    try:
+        created = create_branches_bulk(db, project_id, payload)
+    except BranchPatchError as exc:
+        raise HTTPException(
+            status_code=422,
+            detail=[{**err, "loc": [*exc.loc, *err["loc"]]} for err in exc.errors],
+        ) from exc
     if created is None:
         raise HTTPException(status_code=404, detail="Project not found")
     return created
 
 
+@router.get(
+    "/projects/{project_id}/revisions",
+    response_model=list[ProjectRevisionInfo],
+    response_model_by_alias=True,
+)
+def project_revisions(
+    project_id: str,
+    limit: int = Query(default=50, ge=1, le=500),
+    offset: int = Query(default=0, ge=0),
+    db: Session = Depends(get_db),
+) -> list[ProjectRevisionInfo]:
+    revisions = list_revisions(db, project_id, limit=limit, offset=offset)
+    if revisions is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return revisions
+
+
+@router.get(
+    "/projects/{project_id}/revisions/diff",
+    response_model=ProjectRevisionDiff,
+    response_model_by_alias=True,
+)
+def project_revision_diff(
+    project_id: str,
+    from_revision: int = Query(alias="from", ge=1),
+    to_revision: int = Query(alias="to", ge=1),
+    db: Session = Depends(get_db),
+) -> ProjectRevisionDiff:
+    diff = diff_revisions(db, project_id, from_revision, to_revision)
+    if diff is None:
+        raise HTTPException(status_code=404, detail="Revision not found")
+    return diff
+
+
+@router.get(
+    "/projects/{project_id}/revisions/{revision}",
+    response_model=ProjectRevisionDetail,
+    response_model_by_alias=True,
+)
+def project_revision(project_id: str, revision: int, db: Session = Depends(get_db)) -> Response:
+    revision_json = get_revision_json(db, project_id, revision)
+    if revision_json is None:
+        raise HTTPException(status_code=404, detail="Revision not found")
+    return Response(content=revision_json, media_type="application/json")
+
+
 @router.get("/projects/{project_id}/export")
 def export_project_endpoint(
     project_id: str,
@@ -126,7 +468,7 @@ def export_project_endpoint(
 
     if format == "csv":
         return Response(content=exported, media_type="text/csv; charset=utf-8")
-    return exported
+    return Response(content=exported, media_type="application/json")
 
 
 @router.get(
@@ -9,12 +9,15 @@ if __package__ in (None, ""):
     if str(repo_root) not in sys.path:
         sys.path.insert(0, str(repo_root))
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 
 from backend.api.routes import router as api_router
-from backend.models.database import init_db
+from backend.models.database import init_db, workspace_pool
+from backend.services.fees import FeeScheduleError
+from backend.services.jobs import start_job_runner, stop_job_runner
 
 
 def create_app() -> FastAPI:
@@ -35,9 +38,20 @@ def create_app() -> FastAPI:
 
     app.include_router(api_router)
 
+    @app.exception_handler(FeeScheduleError)
+    def _fee_schedule_error(_request: Request, exc: FeeScheduleError) -> JSONResponse:
+        return JSONResponse(status_code=422, content={"detail": str(exc)})
+
     @app.on_event("startup")
     def _startup() -> None:
         init_db()
+        workspace_pool.start_sweeper()
+        start_job_runner()
+
+    @app.on_event("shutdown")
+    def _shutdown() -> None:
+        stop_job_runner()
+        workspace_pool.dispose()
 
     dist_dir = Path(__file__).resolve().parent.parent / "frontend" / "dist"
     if dist_dir.exists():
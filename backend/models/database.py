@@ -1,11 +1,39 @@
 from __future__ import annotations
 
 import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 
-from sqlalchemy import ForeignKey, String, Text, create_engine
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, sessionmaker
+from sqlalchemy import (
+    Boolean,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    create_engine,
+    event,
+    text,
+)
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import DeclarativeBase, Mapped, Session, mapped_column, sessionmaker
+
+from backend.utils.helpers import cjk_terms
+
+DEFAULT_WORKSPACE = "default"
+_WORKSPACE_ID = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$")
+
+
+class WorkspaceError(ValueError):
+    pass
 
 
 def get_database_path() -> str:
@@ -15,16 +43,93 @@ def get_database_path() -> str:
     return str(Path(__file__).resolve().parent.parent / "fba_calculator.db")
 
 
-def _create_engine():
-    db_path = get_database_path()
-    return create_engine(
-        f"sqlite:///{db_path}",
-        connect_args={"check_same_thread": False},
+def get_workspace_dir() -> Path:
+    env_dir = os.getenv("WORKSPACE_DIR")
+    if env_dir:
+        return Path(env_dir)
+    return Path(get_database_path()).resolve().parent / "workspaces"
+
+
+def get_workspace_pool_size() -> int:
+    return int(os.getenv("WORKSPACE_POOL_SIZE", "16"))
+
+
+def get_workspace_idle_seconds() -> float:
+    return float(os.getenv("WORKSPACE_IDLE_SECONDS", "300"))
+
+
+def validate_workspace_id(workspace_id: str) -> str:
+    if not _WORKSPACE_ID.match(workspace_id):
+        raise WorkspaceError(f"Invalid workspace id: {workspace_id!r}")
+    return workspace_id
+
+
+def workspace_database_path(workspace_id: str) -> str:
+    if validate_workspace_id(workspace_id) == DEFAULT_WORKSPACE:
+        return get_database_path()
+    return str(get_workspace_dir() / f"{workspace_id}.db")
+
+
+def _create_engine(db_path: Optional[str] = None, timeout: Optional[float] = None) -> Engine:
+    connect_args: dict[str, Any] = {"check_same_thread": False}
+    if timeout is not None:
+        connect_args["timeout"] = timeout
+    db_engine = create_engine(
+        f"sqlite:///{db_path or get_database_path()}", connect_args=connect_args
     )
+    event.listen(db_engine, "connect", _register_functions)
+    return db_engine
+
+
+def _register_functions(dbapi_conn, _record) -> None:
+    # 全文索引写入时在 SQL 里直接生成 CJK 二字词
+    dbapi_conn.create_function("cjk_terms", 1, cjk_terms, deterministic=True)
+
+
+def _sessionmaker(bind: Engine) -> sessionmaker:
+    return sessionmaker(bind=bind, autoflush=False, autocommit=False, expire_on_commit=False)
 
 
 engine = _create_engine()
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False)
+SessionLocal = _sessionmaker(engine)
+
+
+PATH_SESSIONMAKER_CACHE_SIZE = 8
+_path_sessionmakers: "OrderedDict[str, sessionmaker]" = OrderedDict()
+_path_lock = threading.Lock()
+
+
+def sessionmaker_for_path(db_path: str) -> sessionmaker:
+    """Sessionmaker for a database file used outside request handling.
+
+    Job workers open the jobs database and workspace databases through here.
+    At most ``PATH_SESSIONMAKER_CACHE_SIZE`` engines are kept; the least
+    recently used one is disposed when another path is opened, so a worker
+    visiting many workspaces does not accumulate connections.
+    """
+    with _path_lock:
+        factory = _path_sessionmakers.get(db_path)
+        if factory is not None:
+            _path_sessionmakers.move_to_end(db_path)
+            return factory
+
+    path_engine = _create_engine(db_path, timeout=30)
+    init_db(path_engine)
+    evicted: list[sessionmaker] = []
+    with _path_lock:
+        factory = _path_sessionmakers.get(db_path)
+        if factory is None:
+            factory = _path_sessionmakers[db_path] = _sessionmaker(path_engine)
+            path_engine = None
+            while len(_path_sessionmakers) > PATH_SESSIONMAKER_CACHE_SIZE:
+                evicted.append(_path_sessionmakers.popitem(last=False)[1])
+        _path_sessionmakers.move_to_end(db_path)
+    if path_engine is not None:
+        path_engine.dispose()
+    # 已被淘汰的 sessionmaker 若仍被引用，下次使用时会重新建立连接
+    for old in evicted:
+        old.kw["bind"].dispose()
+    return factory
 
 
 class Base(DeclarativeBase):
@@ -45,6 +150,25 @@ class Project(Base):
     result_json: Mapped[str] = mapped_column(Text, nullable=False)
     created_at: Mapped[str] = mapped_column(String, nullable=False)
     updated_at: Mapped[str] = mapped_column(String, nullable=False)
+    # 最新修订号；0 表示该项目创建于修订历史之前
+    revision: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+
+
+class ProjectRevision(Base):
+    __tablename__ = "project_revisions"
+    __table_args__ = (
+        Index("ix_project_revisions_project_revision", "project_id", "revision", unique=True),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    project_id: Mapped[str] = mapped_column(String, nullable=False)
+    revision: Mapped[int] = mapped_column(Integer, nullable=False)
+    is_snapshot: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    # 快照存完整输入；增量存 {"set": {路径: 值}, "unset": [路径]}
+    data_json: Mapped[str] = mapped_column(Text, nullable=False)
+    name: Mapped[str] = mapped_column(String, nullable=False)
+    description: Mapped[str] = mapped_column(Text, nullable=False, default="")
+    created_at: Mapped[str] = mapped_column(String, nullable=False)
 
 
 class Setting(Base):
@@ -54,7 +178,303 @@ class Setting(Base):
     value: Mapped[str] = mapped_column(Text, nullable=False)
 
 
-def init_db() -> None:
-    db_path = Path(get_database_path())
-    db_path.parent.mkdir(parents=True, exist_ok=True)
-    Base.metadata.create_all(bind=engine)
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id: Mapped[str] = mapped_column(String, primary_key=True)
+    kind: Mapped[str] = mapped_column(String, nullable=False)
+    status: Mapped[str] = mapped_column(String, nullable=False, index=True)
+    params_json: Mapped[str] = mapped_column(Text, nullable=False)
+    progress: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    message: Mapped[str] = mapped_column(Text, nullable=False, default="")
+    result_json: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    result_path: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    cancel_requested: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    owner_pid: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    workspace_id: Mapped[str] = mapped_column(
+        String, nullable=False, default=DEFAULT_WORKSPACE, server_default=DEFAULT_WORKSPACE
+    )
+    created_at: Mapped[str] = mapped_column(String, nullable=False)
+    started_at: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    finished_at: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    updated_at: Mapped[str] = mapped_column(String, nullable=False)
+
+
+# 项目名称/描述的全文索引，rowid 与 projects 表的 rowid 一一对应
+PROJECT_FTS_TABLE = "project_fts"
+PROJECT_FTS_COLUMNS = ("name", "description", "name_cjk", "description_cjk")
+PROJECT_FTS_INSERT = (
+    f"INSERT INTO {PROJECT_FTS_TABLE}(rowid, {', '.join(PROJECT_FTS_COLUMNS)}) "
+    "SELECT rowid, name, description, cjk_terms(name), cjk_terms(description)"
+)
+
+
+def init_project_fts(conn: Connection) -> None:
+    columns = [
+        row[1] for row in conn.execute(text(f"PRAGMA table_info({PROJECT_FTS_TABLE})"))
+    ]
+    if columns and columns != list(PROJECT_FTS_COLUMNS):
+        # 旧版索引没有 CJK 列，删掉后按新结构重建
+        conn.execute(text(f"DROP TABLE {PROJECT_FTS_TABLE}"))
+    conn.execute(
+        text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {PROJECT_FTS_TABLE} USING fts5("
+            f"{', '.join(PROJECT_FTS_COLUMNS)}, "
+            "tokenize = 'unicode61 remove_diacritics 2', prefix = '1 2 3')"
+        )
+    )
+    # 名称命中的权重高于描述
+    conn.execute(
+        text(
+            f"INSERT INTO {PROJECT_FTS_TABLE}({PROJECT_FTS_TABLE}, rank) "
+            "VALUES ('rank', 'bm25(10.0, 1.0, 10.0, 1.0)')"
+        )
+    )
+    indexed = conn.execute(text(f"SELECT count(*) FROM {PROJECT_FTS_TABLE}")).scalar_one()
+    total = conn.execute(text("SELECT count(*) FROM projects")).scalar_one()
+    if indexed != total:
+        # 旧库或索引不一致时整体重建
+        conn.execute(text(f"DELETE FROM {PROJECT_FTS_TABLE}"))
+        conn.execute(text(f"{PROJECT_FTS_INSERT} FROM projects"))
+
+
+def _add_missing_columns(conn: Connection) -> None:
+    # create_all 不会修改已有表；带 server_default 的新列在旧库上补齐
+    for table in Base.metadata.sorted_tables:
+        existing = {row[1] for row in conn.execute(text(f"PRAGMA table_info({table.name})"))}
+        for column in table.columns:
+            if column.name in existing or column.server_default is None:
+                continue
+            column_type = column.type.compile(dialect=conn.dialect)
+            default = str(column.server_default.arg).replace("'", "''")
+            conn.execute(
+                text(
+                    f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type} "
+                    f"NOT NULL DEFAULT '{default}'"
+                )
+            )
+
+
+def init_db(bind: Optional[Engine] = None) -> None:
+    if bind is None:
+        db_path = Path(get_database_path())
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        bind = engine
+    # 多个线程/进程可能同时初始化同一个新库：用 BEGIN IMMEDIATE 先拿写锁，
+    # 建表前的存在性检查与建表串行执行，后来者只会看到已建好的表
+    with bind.connect() as conn:
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+        Base.metadata.create_all(bind=conn)
+        _add_missing_columns(conn)
+        init_project_fts(conn)
+        conn.commit()
+
+
+# ========== 多工作区 ==========
+class _PooledWorkspace:
+    __slots__ = (
+        "workspace_id",
+        "db_path",
+        "engine",
+        "sessionmaker",
+        "active",
+        "opened_at",
+        "last_used",
+        "sessions",
+        "errors",
+        "busy_seconds",
+    )
+
+    def __init__(self, workspace_id: str, db_path: str, bind: Engine, factory: sessionmaker):
+        self.workspace_id = workspace_id
+        self.db_path = db_path
+        self.engine = bind
+        self.sessionmaker = factory
+        self.active = 0
+        self.opened_at = datetime.now(timezone.utc).astimezone().isoformat()
+        self.last_used = time.monotonic()
+        self.sessions = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+
+
+class WorkspaceEnginePool:
+    """LRU pool of per-workspace SQLite engines.
+
+    Each workspace gets its own database file, created and migrated on first
+    use. Engines that are idle longer than ``idle_seconds``, or that fall off
+    the end of the LRU once more than ``max_size`` are open, are disposed;
+    engines with checked-out sessions are never evicted. The default
+    workspace reuses the module-level ``engine`` and stays pinned.
+
+    Eviction runs whenever the pool is used; ``start_sweeper`` adds a
+    background thread so idle engines are also closed on a quiet server.
+    """
+
+    def __init__(self, max_size: Optional[int] = None, idle_seconds: Optional[float] = None):
+        self.max_size = max_size if max_size is not None else get_workspace_pool_size()
+        self.idle_seconds = (
+            idle_seconds if idle_seconds is not None else get_workspace_idle_seconds()
+        )
+        self.opened = 0
+        self.evicted = 0
+        self._entries: "OrderedDict[str, _PooledWorkspace]" = OrderedDict()
+        self._opening: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop_sweeper = threading.Event()
+
+    def _open(self, workspace_id: str) -> _PooledWorkspace:
+        db_path = workspace_database_path(workspace_id)
+        if workspace_id == DEFAULT_WORKSPACE:
+            return _PooledWorkspace(workspace_id, db_path, engine, SessionLocal)
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        bind = _create_engine(db_path, timeout=30)
+        init_db(bind)
+        return _PooledWorkspace(workspace_id, db_path, bind, _sessionmaker(bind))
+
+    def _checkout_locked(self, workspace_id: str) -> Optional[_PooledWorkspace]:
+        entry = self._entries.get(workspace_id)
+        if entry is not None:
+            entry.active += 1
+            self._entries.move_to_end(workspace_id)
+        return entry
+
+    def _acquire(self, workspace_id: str) -> _PooledWorkspace:
+        with self._lock:
+            entry = self._checkout_locked(workspace_id)
+            if entry is not None:
+                return entry
+            open_lock = self._opening.setdefault(workspace_id, threading.Lock())
+
+        # 建库/迁移放在全局锁外，避免新租户阻塞其他租户的请求；
+        # 同一工作区只由一个调用方打开，其余调用方等待后直接复用
+        with open_lock:
+            with self._lock:
+                entry = self._checkout_locked(workspace_id)
+                if entry is not None:
+                    return entry
+            try:
+                opened = self._open(workspace_id)
+            except BaseException:
+                with self._lock:
+                    self._opening.pop(workspace_id, None)
+                raise
+            return self._store(workspace_id, opened)
+
+    def _store(self, workspace_id: str, opened: _PooledWorkspace) -> _PooledWorkspace:
+        with self._lock:
+            self._opening.pop(workspace_id, None)
+            entry = self._entries.get(workspace_id)
+            if entry is None:
+                entry = self._entries[workspace_id] = opened
+                self.opened += 1
+                opened = None
+            entry.active += 1
+            self._entries.move_to_end(workspace_id)
+            self._evict_locked()
+        if opened is not None and opened.engine is not engine:
+            opened.engine.dispose()
+        return entry
+
+    def _release(self, entry: _PooledWorkspace, elapsed: float, failed: bool) -> None:
+        with self._lock:
+            entry.active -= 1
+            entry.sessions += 1
+            entry.errors += int(failed)
+            entry.busy_seconds += elapsed
+            entry.last_used = time.monotonic()
+            self._evict_locked()
+
+    def _evict_locked(self) -> None:
+        now = time.monotonic()
+        overflow = len(self._entries) - self.max_size
+        for workspace_id, entry in list(self._entries.items()):
+            if entry.active or workspace_id == DEFAULT_WORKSPACE:
+                continue
+            if overflow > 0 or now - entry.last_used > self.idle_seconds:
+                del self._entries[workspace_id]
+                entry.engine.dispose()
+                self.evicted += 1
+                overflow -= 1
+
+    @contextmanager
+    def session(self, workspace_id: str) -> Iterator[Session]:
+        entry = self._acquire(validate_workspace_id(workspace_id))
+        start = time.perf_counter()
+        failed = False
+        db = entry.sessionmaker()
+        db.info["workspace_id"] = workspace_id
+        try:
+            yield db
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            db.close()
+            self._release(entry, time.perf_counter() - start, failed)
+
+    def metrics(self) -> dict[str, Any]:
+        with self._lock:
+            self._evict_locked()
+            now = time.monotonic()
+            workspaces = [
+                {
+                    "workspace_id": e.workspace_id,
+                    "active_sessions": e.active,
+                    "sessions": e.sessions,
+                    "errors": e.errors,
+                    "busy_seconds": round(e.busy_seconds, 6),
+                    "idle_seconds": round(now - e.last_used, 3),
+                    "opened_at": e.opened_at,
+                    "db_path": e.db_path,
+                }
+                for e in self._entries.values()
+            ]
+            summary = {
+                "max_size": self.max_size,
+                "idle_seconds": self.idle_seconds,
+                "opened": self.opened,
+                "evicted": self.evicted,
+            }
+        for w in workspaces:
+            path = Path(w.pop("db_path"))
+            w["database_bytes"] = path.stat().st_size if path.exists() else 0
+        return {**summary, "workspaces": workspaces}
+
+    def sweep(self) -> int:
+        with self._lock:
+            before = self.evicted
+            self._evict_locked()
+            return self.evicted - before
+
+    def start_sweeper(self, interval: Optional[float] = None) -> None:
+        if self._sweeper is not None:
+            return
+        if interval is None:
+            interval = max(self.idle_seconds / 2, 1.0)
+        self._stop_sweeper.clear()
+
+        def run() -> None:
+            while not self._stop_sweeper.wait(interval):
+                self.sweep()
+
+        self._sweeper = threading.Thread(target=run, name="workspace-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def dispose(self) -> None:
+        if self._sweeper is not None:
+            self._stop_sweeper.set()
+            self._sweeper.join()
+            self._sweeper = None
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            if entry.engine is not engine:
+                entry.engine.dispose()
+
+
+workspace_pool = WorkspaceEnginePool()
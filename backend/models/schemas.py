@@ -1,19 +1,21 @@
 from __future__ import annotations
 
 from decimal import Decimal
-from typing import Literal, Optional
+from typing import Any, Literal, Optional
 
 from pydantic import BaseModel, ConfigDict, Field, model_validator
 
+from backend.utils.helpers import step_range
 
-def _to_camel(s: str) -> str:
+
+def to_camel(s: str) -> str:
     parts = s.split("_")
     return parts[0] + "".join(word.capitalize() for word in parts[1:])
 
 
 class APIModel(BaseModel):
     model_config = ConfigDict(
-        alias_generator=_to_camel,
+        alias_generator=to_camel,
         populate_by_name=True,
         extra="forbid",
         json_encoders={Decimal: lambda v: float(v)},
@@ -32,6 +34,16 @@ class PrePurchase(APIModel):
     shipping_per_unit: MoneyInput
 
 
+class FeeProfile(APIModel):
+    length_in: Decimal = Field(gt=0)
+    width_in: Decimal = Field(gt=0)
+    height_in: Decimal = Field(gt=0)
+    weight_lb: Decimal = Field(gt=0)
+    category: Optional[str] = None
+    season: Literal["off_peak", "peak"] = "off_peak"
+    schedule_version: Optional[str] = None
+
+
 class DuringSale(APIModel):
     selling_price: MoneyInput
     daily_sales: int = Field(ge=0)
@@ -42,8 +54,9 @@ class DuringSale(APIModel):
     ad_percentage: Optional[Decimal] = Field(default=None, ge=0, le=100)
 
     referral_fee_rate: Decimal = Field(default=Decimal("15"), ge=0, le=100)
-    fba_fee_per_unit: MoneyInput
-    monthly_storage_fee: MoneyInput
+    fba_fee_per_unit: Optional[MoneyInput] = None
+    monthly_storage_fee: Optional[MoneyInput] = None
+    fee_profile: Optional[FeeProfile] = None
 
     @model_validator(mode="after")
     def _validate_advertising_inputs(self):
@@ -51,6 +64,12 @@ class DuringSale(APIModel):
             raise ValueError("dailyAdBudget is required when advertisingMode=budget")
         if self.advertising_mode == "percentage" and self.ad_percentage is None:
             raise ValueError("adPercentage is required when advertisingMode=percentage")
+        if self.fee_profile is None and (
+            self.fba_fee_per_unit is None or self.monthly_storage_fee is None
+        ):
+            raise ValueError(
+                "fbaFeePerUnit and monthlyStorageFee are required when feeProfile is not set"
+            )
         return self
 
 
@@ -109,10 +128,224 @@ class IntermediateValues(APIModel):
     return_processing_fee_per_unit: Money
 
 
+class DailySeries(APIModel):
+    horizon_days: int
+    return_lag_days: int
+    inventory: list[float]
+    units_sold: list[float]
+    units_returned: list[float]
+    revenue_usd: list[float]
+    advertising_cost_usd: list[float]
+    storage_fee_usd: list[float]
+    net_cash_flow_usd: list[float]
+    cumulative_cash_usd: list[float]
+    break_even_day: Optional[int]
+    final_cash: Money
+    peak_capital: Money
+
+
 class FBACalculationResult(APIModel):
     summary: Summary
     cost_breakdown: CostBreakdown
     intermediate_values: IntermediateValues
+    daily_series: Optional[DailySeries] = None
+
+
+class CalculationSession(APIModel):
+    session_id: str
+    result: FBACalculationResult
+
+
+class CalculationPatch(APIModel):
+    patch: dict[str, Any]
+
+
+class CalculationDiff(APIModel):
+    session_id: str
+    changed: dict[str, Any]
+
+
+class FeeScheduleInfo(APIModel):
+    version: str
+    marketplace: str
+    effective_from: str
+    size_tiers: list[str]
+    categories: list[str]
+
+
+class FeeEstimateRequest(APIModel):
+    profile: FeeProfile
+    selling_price: MoneyInput
+    settings: Settings = Field(default_factory=Settings)
+
+
+class FeeEstimate(APIModel):
+    schedule_version: str
+    size_tier: str
+    shipping_weight_lb: float
+    cubic_feet: float
+    fba_fee_per_unit: Money
+    monthly_storage_fee: Money
+    referral_fee: Money
+    referral_fee_rate: float
+
+
+JobKind = Literal["sweep", "monte_carlo", "recompute_projects", "export_projects"]
+JobStatus = Literal["queued", "running", "succeeded", "failed", "cancelled"]
+
+
+class JobSubmitRequest(APIModel):
+    kind: JobKind
+    params: dict[str, Any] = Field(default_factory=dict)
+
+
+class JobInfo(APIModel):
+    id: str
+    kind: JobKind
+    workspace_id: str
+    status: JobStatus
+    progress: float
+    message: str
+    error: Optional[str]
+    attempts: int
+    cancel_requested: bool
+    has_result: bool
+    created_at: str
+    started_at: Optional[str]
+    finished_at: Optional[str]
+    updated_at: str
+
+
+class WorkspaceMetrics(APIModel):
+    workspace_id: str
+    active_sessions: int
+    sessions: int
+    errors: int
+    busy_seconds: float
+    idle_seconds: float
+    opened_at: str
+    database_bytes: int
+
+
+class WorkspacePoolMetrics(APIModel):
+    max_size: int
+    idle_seconds: float
+    opened: int
+    evicted: int
+    workspaces: list[WorkspaceMetrics]
+
+
+class SweepJobParams(APIModel):
+    input: FBACalculatorInput
+    grid: dict[str, list[Any]] = Field(min_length=1)
+
+    @model_validator(mode="after")
+    def _validate_grid_size(self):
+        points = 1
+        for values in self.grid.values():
+            points *= len(values)
+        if points == 0 or points > 100_000:
+            raise ValueError("grid must produce between 1 and 100000 points")
+        return self
+
+
+class Distribution(APIModel):
+    type: Literal["normal", "uniform", "triangular"]
+    mean: Optional[float] = None
+    std: Optional[float] = Field(default=None, ge=0)
+    low: Optional[float] = None
+    high: Optional[float] = None
+    mode: Optional[float] = None
+
+    @model_validator(mode="after")
+    def _validate_parameters(self):
+        if self.type == "normal" and (self.mean is None or self.std is None):
+            raise ValueError("normal distribution requires mean and std")
+        if self.type in ("uniform", "triangular") and (self.low is None or self.high is None):
+            raise ValueError(f"{self.type} distribution requires low and high")
+        if self.type == "triangular" and self.mode is None:
+            raise ValueError("triangular distribution requires mode")
+        return self
+
+
+class MonteCarloJobParams(APIModel):
+    input: FBACalculatorInput
+    distributions: dict[str, Distribution] = Field(min_length=1)
+    iterations: int = Field(default=1000, ge=1, le=100_000)
+    seed: Optional[int] = None
+
+
+class EmptyJobParams(APIModel):
+    pass
+
+
+OptimizerParameter = Literal["sellingPrice", "adPercentage", "dailyAdBudget", "quantity"]
+# 搜索参数的最小步长：金额/百分比到 0.01，数量到整数
+OPTIMIZER_PARAMETER_STEP: dict[str, float] = {
+    "sellingPrice": 0.01,
+    "adPercentage": 0.01,
+    "dailyAdBudget": 0.01,
+    "quantity": 1.0,
+}
+
+
+class ParameterBounds(APIModel):
+    min: float = Field(ge=0)
+    max: float = Field(ge=0)
+
+    @model_validator(mode="after")
+    def _validate_range(self):
+        if self.min > self.max:
+            raise ValueError("min must be <= max")
+        return self
+
+
+class OptimizerConstraints(APIModel):
+    max_break_even_days: Optional[float] = Field(default=None, gt=0)
+    min_net_profit: Optional[float] = None
+    min_roi: Optional[float] = None
+    min_net_profit_margin: Optional[float] = None
+    max_total_investment: Optional[float] = Field(default=None, ge=0)
+
+
+class ParetoOptimizeRequest(APIModel):
+    input: FBACalculatorInput
+    bounds: dict[OptimizerParameter, ParameterBounds] = Field(min_length=1, max_length=3)
+    constraints: OptimizerConstraints = Field(default_factory=OptimizerConstraints)
+    grid_points: int = Field(default=12, ge=2, le=50)
+    refine_rounds: int = Field(default=4, ge=0, le=10)
+    max_points: int = Field(default=200, ge=1, le=2000)
+
+    @model_validator(mode="after")
+    def _validate_bounds(self):
+        if "adPercentage" in self.bounds and "dailyAdBudget" in self.bounds:
+            raise ValueError("adPercentage and dailyAdBudget cannot be searched together")
+        if "adPercentage" in self.bounds and self.bounds["adPercentage"].max > 100:
+            raise ValueError("adPercentage bounds must be within 0..100")
+        if self.grid_points ** len(self.bounds) > 200_000:
+            raise ValueError("grid must produce at most 200000 points")
+        for name, bounds in self.bounds.items():
+            step = OPTIMIZER_PARAMETER_STEP[name]
+            low, high = step_range(bounds.min, bounds.max, step)
+            if low > high:
+                raise ValueError(f"{name} bounds must include a multiple of {step:g}")
+        return self
+
+
+class ParetoPoint(APIModel):
+    parameters: dict[str, float]
+    net_profit: float
+    roi: float
+    total_investment: float
+    net_profit_margin: float
+    break_even_days: Optional[float]
+
+
+class ParetoOptimizeResponse(APIModel):
+    evaluated: int
+    feasible: int
+    rounds: int
+    points: list[ParetoPoint]
 
 
 class SavedProjectSummary(APIModel):
@@ -152,8 +385,81 @@ class BranchCreateRequest(APIModel):
     description: str = Field(default="", max_length=2000)
 
 
+class BranchPatch(APIModel):
+    name: str = Field(min_length=1, max_length=200)
+    description: str = Field(default="", max_length=2000)
+    patch: dict[str, Any] = Field(default_factory=dict)
+
+
+class BulkBranchCreateRequest(APIModel):
+    branches: list[BranchPatch] = Field(default_factory=list)
+    grid: dict[str, list[Any]] = Field(default_factory=dict)
+    name_prefix: Optional[str] = Field(default=None, max_length=100)
+    description: str = Field(default="", max_length=2000)
+
+    @model_validator(mode="after")
+    def _validate_branch_count(self):
+        points = 0
+        if self.grid:
+            points = 1
+            for values in self.grid.values():
+                points *= len(values)
+        total = len(self.branches) + points
+        if total == 0 or total > 1000:
+            raise ValueError("branches and grid must produce between 1 and 1000 branches")
+        return self
+
+
+class BulkBranchCreateResponse(APIModel):
+    parent_id: str
+    created: list[SavedProjectSummary]
+
+
 class DeleteProjectsResponse(APIModel):
     deleted_ids: list[str]
 
 
+class ProjectRevisionInfo(APIModel):
+    revision: int
+    name: str
+    description: str
+    is_snapshot: bool
+    created_at: str
+
+
+class ProjectRevisionDetail(ProjectRevisionInfo):
+    project_id: str
+    input: FBACalculatorInput
+    result: FBACalculationResult
+
+
+class FieldChange(APIModel):
+    path: str
+    before: Any = None
+    after: Any = None
+
+
+class ProjectRevisionDiff(APIModel):
+    project_id: str
+    from_revision: int
+    to_revision: int
+    input_changes: list[FieldChange]
+    result_changes: list[FieldChange]
+
+
+class ProjectSearchHit(APIModel):
+    project: SavedProjectSummary
+    name_highlight: str
+    description_snippet: str
+    score: float
+
+
+class ProjectSearchResponse(APIModel):
+    query: str
+    total: int
+    limit: int
+    offset: int
+    items: list[ProjectSearchHit]
+
+
 ProjectNode.model_rebuild()
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import timeit
+import tracemalloc
+from collections.abc import Callable
+from typing import Any
+
+from backend.models.schemas import FBACalculatorInput
+from backend.services import calculator
+from backend.utils.helpers import json_dumps
+from backend.utils.samples import SAMPLE_CALCULATOR_INPUT
+
+
+def measure(fn: Callable[[], Any], number: int = 5000, retained: int = 1000) -> dict[str, float]:
+    fn()
+    seconds = timeit.timeit(fn, number=number) / number
+
+    tracemalloc.start()
+    fn()
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    keep = [fn() for _ in range(retained)]
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del keep
+
+    return {
+        "us_per_call": seconds * 1e6,
+        "peak_bytes": peak,
+        "retained_bytes": current / retained,
+    }
+
+
+def main() -> None:
+    input_data = FBACalculatorInput.model_validate(SAMPLE_CALCULATOR_INPUT)
+    cases: dict[str, Callable[[], Any]] = {
+        "calculate_fba_profit (pydantic result)": lambda: calculator.calculate_fba_profit(input_data),
+        "calculate + store as JSON": lambda: json_dumps(
+            calculator.calculate_fba_profit(input_data).model_dump(mode="json", by_alias=True)
+        ),
+        "calculate (compact result)": lambda: calculator.calculate(input_data),
+        "calculate + to_json": lambda: calculator.calculate(input_data).to_json(),
+    }
+
+    for name, fn in cases.items():
+        m = measure(fn)
+        print(
+            f"{name:42s} {m['us_per_call']:8.1f} us/call"
+            f"  peak {m['peak_bytes']:7.0f} B  retained {m['retained_bytes']:7.0f} B/result"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Optional
+
+from backend.models.schemas import CalculationDiff, CalculationSession, FBACalculatorInput
+from backend.services.calculator import (
+    EvaluationState,
+    apply_patch,
+    evaluate,
+    evaluate_incremental,
+)
+
+
+def _session_limit() -> int:
+    return int(os.getenv("CALC_SESSION_LIMIT", "1024"))
+
+
+_sessions: "OrderedDict[str, EvaluationState]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def _store_locked(session_id: str, state: EvaluationState) -> None:
+    _sessions[session_id] = state
+    _sessions.move_to_end(session_id)
+    while len(_sessions) > _session_limit():
+        _sessions.popitem(last=False)
+
+
+def create_calculation_session(input_data: FBACalculatorInput) -> CalculationSession:
+    state = evaluate(input_data)
+    session_id = str(uuid.uuid4())
+    with _lock:
+        _store_locked(session_id, state)
+    return CalculationSession(session_id=session_id, result=state.result().to_model())
+
+
+def patch_calculation_session(
+    session_id: str, patch: dict[str, Any]
+) -> Optional[CalculationDiff]:
+    while True:
+        with _lock:
+            state = _sessions.get(session_id)
+        if state is None:
+            return None
+
+        # 计算在锁外进行；写回前确认状态未被并发补丁替换，否则基于最新状态重算
+        new_state, changed = evaluate_incremental(state, apply_patch(state.input, patch))
+        with _lock:
+            if _sessions.get(session_id) is not state:
+                continue
+            _store_locked(session_id, new_state)
+        return CalculationDiff(session_id=session_id, changed=changed)
+
+
+def delete_calculation_session(session_id: str) -> bool:
+    with _lock:
+        return _sessions.pop(session_id, None) is not None
@@ -1,19 +1,29 @@
 from __future__ import annotations
 
+import math
+from collections.abc import Callable
 from decimal import Decimal, ROUND_HALF_UP
-from typing import Optional, Union
+from typing import Any, Optional, Union
 
 from backend.models.schemas import (
-    CostBreakdown,
     FBACalculationResult,
     FBACalculatorInput,
-    IntermediateValues,
+    FeeEstimate,
+    FeeEstimateRequest,
     Money,
     MoneyInput,
-    Summary,
+    to_camel,
 )
+from backend.services.fees import lookup_fees
+from backend.utils.helpers import json_dumps
 
 TWOPLACES = Decimal("0.01")
+FOURPLACES = Decimal("0.0001")
+
+# 费用规则常量；simulation / optimizer 的向量化公式也从这里取值
+RETURN_PROCESSING_FEE_RATE = Decimal("0.20")
+RETURN_PROCESSING_FEE_CAP = Decimal("5.0")
+STORAGE_DAYS_PER_MONTH = 30
 
 
 def _q2(value: Decimal) -> Decimal:
@@ -26,151 +36,513 @@ def _money(value_usd: Decimal, exchange_rate: Decimal) -> Money:
     return Money(usd=float(usd), cny=float(cny))
 
 
+def _cny(usd: float, exchange_rate: Decimal) -> float:
+    # 等价于 float(_q2(Decimal(repr(usd)) * exchange_rate))，用整数运算避免 Decimal 开销
+    num, den = exchange_rate.as_integer_ratio()
+    scaled = round(usd * 100) * num
+    cents = (2 * abs(scaled) + den) // (2 * den)
+    return math.copysign(cents / 100, usd)
+
+
 def _money_input_usd(m: MoneyInput, exchange_rate: Decimal) -> Decimal:
     if m.primary_currency == "CNY":
         return m.cny / exchange_rate
     return m.usd
 
 
-def calculate_fba_profit(
-    input_data: Union[FBACalculatorInput, dict]
-) -> FBACalculationResult:
-    if not isinstance(input_data, FBACalculatorInput):
-        input_data = FBACalculatorInput.model_validate(input_data)
+def _fee_usd(value: float, places: Decimal) -> Decimal:
+    return Decimal(repr(value)).quantize(places, rounding=ROUND_HALF_UP)
 
-    exchange_rate = input_data.settings.exchange_rate
 
-    unit_cost = _money_input_usd(input_data.pre_purchase.unit_cost, exchange_rate)
-    quantity = Decimal(input_data.pre_purchase.quantity)
-    shipping_per_unit = _money_input_usd(input_data.pre_purchase.shipping_per_unit, exchange_rate)
+def _fee_referral_rate(rate: float) -> Decimal:
+    percent = (Decimal(repr(rate)) * Decimal("100")).quantize(FOURPLACES, rounding=ROUND_HALF_UP)
+    return min(percent, Decimal("100"))
+
+
+def _usd_money_input(usd: Decimal, exchange_rate: Decimal) -> MoneyInput:
+    return MoneyInput(usd=usd, cny=_q2(usd * exchange_rate), primary_currency="USD")
+
+
+def estimate_fees(request: FeeEstimateRequest) -> FeeEstimate:
+    exchange_rate = request.settings.exchange_rate
+    selling_price = _money_input_usd(request.selling_price, exchange_rate)
+    fees = lookup_fees(request.profile, selling_price)
+
+    def money(value: float) -> Money:
+        return _money(Decimal(repr(value)), exchange_rate)
 
-    selling_price = _money_input_usd(input_data.during_sale.selling_price, exchange_rate)
-    daily_sales = Decimal(input_data.during_sale.daily_sales)
-    sales_days = Decimal(input_data.during_sale.sales_days)
+    def fee(value: float, places: Decimal) -> Money:
+        # 与 apply_fee_profile 填入计算的精度一致：配送费两位，仓储费四位
+        usd = _fee_usd(value, places)
+        return Money(usd=float(usd), cny=float(_q2(usd * exchange_rate)))
 
-    referral_fee_rate = input_data.during_sale.referral_fee_rate / Decimal("100")
-    fba_fee_per_unit = _money_input_usd(input_data.during_sale.fba_fee_per_unit, exchange_rate)
-    monthly_storage_fee = _money_input_usd(
-        input_data.during_sale.monthly_storage_fee, exchange_rate
+    return FeeEstimate(
+        schedule_version=fees["schedule_version"],
+        size_tier=fees["size_tier"],
+        shipping_weight_lb=round(fees["shipping_weight_lb"], 4),
+        cubic_feet=round(fees["cubic_feet"], 4),
+        fba_fee_per_unit=fee(fees["fulfillment_fee"], TWOPLACES),
+        monthly_storage_fee=fee(fees["monthly_storage_fee"], FOURPLACES),
+        referral_fee=money(fees["referral_fee"]),
+        referral_fee_rate=float(_fee_referral_rate(fees["referral_fee_rate"])),
     )
 
-    return_rate = input_data.after_sale.return_rate / Decimal("100")
-    resellable_rate = input_data.after_sale.resellable_rate / Decimal("100")
 
-    # ========== 售前成本 ==========
-    purchase_cost = unit_cost * quantity
-    shipping_cost = shipping_per_unit * quantity
-    total_pre_cost = purchase_cost + shipping_cost
+def apply_fee_profile(input_data: FBACalculatorInput) -> FBACalculatorInput:
+    during_sale = input_data.during_sale
+    if during_sale.fee_profile is None:
+        return input_data
 
-    # ========== 售中 ==========
-    planned_sales = daily_sales * sales_days
-    actual_sales_quantity = min(quantity, planned_sales)
+    exchange_rate = input_data.settings.exchange_rate
+    selling_price = _money_input_usd(during_sale.selling_price, exchange_rate)
+    fees = lookup_fees(during_sale.fee_profile, selling_price)
+
+    during_sale = during_sale.model_copy(
+        update={
+            "fba_fee_per_unit": _usd_money_input(
+                _fee_usd(fees["fulfillment_fee"], TWOPLACES), exchange_rate
+            ),
+            "monthly_storage_fee": _usd_money_input(
+                _fee_usd(fees["monthly_storage_fee"], FOURPLACES), exchange_rate
+            ),
+            "referral_fee_rate": _fee_referral_rate(fees["referral_fee_rate"]),
+        }
+    )
+    return input_data.model_copy(update={"during_sale": during_sale})
+
+
+# ========== 计算依赖图 ==========
+# 叶子节点是输入字段（camelCase 路径，如 "afterSale.returnRate"），中间节点是命名的计算量，
+# 输出节点对应 FBACalculationResult 中的字段（如 "summary.netProfit"）。
+
+_INPUT_ATTRS: tuple[tuple[str, str, str], ...] = tuple(
+    (f"{to_camel(section)}.{to_camel(field)}", section, field)
+    for section, model in FBACalculatorInput.model_fields.items()
+    for field in model.annotation.model_fields
+)
+INPUT_FIELDS: tuple[str, ...] = tuple(path for path, _section, _field in _INPUT_ATTRS)
+
+_NODES: dict[str, tuple[tuple[str, ...], Callable[..., Any]]] = {}
+OUTPUT_FIELDS: list[str] = []
+_MONEY_OUTPUTS: set[str] = set()
 
-    total_revenue = selling_price * actual_sales_quantity
 
-    if input_data.during_sale.advertising_mode == "budget":
-        daily_budget = _money_input_usd(input_data.during_sale.daily_ad_budget, exchange_rate)
-        advertising_cost = daily_budget * sales_days
+def _node(name: str, *deps: str):
+    def register(fn: Callable[..., Any]) -> Callable[..., Any]:
+        _NODES[name] = (deps, fn)
+        return fn
+
+    return register
+
+
+def _output(path: str, source: str, kind: str = "money") -> None:
+    # 金额输出只保存四舍五入后的 USD，CNY 在序列化时按汇率换算
+    if kind == "money":
+        _MONEY_OUTPUTS.add(path)
+    if kind == "optional":
+        _node(path, source)(lambda v: float(_q2(v)) if v is not None else None)
+    elif kind == "coefficient":
+        _node(path, source)(lambda v: float(v.quantize(FOURPLACES, rounding=ROUND_HALF_UP)))
     else:
-        ad_percentage = (input_data.during_sale.ad_percentage or Decimal("0")) / Decimal("100")
-        advertising_cost = total_revenue * ad_percentage
+        _node(path, source)(lambda v: float(_q2(v)))
+    OUTPUT_FIELDS.append(path)
+
+
+# ========== 输入换算 ==========
+@_node("exchange_rate", "settings.exchangeRate")
+def _exchange_rate(rate):
+    return rate
+
+
+@_node("unit_cost", "prePurchase.unitCost", "exchange_rate")
+@_node("shipping_per_unit", "prePurchase.shippingPerUnit", "exchange_rate")
+@_node("selling_price", "duringSale.sellingPrice", "exchange_rate")
+def _usd(m, exchange_rate):
+    return _money_input_usd(m, exchange_rate)
 
-    referral_fee_per_unit = selling_price * referral_fee_rate
-    total_referral_fee = referral_fee_per_unit * actual_sales_quantity
 
-    total_fba_fee = fba_fee_per_unit * actual_sales_quantity
+@_node("quantity", "prePurchase.quantity")
+@_node("daily_sales", "duringSale.dailySales")
+@_node("sales_days", "duringSale.salesDays")
+def _count(value):
+    return Decimal(value)
 
+
+@_node("fee_lookup", "duringSale.feeProfile", "selling_price")
+def _fee_lookup(profile, selling_price):
+    return lookup_fees(profile, selling_price) if profile is not None else None
+
+
+@_node("fba_fee_per_unit", "duringSale.fbaFeePerUnit", "fee_lookup", "exchange_rate")
+def _fba_fee_per_unit(m, fees, exchange_rate):
+    if fees is not None:
+        return _fee_usd(fees["fulfillment_fee"], TWOPLACES)
+    return _money_input_usd(m, exchange_rate)
+
+
+@_node("monthly_storage_fee", "duringSale.monthlyStorageFee", "fee_lookup", "exchange_rate")
+def _monthly_storage_fee(m, fees, exchange_rate):
+    if fees is not None:
+        return _fee_usd(fees["monthly_storage_fee"], FOURPLACES)
+    return _money_input_usd(m, exchange_rate)
+
+
+@_node("referral_fee_rate", "duringSale.referralFeeRate", "fee_lookup")
+def _referral_fee_rate(percent, fees):
+    if fees is not None:
+        percent = _fee_referral_rate(fees["referral_fee_rate"])
+    return percent / Decimal("100")
+
+
+@_node("return_rate", "afterSale.returnRate")
+@_node("resellable_rate", "afterSale.resellableRate")
+def _rate(percent):
+    return percent / Decimal("100")
+
+
+def _product(a, b):
+    return a * b
+
+
+def _difference(a, b):
+    return a - b
+
+
+def _sum(*values):
+    return sum(values, Decimal("0"))
+
+
+def _percent_of(value, base):
+    return (value / base) * Decimal("100") if base > 0 else Decimal("0")
+
+
+# ========== 售前成本 ==========
+_node("purchase_cost", "unit_cost", "quantity")(_product)
+_node("shipping_cost", "shipping_per_unit", "quantity")(_product)
+_node("total_pre_cost", "purchase_cost", "shipping_cost")(_sum)
+
+# ========== 售中 ==========
+_node("planned_sales", "daily_sales", "sales_days")(_product)
+_node("actual_sales_quantity", "quantity", "planned_sales")(min)
+_node("total_revenue", "selling_price", "actual_sales_quantity")(_product)
+
+
+@_node(
+    "advertising_cost",
+    "duringSale.advertisingMode",
+    "duringSale.dailyAdBudget",
+    "duringSale.adPercentage",
+    "sales_days",
+    "total_revenue",
+    "exchange_rate",
+)
+def _advertising_cost(mode, daily_ad_budget, ad_percentage, sales_days, total_revenue, exchange_rate):
+    if mode == "budget":
+        return _money_input_usd(daily_ad_budget, exchange_rate) * sales_days
+    return total_revenue * ((ad_percentage or Decimal("0")) / Decimal("100"))
+
+
+_node("referral_fee_per_unit", "selling_price", "referral_fee_rate")(_product)
+_node("total_referral_fee", "referral_fee_per_unit", "actual_sales_quantity")(_product)
+_node("total_fba_fee", "fba_fee_per_unit", "actual_sales_quantity")(_product)
+
+
+@_node("storage_coefficient", "sales_days")
+def _storage_coefficient(sales_days):
     avg_storage_days = sales_days / Decimal("2")
-    storage_coefficient = avg_storage_days / Decimal("30") if sales_days > 0 else Decimal("0")
-    actual_storage_fee_per_unit = monthly_storage_fee * storage_coefficient
-    total_storage_fee = actual_storage_fee_per_unit * actual_sales_quantity
+    return avg_storage_days / STORAGE_DAYS_PER_MONTH if sales_days > 0 else Decimal("0")
 
-    gross_cost = (
-        total_pre_cost + advertising_cost + total_referral_fee + total_fba_fee + total_storage_fee
-    )
 
-    gross_profit = total_revenue - gross_cost
-    gross_profit_margin = (
-        (gross_profit / total_revenue) * Decimal("100") if total_revenue > 0 else Decimal("0")
-    )
+_node("actual_storage_fee_per_unit", "monthly_storage_fee", "storage_coefficient")(_product)
+_node("total_storage_fee", "actual_storage_fee_per_unit", "actual_sales_quantity")(_product)
+_node(
+    "gross_cost",
+    "total_pre_cost",
+    "advertising_cost",
+    "total_referral_fee",
+    "total_fba_fee",
+    "total_storage_fee",
+)(_sum)
+_node("gross_profit", "total_revenue", "gross_cost")(_difference)
+_node("gross_profit_margin", "gross_profit", "total_revenue")(_percent_of)
 
-    # ========== 售后 ==========
-    return_quantity = actual_sales_quantity * return_rate
+# ========== 售后 ==========
+_node("return_quantity", "actual_sales_quantity", "return_rate")(_product)
 
-    return_processing_fee_per_unit = min(
-        referral_fee_per_unit * Decimal("0.20"), Decimal("5.0")
-    )
-    total_return_processing_fee = return_processing_fee_per_unit * return_quantity
-
-    resellable_quantity = return_quantity * resellable_rate
-    unsellable_quantity = return_quantity * (Decimal("1") - resellable_rate)
-
-    unsellable_disposal_fee = fba_fee_per_unit * unsellable_quantity
-    return_loss = (unit_cost + shipping_per_unit) * unsellable_quantity
-
-    refunded_referral_fee = referral_fee_per_unit * return_quantity
-    adjusted_referral_fee = total_referral_fee - refunded_referral_fee
-
-    total_cost = (
-        total_pre_cost
-        + advertising_cost
-        + adjusted_referral_fee
-        + total_fba_fee
-        + total_storage_fee
-        + total_return_processing_fee
-        + unsellable_disposal_fee
-        + return_loss
-    )
 
-    net_profit = total_revenue - total_cost
-    net_profit_margin = (
-        (net_profit / total_revenue) * Decimal("100") if total_revenue > 0 else Decimal("0")
-    )
+@_node("return_processing_fee_per_unit", "referral_fee_per_unit")
+def _return_processing_fee_per_unit(referral_fee_per_unit):
+    return min(referral_fee_per_unit * RETURN_PROCESSING_FEE_RATE, RETURN_PROCESSING_FEE_CAP)
+
+
+_node("total_return_processing_fee", "return_processing_fee_per_unit", "return_quantity")(
+    _product
+)
+_node("resellable_quantity", "return_quantity", "resellable_rate")(_product)
+
+
+@_node("unsellable_quantity", "return_quantity", "resellable_rate")
+def _unsellable_quantity(return_quantity, resellable_rate):
+    return return_quantity * (Decimal("1") - resellable_rate)
+
+
+_node("unsellable_disposal_fee", "fba_fee_per_unit", "unsellable_quantity")(_product)
+
+
+@_node("return_loss", "unit_cost", "shipping_per_unit", "unsellable_quantity")
+def _return_loss(unit_cost, shipping_per_unit, unsellable_quantity):
+    return (unit_cost + shipping_per_unit) * unsellable_quantity
+
 
-    profit_per_unit = net_profit / actual_sales_quantity if actual_sales_quantity > 0 else Decimal("0")
+_node("refunded_referral_fee", "referral_fee_per_unit", "return_quantity")(_product)
+_node("adjusted_referral_fee", "total_referral_fee", "refunded_referral_fee")(_difference)
+_node(
+    "total_cost",
+    "total_pre_cost",
+    "advertising_cost",
+    "adjusted_referral_fee",
+    "total_fba_fee",
+    "total_storage_fee",
+    "total_return_processing_fee",
+    "unsellable_disposal_fee",
+    "return_loss",
+)(_sum)
+_node("net_profit", "total_revenue", "total_cost")(_difference)
+_node("net_profit_margin", "net_profit", "total_revenue")(_percent_of)
 
-    total_investment = purchase_cost + shipping_cost + advertising_cost
-    roi = (net_profit / total_investment) * Decimal("100") if total_investment > 0 else Decimal("0")
 
-    break_even_days: Optional[Decimal]
+@_node("profit_per_unit", "net_profit", "actual_sales_quantity")
+def _profit_per_unit(net_profit, actual_sales_quantity):
+    return net_profit / actual_sales_quantity if actual_sales_quantity > 0 else Decimal("0")
+
+
+_node("total_investment", "purchase_cost", "shipping_cost", "advertising_cost")(_sum)
+_node("roi", "net_profit", "total_investment")(_percent_of)
+
+
+@_node("break_even_days", "net_profit", "sales_days", "total_investment")
+def _break_even_days(net_profit, sales_days, total_investment) -> Optional[Decimal]:
     if sales_days <= 0:
-        break_even_days = None
-    else:
-        daily_profit = net_profit / sales_days
-        break_even_days = (
-            (total_investment / daily_profit) if daily_profit > 0 else None
+        return None
+    daily_profit = net_profit / sales_days
+    return (total_investment / daily_profit) if daily_profit > 0 else None
+
+
+# ========== 输出 ==========
+_output("summary.totalRevenue", "total_revenue")
+_output("summary.totalCost", "total_cost")
+_output("summary.grossProfit", "gross_profit")
+_output("summary.grossProfitMargin", "gross_profit_margin", "number")
+_output("summary.netProfit", "net_profit")
+_output("summary.netProfitMargin", "net_profit_margin", "number")
+_output("summary.profitPerUnit", "profit_per_unit")
+_output("summary.roi", "roi", "number")
+_output("summary.breakEvenDays", "break_even_days", "optional")
+
+_output("costBreakdown.purchaseCost", "purchase_cost")
+_output("costBreakdown.shippingCost", "shipping_cost")
+_output("costBreakdown.advertisingCost", "advertising_cost")
+_output("costBreakdown.referralFee", "adjusted_referral_fee")
+_output("costBreakdown.fbaFee", "total_fba_fee")
+_output("costBreakdown.storageFee", "total_storage_fee")
+_output("costBreakdown.returnProcessingFee", "total_return_processing_fee")
+_output("costBreakdown.unsellableDisposalFee", "unsellable_disposal_fee")
+_output("costBreakdown.returnLoss", "return_loss")
+
+_output("intermediateValues.totalSalesQuantity", "actual_sales_quantity", "number")
+_output("intermediateValues.storageCoefficient", "storage_coefficient", "coefficient")
+_output("intermediateValues.actualStorageFeePerUnit", "actual_storage_fee_per_unit")
+_output("intermediateValues.returnQuantity", "return_quantity", "number")
+_output("intermediateValues.resellableQuantity", "resellable_quantity", "number")
+_output("intermediateValues.unsellableQuantity", "unsellable_quantity", "number")
+_output("intermediateValues.returnProcessingFeePerUnit", "return_processing_fee_per_unit")
+
+
+def _topological_order() -> tuple[str, ...]:
+    order: list[str] = []
+    state: dict[str, int] = {}
+
+    def visit(name: str) -> None:
+        if state.get(name) == 2:
+            return
+        if state.get(name) == 1:
+            raise RuntimeError(f"Dependency cycle at {name}")
+        state[name] = 1
+        for dep in _NODES[name][0]:
+            if dep in _NODES:
+                visit(dep)
+            elif dep not in INPUT_FIELDS:
+                raise RuntimeError(f"Node {name} depends on unknown {dep}")
+        state[name] = 2
+        order.append(name)
+
+    for name in _NODES:
+        visit(name)
+    return tuple(order)
+
+
+def _downstream_index() -> dict[str, tuple[str, ...]]:
+    dependents: dict[str, set[str]] = {}
+    for name, (deps, _fn) in _NODES.items():
+        for dep in deps:
+            dependents.setdefault(dep, set()).add(name)
+
+    closure: dict[str, tuple[str, ...]] = {}
+    for field in INPUT_FIELDS:
+        seen: set[str] = set()
+        stack = list(dependents.get(field, ()))
+        while stack:
+            current = stack.pop()
+            if current not in seen:
+                seen.add(current)
+                stack.extend(dependents.get(current, ()))
+        closure[field] = tuple(name for name in NODE_ORDER if name in seen)
+    return closure
+
+
+NODE_ORDER = _topological_order()
+_NODE_RANK = {name: i for i, name in enumerate(NODE_ORDER)}
+_DOWNSTREAM = _downstream_index()
+
+
+_OUTPUT_INDEX = {path: i for i, path in enumerate(OUTPUT_FIELDS)}
+_JSON_LAYOUT = tuple(
+    (*path.split(".", 1), path in _MONEY_OUTPUTS) for path in OUTPUT_FIELDS
+)
+
+
+def _output_json(path: str, value: Optional[float], exchange_rate: Decimal) -> Any:
+    if path in _MONEY_OUTPUTS:
+        return {"usd": value, "cny": _cny(value, exchange_rate)}
+    return value
+
+
+class CalculationResult:
+    """Compact calculation result used inside the service layer.
+
+    ``values`` follows the fixed ``OUTPUT_FIELDS`` layout; money entries hold
+    rounded USD only and CNY is derived when the result leaves the backend.
+    """
+
+    __slots__ = ("exchange_rate", "values")
+
+    def __init__(self, exchange_rate: Decimal, values: list[Optional[float]]):
+        self.exchange_rate = exchange_rate
+        self.values = values
+
+    def value(self, path: str) -> Optional[float]:
+        return self.values[_OUTPUT_INDEX[path]]
+
+    def output(self, path: str) -> Any:
+        return _output_json(path, self.value(path), self.exchange_rate)
+
+    def to_json_dict(self) -> dict[str, dict[str, Any]]:
+        rate = self.exchange_rate
+        sections: dict[str, dict[str, Any]] = {}
+        for (section, field, is_money), value in zip(_JSON_LAYOUT, self.values):
+            if is_money:
+                value = {"usd": value, "cny": _cny(value, rate)}
+            sections.setdefault(section, {})[field] = value
+        return sections
+
+    def to_json(self) -> str:
+        return json_dumps(self.to_json_dict())
+
+    def to_model(self) -> FBACalculationResult:
+        return FBACalculationResult.model_validate(self.to_json_dict())
+
+
+class EvaluationState:
+    __slots__ = ("input", "values")
+
+    def __init__(self, input_data: FBACalculatorInput, values: dict[str, Any]):
+        self.input = input_data
+        self.values = values
+
+    def outputs(self) -> dict[str, Any]:
+        rate = self.values["exchange_rate"]
+        return {path: _output_json(path, self.values[path], rate) for path in OUTPUT_FIELDS}
+
+    def result(self) -> CalculationResult:
+        return CalculationResult(
+            self.values["exchange_rate"], [self.values[path] for path in OUTPUT_FIELDS]
         )
 
-    return FBACalculationResult(
-        summary=Summary(
-            total_revenue=_money(total_revenue, exchange_rate),
-            total_cost=_money(total_cost, exchange_rate),
-            gross_profit=_money(gross_profit, exchange_rate),
-            gross_profit_margin=float(_q2(gross_profit_margin)),
-            net_profit=_money(net_profit, exchange_rate),
-            net_profit_margin=float(_q2(net_profit_margin)),
-            profit_per_unit=_money(profit_per_unit, exchange_rate),
-            roi=float(_q2(roi)),
-            break_even_days=float(_q2(break_even_days)) if break_even_days is not None else None,
-        ),
-        cost_breakdown=CostBreakdown(
-            purchase_cost=_money(purchase_cost, exchange_rate),
-            shipping_cost=_money(shipping_cost, exchange_rate),
-            advertising_cost=_money(advertising_cost, exchange_rate),
-            referral_fee=_money(adjusted_referral_fee, exchange_rate),
-            fba_fee=_money(total_fba_fee, exchange_rate),
-            storage_fee=_money(total_storage_fee, exchange_rate),
-            return_processing_fee=_money(total_return_processing_fee, exchange_rate),
-            unsellable_disposal_fee=_money(unsellable_disposal_fee, exchange_rate),
-            return_loss=_money(return_loss, exchange_rate),
-        ),
-        intermediate_values=IntermediateValues(
-            total_sales_quantity=float(_q2(actual_sales_quantity)),
-            storage_coefficient=float(storage_coefficient.quantize(Decimal("0.0001"), rounding=ROUND_HALF_UP)),
-            actual_storage_fee_per_unit=_money(actual_storage_fee_per_unit, exchange_rate),
-            return_quantity=float(_q2(return_quantity)),
-            resellable_quantity=float(_q2(resellable_quantity)),
-            unsellable_quantity=float(_q2(unsellable_quantity)),
-            return_processing_fee_per_unit=_money(return_processing_fee_per_unit, exchange_rate),
-        ),
-    )
+
+def _input_values(input_data: FBACalculatorInput) -> dict[str, Any]:
+    return {
+        path: getattr(getattr(input_data, section), field)
+        for path, section, field in _INPUT_ATTRS
+    }
+
+
+def _compute(name: str, values: dict[str, Any]) -> Any:
+    deps, fn = _NODES[name]
+    return fn(*(values[dep] for dep in deps))
+
+
+def evaluate(input_data: Union[FBACalculatorInput, dict]) -> EvaluationState:
+    if not isinstance(input_data, FBACalculatorInput):
+        input_data = FBACalculatorInput.model_validate(input_data)
+
+    values = _input_values(input_data)
+    for name in NODE_ORDER:
+        values[name] = _compute(name, values)
+    return EvaluationState(input_data, values)
+
+
+def evaluate_incremental(
+    state: EvaluationState, input_data: FBACalculatorInput
+) -> tuple[EvaluationState, dict[str, Any]]:
+    new_inputs = _input_values(input_data)
+    changed = {field for field, value in new_inputs.items() if state.values[field] != value}
+
+    values = dict(state.values)
+    values.update(new_inputs)
+
+    if len(changed) == 1:
+        dirty = _DOWNSTREAM[next(iter(changed))]
+    else:
+        dirty = sorted({n for field in changed for n in _DOWNSTREAM[field]}, key=_NODE_RANK.get)
+
+    for name in dirty:
+        # 上游值未变的节点直接跳过（提前截断传播）
+        if not any(dep in changed for dep in _NODES[name][0]):
+            continue
+        value = _compute(name, values)
+        if value != values[name]:
+            values[name] = value
+            changed.add(name)
+
+    rate = values["exchange_rate"]
+    rate_changed = "exchange_rate" in changed
+    changed_outputs = {
+        path: _output_json(path, values[path], rate)
+        for path in OUTPUT_FIELDS
+        if path in changed or (rate_changed and path in _MONEY_OUTPUTS)
+    }
+    return EvaluationState(input_data, values), changed_outputs
+
+
+def apply_patch(input_data: FBACalculatorInput, patch: dict[str, Any]) -> FBACalculatorInput:
+    data = input_data.model_dump(by_alias=True)
+    for path, value in patch.items():
+        keys = [to_camel(key) for key in path.split(".")]
+        target = data
+        for key in keys[:-1]:
+            nested = target.get(key)
+            if not isinstance(nested, dict):
+                nested = target[key] = {}
+            target = nested
+        target[keys[-1]] = value
+    return FBACalculatorInput.model_validate(data)
+
+
+def calculate(input_data: Union[FBACalculatorInput, dict]) -> CalculationResult:
+    return evaluate(input_data).result()
+
+
+def calculate_fba_profit(
+    input_data: Union[FBACalculatorInput, dict]
+) -> FBACalculationResult:
+    return calculate(input_data).to_model()
@@ -0,0 +1,343 @@
+from __future__ import annotations
+
+import json
+import os
+from decimal import Decimal
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from backend.models.schemas import FeeProfile, FeeScheduleInfo
+
+CUBIC_INCHES_PER_FOOT = 1728
+SEASONS = ("off_peak", "peak")
+
+# 分段表按 (分组序号 * _KEY_STRIDE + 边界值) 拼接成一条有序数组，一次 searchsorted 即可跨分组查找；
+# 边界值与查询值都必须落在 [0, _KEY_STRIDE) 内，否则会串到相邻分组
+_KEY_STRIDE = 1_000_000.0
+
+
+class FeeScheduleError(ValueError):
+    pass
+
+
+def get_fee_schedule_dir() -> Path:
+    env_dir = os.getenv("FEE_SCHEDULE_DIR")
+    if env_dir:
+        return Path(env_dir)
+    return Path(__file__).resolve().parent.parent / "data" / "fee_schedules"
+
+
+def _limit(value: Optional[float]) -> float:
+    return np.inf if value is None else float(value)
+
+
+class CompiledFeeSchedule:
+    __slots__ = (
+        "version",
+        "marketplace",
+        "effective_from",
+        "dimensional_weight_divisor",
+        "tier_names",
+        "tier_max_dims",
+        "tier_max_length_girth",
+        "tier_max_weight",
+        "tier_dimensional_weight",
+        "tier_storage_class",
+        "tier_last_upper",
+        "tier_last_fee",
+        "tier_overweight_interval",
+        "tier_overweight_fee",
+        "fee_keys",
+        "fee_values",
+        "category_names",
+        "category_index",
+        "default_category",
+        "category_minimum",
+        "band_keys",
+        "band_start",
+        "band_base",
+        "band_rate",
+        "storage_rates",
+    )
+
+    def __init__(self, raw: dict):
+        self.version = raw["version"]
+        self.marketplace = raw.get("marketplace", "")
+        self.effective_from = raw.get("effective_from", "")
+        self.dimensional_weight_divisor = float(raw.get("dimensional_weight_divisor", 139))
+
+        # ========== 尺寸分段 & 配送费 ==========
+        tiers = raw["size_tiers"]
+        storage_classes = sorted(raw["storage"]["rates_per_cubic_foot"])
+        self.tier_names = [t["name"] for t in tiers]
+        self.tier_max_dims = np.array(
+            [
+                [_limit(t["max_longest_in"]), _limit(t["max_median_in"]), _limit(t["max_shortest_in"])]
+                for t in tiers
+            ]
+        )
+        self.tier_max_length_girth = np.array([_limit(t["max_length_girth_in"]) for t in tiers])
+        self.tier_max_weight = np.array([_limit(t["max_weight_lb"]) for t in tiers])
+        self.tier_dimensional_weight = np.array([bool(t["dimensional_weight"]) for t in tiers])
+        self.tier_storage_class = np.array(
+            [storage_classes.index(t["storage_class"]) for t in tiers], dtype=np.intp
+        )
+
+        fee_keys: list[float] = []
+        fee_values: list[float] = []
+        last_upper: list[float] = []
+        last_fee: list[float] = []
+        for i, t in enumerate(tiers):
+            brackets = sorted((float(w), float(fee)) for w, fee in t["fulfillment_fees"])
+            if not brackets:
+                raise FeeScheduleError(f"Size tier {t['name']} has no fulfillment fees")
+            if brackets[-1][0] >= _KEY_STRIDE:
+                raise FeeScheduleError(f"Size tier {t['name']} weight brackets must end below 1,000,000 lb")
+            for upper, fee in brackets:
+                fee_keys.append(i * _KEY_STRIDE + upper)
+                fee_values.append(fee)
+            last_upper.append(brackets[-1][0])
+            last_fee.append(brackets[-1][1])
+        self.fee_keys = np.array(fee_keys)
+        self.fee_values = np.array(fee_values)
+        self.tier_last_upper = np.array(last_upper)
+        self.tier_last_fee = np.array(last_fee)
+        self.tier_overweight_interval = np.array(
+            [float(t.get("overweight_interval_lb") or 1) for t in tiers]
+        )
+        self.tier_overweight_fee = np.array(
+            [float(t.get("overweight_fee_per_interval") or 0) for t in tiers]
+        )
+
+        # ========== 类目佣金 ==========
+        categories = raw["referral"]["categories"]
+        self.category_names = sorted(categories)
+        self.category_index = {name: i for i, name in enumerate(self.category_names)}
+        self.default_category = raw["referral"].get("default_category", self.category_names[0])
+
+        band_keys: list[float] = []
+        band_start: list[float] = []
+        band_base: list[float] = []
+        band_rate: list[float] = []
+        minimum: list[float] = []
+        for i, name in enumerate(self.category_names):
+            spec = categories[name]
+            bands = sorted((float(start), float(rate)) for start, rate in spec["bands"])
+            if not bands or bands[0][0] != 0:
+                raise FeeScheduleError(f"Referral category {name} must start at price 0")
+            if bands[-1][0] >= _KEY_STRIDE:
+                raise FeeScheduleError(f"Referral category {name} bands must start below $1,000,000")
+            marginal = spec.get("mode", "total") == "marginal"
+            accumulated = 0.0
+            for j, (start, rate) in enumerate(bands):
+                band_keys.append(i * _KEY_STRIDE + start)
+                band_start.append(start)
+                band_rate.append(rate)
+                # fee = base + (price - start) * rate；整价模式下 base = start * rate
+                band_base.append(accumulated if marginal else start * rate)
+                if j + 1 < len(bands):
+                    accumulated += (bands[j + 1][0] - start) * rate
+            minimum.append(float(spec.get("minimum_fee", 0)))
+        self.band_keys = np.array(band_keys)
+        self.band_start = np.array(band_start)
+        self.band_base = np.array(band_base)
+        self.band_rate = np.array(band_rate)
+        self.category_minimum = np.array(minimum)
+
+        # ========== 月度仓储费 ==========
+        rates = raw["storage"]["rates_per_cubic_foot"]
+        self.storage_rates = np.array(
+            [[float(rates[c][season]) for season in SEASONS] for c in storage_classes]
+        )
+
+    def category_codes(self, category) -> np.ndarray:
+        category = np.asarray(category)
+        if np.issubdtype(category.dtype, np.integer):
+            codes = category.astype(np.intp).reshape(-1)
+            if codes.size and (codes.min() < 0 or codes.max() >= len(self.category_names)):
+                raise FeeScheduleError("Referral category code out of range")
+            return codes
+        names, inverse = np.unique(category.astype(str), return_inverse=True)
+        codes = np.empty(len(names), dtype=np.intp)
+        for i, name in enumerate(names):
+            if name not in self.category_index:
+                raise FeeScheduleError(f"Unknown referral category: {name}")
+            codes[i] = self.category_index[name]
+        return codes[inverse].reshape(-1)
+
+    def lookup(
+        self,
+        length_in,
+        width_in,
+        height_in,
+        weight_lb,
+        selling_price,
+        category=None,
+        season="off_peak",
+    ) -> dict[str, np.ndarray]:
+        dims = np.column_stack(
+            np.broadcast_arrays(
+                np.asarray(length_in, dtype=np.float64).reshape(-1),
+                np.asarray(width_in, dtype=np.float64).reshape(-1),
+                np.asarray(height_in, dtype=np.float64).reshape(-1),
+            )
+        )
+        n = dims.shape[0]
+        weight = np.broadcast_to(np.asarray(weight_lb, dtype=np.float64).reshape(-1), (n,))
+        price = np.broadcast_to(np.asarray(selling_price, dtype=np.float64).reshape(-1), (n,))
+        if ((price < 0) | (price >= _KEY_STRIDE)).any():
+            raise FeeScheduleError("Selling price must be at least $0 and below $1,000,000")
+
+        dims = -np.sort(-dims, axis=1)
+        length_girth = dims[:, 0] + 2 * (dims[:, 1] + dims[:, 2])
+        # 分段从小到大排列，倒序覆盖后每个商品落在第一个能容纳它的分段
+        tier = np.full(n, -1, dtype=np.intp)
+        for i in range(len(self.tier_names) - 1, -1, -1):
+            max_dims = self.tier_max_dims[i]
+            fits = (
+                (dims[:, 0] <= max_dims[0])
+                & (dims[:, 1] <= max_dims[1])
+                & (dims[:, 2] <= max_dims[2])
+                & (length_girth <= self.tier_max_length_girth[i])
+                & (weight <= self.tier_max_weight[i])
+            )
+            tier[fits] = i
+        if (tier < 0).any():
+            raise FeeScheduleError("Product does not fit any size tier")
+
+        volume = dims.prod(axis=1)
+        dimensional_weight = volume / self.dimensional_weight_divisor
+        shipping_weight = np.where(
+            self.tier_dimensional_weight[tier], np.maximum(weight, dimensional_weight), weight
+        )
+
+        # 超过最后一档的重量走下方的超重计费，不会用到串组后的 bracket_fee
+        idx = np.searchsorted(self.fee_keys, tier * _KEY_STRIDE + shipping_weight, side="left")
+        bracket_fee = self.fee_values[np.minimum(idx, len(self.fee_values) - 1)]
+        last_upper = self.tier_last_upper[tier]
+        overweight_intervals = np.ceil(
+            np.maximum(shipping_weight - last_upper, 0) / self.tier_overweight_interval[tier]
+        )
+        fulfillment_fee = np.where(
+            shipping_weight > last_upper,
+            self.tier_last_fee[tier] + overweight_intervals * self.tier_overweight_fee[tier],
+            bracket_fee,
+        )
+
+        if category is None:
+            category = self.default_category
+        codes = np.broadcast_to(self.category_codes(category), (n,))
+        band = np.searchsorted(self.band_keys, codes * _KEY_STRIDE + price, side="right") - 1
+        referral_fee = self.band_base[band] + (price - self.band_start[band]) * self.band_rate[band]
+        referral_fee = np.maximum(referral_fee, self.category_minimum[codes])
+        referral_fee_rate = np.where(
+            price > 0, referral_fee / np.where(price > 0, price, 1), self.band_rate[band]
+        )
+
+        season_codes = np.broadcast_to(
+            (np.asarray(season, dtype=str).reshape(-1) == "peak").astype(np.intp), (n,)
+        )
+        cubic_feet = volume / CUBIC_INCHES_PER_FOOT
+        monthly_storage_fee = (
+            cubic_feet * self.storage_rates[self.tier_storage_class[tier], season_codes]
+        )
+
+        return {
+            "size_tier": tier,
+            "shipping_weight_lb": shipping_weight,
+            "cubic_feet": cubic_feet,
+            "fulfillment_fee": fulfillment_fee,
+            "referral_fee": referral_fee,
+            "referral_fee_rate": referral_fee_rate,
+            "monthly_storage_fee": monthly_storage_fee,
+        }
+
+
+def _read_schedule_files() -> list[dict]:
+    schedules = []
+    for path in sorted(get_fee_schedule_dir().glob("*.json")):
+        with path.open("r", encoding="utf-8") as f:
+            schedules.append(json.load(f))
+    return schedules
+
+
+@lru_cache(maxsize=1)
+def _raw_schedules() -> dict[str, dict]:
+    raw = {s["version"]: s for s in _read_schedule_files()}
+    if not raw:
+        raise FeeScheduleError(f"No fee schedules found in {get_fee_schedule_dir()}")
+    return raw
+
+
+def latest_fee_schedule_version() -> str:
+    raw = _raw_schedules()
+    return max(raw, key=lambda v: (raw[v].get("effective_from", ""), v))
+
+
+@lru_cache(maxsize=8)
+def _compiled_schedule(version: str) -> CompiledFeeSchedule:
+    raw = _raw_schedules().get(version)
+    if raw is None:
+        raise FeeScheduleError(f"Unknown fee schedule version: {version}")
+    return CompiledFeeSchedule(raw)
+
+
+def get_fee_schedule(version: Optional[str] = None) -> CompiledFeeSchedule:
+    return _compiled_schedule(version or latest_fee_schedule_version())
+
+
+def clear_fee_schedule_cache() -> None:
+    _raw_schedules.cache_clear()
+    _compiled_schedule.cache_clear()
+
+
+def list_fee_schedules() -> list[FeeScheduleInfo]:
+    out = []
+    for version in sorted(_raw_schedules()):
+        schedule = get_fee_schedule(version)
+        out.append(
+            FeeScheduleInfo(
+                version=schedule.version,
+                marketplace=schedule.marketplace,
+                effective_from=schedule.effective_from,
+                size_tiers=list(schedule.tier_names),
+                categories=list(schedule.category_names),
+            )
+        )
+    return out
+
+
+def lookup_fees_batch(
+    length_in,
+    width_in,
+    height_in,
+    weight_lb,
+    selling_price,
+    category=None,
+    season="off_peak",
+    version: Optional[str] = None,
+) -> dict[str, np.ndarray]:
+    return get_fee_schedule(version).lookup(
+        length_in, width_in, height_in, weight_lb, selling_price, category, season
+    )
+
+
+def lookup_fees(profile: FeeProfile, selling_price_usd: Decimal) -> dict:
+    schedule = get_fee_schedule(profile.schedule_version)
+    out = schedule.lookup(
+        float(profile.length_in),
+        float(profile.width_in),
+        float(profile.height_in),
+        float(profile.weight_lb),
+        float(selling_price_usd),
+        profile.category or schedule.default_category,
+        profile.season,
+    )
+    return {
+        "schedule_version": schedule.version,
+        "size_tier": schedule.tier_names[int(out["size_tier"][0])],
+        **{k: float(v[0]) for k, v in out.items() if k != "size_tier"},
+    }
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import itertools
+import json
+import math
+from collections.abc import Callable
+from typing import Any
+
+import numpy as np
+from pydantic import ValidationError
+from sqlalchemy import select, update
+
+from backend.models.database import Project, sessionmaker_for_path
+from backend.models.schemas import (
+    APIModel,
+    Distribution,
+    EmptyJobParams,
+    MonteCarloJobParams,
+    SweepJobParams,
+    to_camel,
+)
+from backend.services.calculator import (
+    OUTPUT_FIELDS,
+    CalculationResult,
+    apply_patch,
+    calculate,
+    evaluate,
+    evaluate_incremental,
+)
+
+Progress = Callable[[float, str], None]
+
+_SUMMARY_FIELDS = tuple(path for path in OUTPUT_FIELDS if path.startswith("summary."))
+_PROGRESS_EVERY = 200
+_RECOMPUTE_BATCH = 200
+
+
+def _summary(result: CalculationResult) -> dict[str, Any]:
+    return {path.split(".", 1)[1]: result.output(path) for path in _SUMMARY_FIELDS}
+
+
+def _error_message(exc: ValueError) -> str:
+    # 校验错误取第一条字段消息；费率表等其他错误（如未知类目）直接用异常文本
+    if isinstance(exc, ValidationError):
+        return str(exc.errors(include_url=False)[0]["msg"])
+    return str(exc)
+
+
+def run_sweep(params: dict, progress: Progress, db_path: str) -> dict:
+    p = SweepJobParams.model_validate(params)
+    base = evaluate(p.input)
+    paths = list(p.grid)
+    total = math.prod(len(values) for values in p.grid.values())
+
+    points = []
+    for i, values in enumerate(itertools.product(*p.grid.values())):
+        patch = dict(zip(paths, values))
+        try:
+            state, _changed = evaluate_incremental(base, apply_patch(base.input, patch))
+        except ValueError as exc:
+            points.append({"patch": patch, "error": _error_message(exc)})
+        else:
+            points.append({"patch": patch, "summary": _summary(state.result())})
+        if i % _PROGRESS_EVERY == 0:
+            progress(i / total, f"{i}/{total}")
+
+    return {"points": points}
+
+
+def _sample(rng: np.random.Generator, dist: Distribution, n: int) -> np.ndarray:
+    if dist.type == "normal":
+        return rng.normal(dist.mean, dist.std, n)
+    if dist.type == "uniform":
+        return rng.uniform(dist.low, dist.high, n)
+    return rng.triangular(dist.low, dist.mode, dist.high, n)
+
+
+def _lookup(data: dict, path: str) -> Any:
+    value: Any = data
+    for key in path.split("."):
+        value = value.get(to_camel(key)) if isinstance(value, dict) else None
+    return value
+
+
+def _stats(values: list[float]) -> dict[str, Any]:
+    if not values:
+        return {"count": 0}
+    arr = np.asarray(values, dtype=np.float64)
+    p5, p50, p95 = np.percentile(arr, [5, 50, 95])
+    return {
+        "count": int(arr.size),
+        "mean": round(float(arr.mean()), 4),
+        "std": round(float(arr.std()), 4),
+        "min": round(float(arr.min()), 4),
+        "p5": round(float(p5), 4),
+        "p50": round(float(p50), 4),
+        "p95": round(float(p95), 4),
+        "max": round(float(arr.max()), 4),
+    }
+
+
+def run_monte_carlo(params: dict, progress: Progress, db_path: str) -> dict:
+    p = MonteCarloJobParams.model_validate(params)
+    rng = np.random.default_rng(p.seed)
+    base = evaluate(p.input)
+    base_data = p.input.model_dump(by_alias=True)
+
+    samples = {path: _sample(rng, dist, p.iterations) for path, dist in p.distributions.items()}
+    integer_paths = {path for path in samples if type(_lookup(base_data, path)) is int}
+
+    net_profit: list[float] = []
+    net_profit_margin: list[float] = []
+    roi: list[float] = []
+    break_even_days: list[float] = []
+    invalid = 0
+    for i in range(p.iterations):
+        patch = {
+            path: int(round(values[i])) if path in integer_paths else float(values[i])
+            for path, values in samples.items()
+        }
+        try:
+            state, _changed = evaluate_incremental(base, apply_patch(base.input, patch))
+        except ValueError:
+            invalid += 1
+            continue
+        net_profit.append(state.values["summary.netProfit"])
+        net_profit_margin.append(state.values["summary.netProfitMargin"])
+        roi.append(state.values["summary.roi"])
+        if state.values["summary.breakEvenDays"] is not None:
+            break_even_days.append(state.values["summary.breakEvenDays"])
+        if i % _PROGRESS_EVERY == 0:
+            progress(i / p.iterations, f"{i}/{p.iterations}")
+
+    valid = len(net_profit)
+    return {
+        "iterations": p.iterations,
+        "valid": valid,
+        "invalid": invalid,
+        "probabilityOfLoss": round(sum(v < 0 for v in net_profit) / valid, 4) if valid else None,
+        "breakEvenReachedRate": round(len(break_even_days) / valid, 4) if valid else None,
+        "netProfitUsd": _stats(net_profit),
+        "netProfitMargin": _stats(net_profit_margin),
+        "roi": _stats(roi),
+        "breakEvenDays": _stats(break_even_days),
+    }
+
+
+def run_recompute_projects(params: dict, progress: Progress, db_path: str) -> dict:
+    with sessionmaker_for_path(db_path)() as db:
+        rows = db.execute(select(Project.id, Project.input_json, Project.result_json)).all()
+        updated = 0
+        for i, (project_id, input_json, result_json) in enumerate(rows):
+            new_json = calculate(json.loads(input_json)).to_json()
+            if new_json != result_json:
+                db.execute(update(Project).where(Project.id == project_id).values(result_json=new_json))
+                updated += 1
+            if (i + 1) % _RECOMPUTE_BATCH == 0:
+                db.commit()
+                progress((i + 1) / len(rows), f"{i + 1}/{len(rows)}")
+        db.commit()
+    return {"projects": len(rows), "updated": updated}
+
+
+def run_export_projects(params: dict, progress: Progress, db_path: str) -> dict:
+    with sessionmaker_for_path(db_path)() as db:
+        rows = db.execute(select(Project).order_by(Project.branch_path.asc())).scalars().all()
+        projects = []
+        for i, p in enumerate(rows):
+            projects.append(
+                {
+                    "id": p.id,
+                    "name": p.name,
+                    "description": p.description,
+                    "parentId": p.parent_id,
+                    "branchPath": p.branch_path,
+                    "createdAt": p.created_at,
+                    "updatedAt": p.updated_at,
+                    "input": json.loads(p.input_json),
+                    "result": json.loads(p.result_json),
+                }
+            )
+            if i % _PROGRESS_EVERY == 0:
+                progress(i / len(rows), f"{i}/{len(rows)}")
+    return {"projects": projects}
+
+
+JOB_HANDLERS: dict[str, Callable[[dict, Progress, str], Any]] = {
+    "sweep": run_sweep,
+    "monte_carlo": run_monte_carlo,
+    "recompute_projects": run_recompute_projects,
+    "export_projects": run_export_projects,
+}
+
+JOB_PARAM_MODELS: dict[str, type[APIModel]] = {
+    "sweep": SweepJobParams,
+    "monte_carlo": MonteCarloJobParams,
+    "recompute_projects": EmptyJobParams,
+    "export_projects": EmptyJobParams,
+}
@@ -0,0 +1,486 @@
+from __future__ import annotations
+
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Optional
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+from backend.models.database import (
+    DEFAULT_WORKSPACE,
+    Job,
+    get_database_path,
+    sessionmaker_for_path,
+    workspace_database_path,
+)
+from backend.models.schemas import JobInfo, JobSubmitRequest
+from backend.services.job_tasks import JOB_HANDLERS, JOB_PARAM_MODELS
+from backend.utils.helpers import json_dumps, now_iso
+
+FINISHED_STATUSES = ("succeeded", "failed", "cancelled")
+MAX_ATTEMPTS = 3
+PROGRESS_INTERVAL_SECONDS = 0.25
+RECOVERY_INTERVAL_SECONDS = 10.0
+
+logger = logging.getLogger(__name__)
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobAbandoned(Exception):
+    pass
+
+
+class JobResultUnavailable(Exception):
+    pass
+
+
+def get_job_workers() -> int:
+    return int(os.getenv("JOB_WORKERS", str(min(2, os.cpu_count() or 1))))
+
+
+def get_job_retention() -> int:
+    return int(os.getenv("JOB_RETENTION", "200"))
+
+
+def get_inline_result_limit() -> int:
+    return int(os.getenv("JOB_INLINE_RESULT_BYTES", str(256 * 1024)))
+
+
+def get_job_result_dir(db_path: str) -> Path:
+    env_dir = os.getenv("JOB_RESULT_DIR")
+    if env_dir:
+        return Path(env_dir)
+    return Path(db_path).resolve().parent / "job_results"
+
+
+def _job_to_info(job: Job) -> JobInfo:
+    return JobInfo(
+        id=job.id,
+        kind=job.kind,
+        workspace_id=job.workspace_id,
+        status=job.status,
+        progress=job.progress,
+        message=job.message,
+        error=job.error,
+        attempts=job.attempts,
+        cancel_requested=job.cancel_requested,
+        has_result=job.result_json is not None or job.result_path is not None,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        updated_at=job.updated_at,
+    )
+
+
+# ========== API 侧 ==========
+def _workspace_id(db: Session) -> str:
+    return db.info.get("workspace_id", DEFAULT_WORKSPACE)
+
+
+def _get_workspace_job(db: Session, job_id: str) -> Optional[Job]:
+    job = db.get(Job, job_id)
+    if job is None or job.workspace_id != _workspace_id(db):
+        return None
+    return job
+
+
+def submit_job(db: Session, payload: JobSubmitRequest) -> JobInfo:
+    params = JOB_PARAM_MODELS[payload.kind].model_validate(payload.params)
+    now = now_iso()
+    job = Job(
+        id=str(uuid.uuid4()),
+        kind=payload.kind,
+        workspace_id=_workspace_id(db),
+        status="queued",
+        params_json=json_dumps(params.model_dump(mode="json", by_alias=True)),
+        progress=0.0,
+        message="",
+        cancel_requested=False,
+        attempts=0,
+        created_at=now,
+        updated_at=now,
+    )
+    db.add(job)
+    db.commit()
+    notify_job_runner()
+    return _job_to_info(job)
+
+
+def list_jobs(db: Session, status: Optional[str] = None, limit: int = 50) -> list[JobInfo]:
+    query = (
+        select(Job)
+        .where(Job.workspace_id == _workspace_id(db))
+        .order_by(Job.created_at.desc())
+        .limit(limit)
+    )
+    if status is not None:
+        query = query.where(Job.status == status)
+    return [_job_to_info(job) for job in db.execute(query).scalars().all()]
+
+
+def get_job(db: Session, job_id: str) -> Optional[JobInfo]:
+    job = _get_workspace_job(db, job_id)
+    return _job_to_info(job) if job is not None else None
+
+
+def cancel_job(db: Session, job_id: str) -> Optional[JobInfo]:
+    job = _get_workspace_job(db, job_id)
+    if job is None:
+        return None
+    now = now_iso()
+    if job.status == "queued":
+        job.status = "cancelled"
+        job.finished_at = now
+    elif job.status == "running":
+        # 运行中的任务在下一次上报进度时检查该标记
+        job.cancel_requested = True
+    job.updated_at = now
+    db.commit()
+    return _job_to_info(job)
+
+
+def get_job_result(db: Session, job_id: str) -> Optional[tuple[str, Optional[str]]]:
+    job = _get_workspace_job(db, job_id)
+    if job is None:
+        return None
+    if job.result_path is not None:
+        try:
+            return job.status, Path(job.result_path).read_text(encoding="utf-8")
+        except OSError as exc:
+            raise JobResultUnavailable(f"Result file for job {job_id} is unavailable") from exc
+    return job.status, job.result_json
+
+
+# ========== 工作进程侧 ==========
+class _ProgressReporter:
+    __slots__ = ("db_path", "job_id", "attempt", "_last")
+
+    def __init__(self, db_path: str, job_id: str, attempt: int):
+        self.db_path = db_path
+        self.job_id = job_id
+        self.attempt = attempt
+        self._last = 0.0
+
+    def __call__(self, fraction: float, message: str = "") -> None:
+        now = time.monotonic()
+        if now - self._last < PROGRESS_INTERVAL_SECONDS:
+            return
+        self._last = now
+
+        with sessionmaker_for_path(self.db_path)() as db:
+            updated = db.execute(
+                update(Job)
+                .where(Job.id == self.job_id, Job.status == "running", Job.attempts == self.attempt)
+                .values(progress=min(max(fraction, 0.0), 1.0), message=message, updated_at=now_iso())
+            ).rowcount
+            cancel_requested = db.execute(
+                select(Job.cancel_requested).where(Job.id == self.job_id)
+            ).scalar()
+            db.commit()
+        if not updated:
+            raise JobAbandoned()
+        if cancel_requested:
+            raise JobCancelled()
+
+
+def _finish(db_path: str, job_id: str, attempt: int, **values: Any) -> bool:
+    now = now_iso()
+    with sessionmaker_for_path(db_path)() as db:
+        updated = db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == "running", Job.attempts == attempt)
+            .values(finished_at=now, updated_at=now, **values)
+        ).rowcount
+        db.commit()
+    return bool(updated)
+
+
+def execute_job(db_path: str, job_id: str, attempt: int) -> str:
+    with sessionmaker_for_path(db_path)() as db:
+        job = db.get(Job, job_id)
+        if job is None:
+            return "missing"
+        kind, params = job.kind, json.loads(job.params_json)
+        workspace_id = job.workspace_id
+
+    # 任务表在默认库；处理函数读写的是任务所属工作区的库
+    data_path = db_path
+    if workspace_id != DEFAULT_WORKSPACE:
+        data_path = workspace_database_path(workspace_id)
+    try:
+        result = JOB_HANDLERS[kind](params, _ProgressReporter(db_path, job_id, attempt), data_path)
+    except JobAbandoned:
+        return "abandoned"
+    except JobCancelled:
+        _finish(db_path, job_id, attempt, status="cancelled", message="Cancelled")
+        return "cancelled"
+    except Exception as exc:
+        _finish(
+            db_path,
+            job_id,
+            attempt,
+            status="failed",
+            error="".join(traceback.format_exception_only(type(exc), exc)).strip(),
+        )
+        return "failed"
+
+    # 结果较大时写入溢出文件，数据库只保留路径
+    result_json = json_dumps(result, default=str)
+    result_path: Optional[str] = None
+    if len(result_json.encode("utf-8")) > get_inline_result_limit():
+        result_dir = get_job_result_dir(db_path)
+        result_dir.mkdir(parents=True, exist_ok=True)
+        spill = result_dir / f"{job_id}.json"
+        spill.write_text(result_json, encoding="utf-8")
+        result_path, result_json = str(spill), None
+
+    finished = _finish(
+        db_path,
+        job_id,
+        attempt,
+        status="succeeded",
+        progress=1.0,
+        message="Done",
+        result_json=result_json,
+        result_path=result_path,
+    )
+    if not finished and result_path is not None:
+        Path(result_path).unlink(missing_ok=True)
+    return "succeeded" if finished else "abandoned"
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if pid is None:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# ========== 调度器 ==========
+class JobRunner:
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        workers: Optional[int] = None,
+        poll_interval: float = 1.0,
+    ):
+        self.db_path = db_path or get_database_path()
+        self.workers = workers if workers is not None else get_job_workers()
+        self.poll_interval = poll_interval
+        self._sessions = sessionmaker_for_path(self.db_path)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._futures: dict[str, Future] = {}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_recovery = 0.0
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def start(self) -> None:
+        self.recover_orphaned_jobs()
+        self._executor = self._new_executor()
+        self._thread = threading.Thread(target=self._loop, name="job-runner", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+        # 本进程未完成的任务放回队列，重启后继续执行
+        with self._sessions() as db:
+            running = (
+                db.execute(
+                    select(Job).where(Job.status == "running", Job.owner_pid == os.getpid())
+                )
+                .scalars()
+                .all()
+            )
+            for job in running:
+                self._requeue(job, count_attempt=False)
+            db.commit()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def notify(self) -> None:
+        self._wake.set()
+
+    def recover_orphaned_jobs(self) -> int:
+        recovered = 0
+        with self._sessions() as db:
+            running = db.execute(select(Job).where(Job.status == "running")).scalars().all()
+            for job in running:
+                if job.owner_pid == os.getpid() and job.id in self._futures:
+                    continue
+                if job.owner_pid != os.getpid() and _pid_alive(job.owner_pid):
+                    continue
+                self._requeue(job)
+                recovered += 1
+            db.commit()
+        return recovered
+
+    def _requeue(self, job: Job, count_attempt: bool = True) -> None:
+        job.owner_pid = None
+        job.updated_at = now_iso()
+        if job.cancel_requested:
+            # 工作进程还没来得及看到取消标记就退出了，直接按已取消处理
+            job.status = "cancelled"
+            job.message = "Cancelled"
+            job.finished_at = job.updated_at
+        elif count_attempt and job.attempts >= MAX_ATTEMPTS:
+            job.status = "failed"
+            job.error = "Worker exited before the job finished"
+            job.finished_at = job.updated_at
+        else:
+            job.status = "queued"
+
+    def _claim_next(self) -> Optional[tuple[str, int]]:
+        with self._sessions() as db:
+            while True:
+                row = db.execute(
+                    select(Job.id, Job.cancel_requested)
+                    .where(Job.status == "queued")
+                    .order_by(Job.created_at.asc())
+                    .limit(1)
+                ).first()
+                if row is None:
+                    return None
+                job_id, cancel_requested = row
+                now = now_iso()
+                if cancel_requested:
+                    # 取消请求跨重新排队保留，认领时直接结束而不再执行
+                    db.execute(
+                        update(Job)
+                        .where(Job.id == job_id, Job.status == "queued")
+                        .values(
+                            status="cancelled",
+                            message="Cancelled",
+                            finished_at=now,
+                            updated_at=now,
+                        )
+                    )
+                    db.commit()
+                    continue
+                claimed = db.execute(
+                    update(Job)
+                    .where(Job.id == job_id, Job.status == "queued")
+                    .values(
+                        status="running",
+                        owner_pid=os.getpid(),
+                        attempts=Job.attempts + 1,
+                        progress=0.0,
+                        started_at=now,
+                        updated_at=now,
+                    )
+                ).rowcount
+                db.commit()
+                if claimed:
+                    attempt = db.execute(select(Job.attempts).where(Job.id == job_id)).scalar()
+                    return job_id, attempt
+
+    def _collect_finished(self) -> None:
+        finished = False
+        broken = False
+        for job_id, future in list(self._futures.items()):
+            if not future.done():
+                continue
+            del self._futures[job_id]
+            finished = True
+            exc = future.exception()
+            if exc is None:
+                continue
+            if isinstance(exc, BrokenProcessPool):
+                broken = True
+            with self._sessions() as db:
+                job = db.get(Job, job_id)
+                if job is not None and job.status == "running":
+                    self._requeue(job)
+                    db.commit()
+
+        if broken:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = self._new_executor()
+        if finished:
+            self.prune_finished_jobs()
+
+    def prune_finished_jobs(self) -> int:
+        with self._sessions() as db:
+            stale = db.execute(
+                select(Job.id, Job.result_path)
+                .where(Job.status.in_(FINISHED_STATUSES))
+                .order_by(Job.finished_at.desc())
+                .offset(get_job_retention())
+            ).all()
+            if not stale:
+                return 0
+            db.execute(delete(Job).where(Job.id.in_([job_id for job_id, _path in stale])))
+            db.commit()
+        for _job_id, result_path in stale:
+            if result_path:
+                Path(result_path).unlink(missing_ok=True)
+        return len(stale)
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                self._collect_finished()
+                if time.monotonic() - self._last_recovery > RECOVERY_INTERVAL_SECONDS:
+                    self._last_recovery = time.monotonic()
+                    self.recover_orphaned_jobs()
+                while len(self._futures) < self.workers:
+                    claimed = self._claim_next()
+                    if claimed is None:
+                        break
+                    job_id, attempt = claimed
+                    future = self._executor.submit(execute_job, self.db_path, job_id, attempt)
+                    future.add_done_callback(lambda _f: self._wake.set())
+                    self._futures[job_id] = future
+            except Exception:
+                logger.exception("Job runner iteration failed")
+            self._wake.wait(self.poll_interval)
+
+
+_runner: Optional[JobRunner] = None
+
+
+def start_job_runner() -> Optional[JobRunner]:
+    global _runner
+    if _runner is None and get_job_workers() > 0:
+        _runner = JobRunner()
+        _runner.start()
+    return _runner
+
+
+def stop_job_runner() -> None:
+    global _runner
+    if _runner is not None:
+        _runner.stop()
+        _runner = None
+
+
+def notify_job_runner() -> None:
+    if _runner is not None:
+        _runner.notify()
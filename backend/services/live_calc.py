@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import os
+from typing import Any, Optional
+
+from pydantic import ValidationError
+
+from backend.models.schemas import FBACalculatorInput
+from backend.services.calculator import (
+    EvaluationState,
+    apply_patch,
+    evaluate,
+    evaluate_incremental,
+)
+
+LIVE_OUTPUT_SECTIONS = ("summary.", "costBreakdown.")
+
+
+def get_coalesce_seconds() -> float:
+    return int(os.getenv("LIVE_CALC_COALESCE_MS", "30")) / 1000
+
+
+def _error(exc: ValueError) -> dict[str, Any]:
+    # 与 HTTP 接口一致：校验错误返回字段列表，费率表等其他错误返回消息文本
+    if isinstance(exc, ValidationError):
+        detail: Any = exc.errors(include_url=False, include_context=False, include_input=False)
+    else:
+        detail = str(exc)
+    return {"type": "error", "detail": detail}
+
+
+class LiveCalculation:
+    """Per-connection input state for the live calculation channel.
+
+    Patches are queued and merged until ``flush`` runs, so a burst of edits
+    is calculated once against the latest state.
+    """
+
+    __slots__ = ("state", "pending", "seq")
+
+    def __init__(self) -> None:
+        self.state: Optional[EvaluationState] = None
+        self.pending: dict[str, Any] = {}
+        self.seq = 0
+
+    def reset(self, input_data: Any) -> dict[str, Any]:
+        self.pending.clear()
+        try:
+            self.state = evaluate(FBACalculatorInput.model_validate(input_data))
+        except ValueError as exc:
+            return _error(exc)
+        self.seq += 1
+        return {
+            "type": "result",
+            "seq": self.seq,
+            "result": self.state.result().to_json_dict(),
+        }
+
+    def queue(self, patch: dict[str, Any]) -> None:
+        for path, value in patch.items():
+            # 重复字段移到末尾，保证按最后一次编辑的顺序应用
+            self.pending.pop(path, None)
+            self.pending[path] = value
+
+    def flush(self) -> Optional[dict[str, Any]]:
+        if not self.pending:
+            return None
+        patch, self.pending = self.pending, {}
+        if self.state is None:
+            return {"type": "error", "detail": "Send an init message before patches"}
+
+        try:
+            self.state, changed = evaluate_incremental(
+                self.state, apply_patch(self.state.input, patch)
+            )
+        except ValueError as exc:
+            return _error(exc)
+        self.seq += 1
+        return {
+            "type": "diff",
+            "seq": self.seq,
+            "changed": {
+                path: value
+                for path, value in changed.items()
+                if path.startswith(LIVE_OUTPUT_SECTIONS)
+            },
+        }
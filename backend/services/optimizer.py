@@ -0,0 +1,319 @@
+from __future__ import annotations
+
+import itertools
+from typing import Any, Optional
+
+import numpy as np
+
+from backend.models.schemas import (
+    OPTIMIZER_PARAMETER_STEP,
+    FBACalculatorInput,
+    OptimizerConstraints,
+    ParetoOptimizeRequest,
+    ParetoOptimizeResponse,
+    ParetoPoint,
+)
+from backend.services.calculator import (
+    RETURN_PROCESSING_FEE_CAP,
+    RETURN_PROCESSING_FEE_RATE,
+    STORAGE_DAYS_PER_MONTH,
+    _money_input_usd,
+    _q2,
+    apply_patch,
+    evaluate,
+    evaluate_incremental,
+)
+from backend.services.fees import lookup_fees_batch
+from backend.utils.helpers import step_range
+
+# 目标：净利润最大、ROI 最大、占用资金（总投入）最小
+_OBJECTIVES = ("net_profit", "roi", "total_investment")
+_OBJECTIVE_SIGNS = np.array([1.0, 1.0, -1.0])
+
+_PARAMETER_STEP = OPTIMIZER_PARAMETER_STEP
+_PARAMETER_ARGS = {
+    "sellingPrice": "selling_price",
+    "adPercentage": "ad_percentage",
+    "dailyAdBudget": "daily_ad_budget",
+    "quantity": "quantity",
+}
+
+
+def _round_half_up(values: np.ndarray, places: int) -> np.ndarray:
+    # 与计算器的 ROUND_HALF_UP 一致；np.round 是银行家舍入，0.19125 会舍成 0.1912
+    # 先取 6 位小数去掉二进制尾差，再向上进半（费用均非负）
+    scaled = np.round(np.asarray(values, dtype=np.float64) * 10**places, 6)
+    return np.floor(scaled + 0.5) / 10**places
+
+
+def calculate_batch(
+    input_data: FBACalculatorInput,
+    selling_price: Optional[np.ndarray] = None,
+    ad_percentage: Optional[np.ndarray] = None,
+    daily_ad_budget: Optional[np.ndarray] = None,
+    quantity: Optional[np.ndarray] = None,
+) -> dict[str, np.ndarray]:
+    """Vectorized float64 version of the calculator formulas.
+
+    Overrides are USD amounts / percentages / unit counts; any override left
+    as ``None`` comes from ``input_data``. Passing ``daily_ad_budget`` or
+    ``ad_percentage`` switches the advertising mode accordingly.
+    """
+    rate = input_data.settings.exchange_rate
+    pre = input_data.pre_purchase
+    during = input_data.during_sale
+    after = input_data.after_sale
+
+    unit_cost = float(_money_input_usd(pre.unit_cost, rate))
+    shipping_per_unit = float(_money_input_usd(pre.shipping_per_unit, rate))
+    if selling_price is None:
+        selling_price = float(_money_input_usd(during.selling_price, rate))
+    if quantity is None:
+        quantity = float(pre.quantity)
+    selling_price = np.asarray(selling_price, dtype=np.float64)
+    quantity = np.asarray(quantity, dtype=np.float64)
+    sales_days = float(during.sales_days)
+
+    if during.fee_profile is not None:
+        profile = during.fee_profile
+        fees = lookup_fees_batch(
+            float(profile.length_in),
+            float(profile.width_in),
+            float(profile.height_in),
+            float(profile.weight_lb),
+            selling_price,
+            profile.category,
+            profile.season,
+            profile.schedule_version,
+        )
+        fba_fee_per_unit = _round_half_up(fees["fulfillment_fee"], 2)
+        monthly_storage_fee = _round_half_up(fees["monthly_storage_fee"], 4)
+        referral_fee_rate = (
+            np.minimum(_round_half_up(fees["referral_fee_rate"] * 100, 4), 100) / 100
+        )
+    else:
+        fba_fee_per_unit = float(_money_input_usd(during.fba_fee_per_unit, rate))
+        monthly_storage_fee = float(_money_input_usd(during.monthly_storage_fee, rate))
+        referral_fee_rate = float(during.referral_fee_rate) / 100
+
+    # ========== 售前 & 售中 ==========
+    purchase_cost = unit_cost * quantity
+    shipping_cost = shipping_per_unit * quantity
+    actual_sales = np.minimum(quantity, float(during.daily_sales) * sales_days)
+    total_revenue = selling_price * actual_sales
+
+    if daily_ad_budget is not None:
+        advertising_cost = np.asarray(daily_ad_budget, dtype=np.float64) * sales_days
+    elif ad_percentage is not None:
+        advertising_cost = total_revenue * (np.asarray(ad_percentage, dtype=np.float64) / 100)
+    elif during.advertising_mode == "budget":
+        advertising_cost = float(_money_input_usd(during.daily_ad_budget, rate)) * sales_days
+    else:
+        advertising_cost = total_revenue * (float(during.ad_percentage or 0) / 100)
+
+    referral_fee_per_unit = selling_price * referral_fee_rate
+    storage_coefficient = sales_days / 2 / STORAGE_DAYS_PER_MONTH if sales_days > 0 else 0.0
+    total_storage_fee = monthly_storage_fee * storage_coefficient * actual_sales
+
+    # ========== 售后 ==========
+    return_quantity = actual_sales * (float(after.return_rate) / 100)
+    unsellable_quantity = return_quantity * (1 - float(after.resellable_rate) / 100)
+    return_processing_fee_per_unit = np.minimum(
+        referral_fee_per_unit * float(RETURN_PROCESSING_FEE_RATE), float(RETURN_PROCESSING_FEE_CAP)
+    )
+
+    total_cost = (
+        purchase_cost
+        + shipping_cost
+        + advertising_cost
+        + referral_fee_per_unit * (actual_sales - return_quantity)
+        + fba_fee_per_unit * actual_sales
+        + total_storage_fee
+        + return_processing_fee_per_unit * return_quantity
+        + fba_fee_per_unit * unsellable_quantity
+        + (unit_cost + shipping_per_unit) * unsellable_quantity
+    )
+    net_profit = total_revenue - total_cost
+    total_investment = purchase_cost + shipping_cost + advertising_cost
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        roi = np.where(total_investment > 0, net_profit / total_investment * 100, 0.0)
+        net_profit_margin = np.where(total_revenue > 0, net_profit / total_revenue * 100, 0.0)
+        daily_profit = net_profit / sales_days if sales_days > 0 else np.zeros_like(net_profit)
+        break_even_days = np.where(daily_profit > 0, total_investment / daily_profit, np.inf)
+
+    shape = np.broadcast(net_profit, total_investment).shape
+    return {
+        "net_profit": np.broadcast_to(net_profit, shape),
+        "roi": np.broadcast_to(roi, shape),
+        "total_investment": np.broadcast_to(total_investment, shape),
+        "net_profit_margin": np.broadcast_to(net_profit_margin, shape),
+        "break_even_days": np.broadcast_to(break_even_days, shape),
+    }
+
+
+def _feasible(out: dict[str, np.ndarray], constraints: OptimizerConstraints) -> np.ndarray:
+    mask = np.isfinite(out["net_profit"])
+    if constraints.max_break_even_days is not None:
+        mask &= out["break_even_days"] <= constraints.max_break_even_days
+    if constraints.min_net_profit is not None:
+        mask &= out["net_profit"] >= constraints.min_net_profit
+    if constraints.min_roi is not None:
+        mask &= out["roi"] >= constraints.min_roi
+    if constraints.min_net_profit_margin is not None:
+        mask &= out["net_profit_margin"] >= constraints.min_net_profit_margin
+    if constraints.max_total_investment is not None:
+        mask &= out["total_investment"] <= constraints.max_total_investment
+    return mask
+
+
+def pareto_mask(objectives: np.ndarray) -> np.ndarray:
+    """Non-dominated rows of ``objectives`` (all columns maximized).
+
+    Rows are visited in lexicographically descending order, so a row can only
+    be dominated by rows already kept; exact duplicates keep the first one.
+    """
+    n = objectives.shape[0]
+    keep = np.zeros(n, dtype=bool)
+    if n == 0:
+        return keep
+    order = np.lexsort(-objectives.T[::-1])
+    front = np.empty_like(objectives)
+    size = 0
+    for i in order:
+        row = objectives[i]
+        if size and np.all(front[:size] >= row, axis=1).any():
+            continue
+        front[size] = row
+        size += 1
+        keep[i] = True
+    return keep
+
+
+def _parameter_patch(params: dict[str, float]) -> dict[str, Any]:
+    patch: dict[str, Any] = {}
+    for name, value in params.items():
+        if name == "sellingPrice":
+            patch["duringSale.sellingPrice"] = {"usd": value, "primaryCurrency": "USD"}
+        elif name == "adPercentage":
+            patch["duringSale.advertisingMode"] = "percentage"
+            patch["duringSale.adPercentage"] = value
+        elif name == "dailyAdBudget":
+            patch["duringSale.advertisingMode"] = "budget"
+            patch["duringSale.dailyAdBudget"] = {"usd": value, "primaryCurrency": "USD"}
+        else:
+            patch["prePurchase.quantity"] = int(round(value))
+    return patch
+
+
+def _snap(name: str, values: np.ndarray, low: float, high: float) -> np.ndarray:
+    # low / high 已是步长的整数倍，裁剪后仍落在网格上；再取两位去掉浮点尾数
+    step = _PARAMETER_STEP[name]
+    return np.round(np.clip(np.round(values / step) * step, low, high), 2)
+
+
+class _Archive:
+    __slots__ = ("params", "objectives", "evaluated", "feasible")
+
+    def __init__(self, dims: int):
+        self.params = np.empty((0, dims))
+        self.objectives = np.empty((0, len(_OBJECTIVES)))
+        self.evaluated = 0
+        self.feasible = 0
+
+
+def optimize_pareto(request: ParetoOptimizeRequest) -> ParetoOptimizeResponse:
+    names = list(request.bounds)
+    snapped = [
+        step_range(request.bounds[n].min, request.bounds[n].max, _PARAMETER_STEP[n])
+        for n in names
+    ]
+    low = np.array([lo for lo, _hi in snapped])
+    high = np.array([hi for _lo, hi in snapped])
+    archive = _Archive(len(names))
+
+    def evaluate_points(points: np.ndarray) -> None:
+        points = np.column_stack(
+            [_snap(n, points[:, j], low[j], high[j]) for j, n in enumerate(names)]
+        )
+        points = np.unique(points, axis=0)
+        overrides = {_PARAMETER_ARGS[n]: points[:, j] for j, n in enumerate(names)}
+        out = calculate_batch(request.input, **overrides)
+        archive.evaluated += len(points)
+        mask = _feasible(out, request.constraints)
+        archive.feasible += int(mask.sum())
+        objectives = np.column_stack([out[o] for o in _OBJECTIVES]) * _OBJECTIVE_SIGNS
+        # 被支配的点不会再进入前沿，只需在“当前前沿 ∪ 新点”上重新筛选
+        params = np.vstack([archive.params, points[mask]])
+        objectives = np.vstack([archive.objectives, objectives[mask]])
+        keep = pareto_mask(objectives)
+        archive.params = params[keep]
+        archive.objectives = objectives[keep]
+
+    # ========== 粗网格 ==========
+    axes = [np.linspace(low[j], high[j], request.grid_points) for j in range(len(names))]
+    evaluate_points(np.array(list(itertools.product(*axes))))
+
+    # ========== 在前沿附近逐轮加密 ==========
+    step = (high - low) / (request.grid_points - 1)
+    offsets = np.array(
+        [o for o in itertools.product((-1.0, 0.0, 1.0), repeat=len(names)) if any(o)]
+    )
+    rounds = 0
+    for _ in range(request.refine_rounds):
+        step = step / 2
+        if not len(archive.params) or np.all(
+            step < np.array([_PARAMETER_STEP[n] for n in names]) / 2
+        ):
+            break
+        candidates = (archive.params[:, None, :] + offsets[None, :, :] * step).reshape(
+            -1, len(names)
+        )
+        evaluate_points(candidates)
+        rounds += 1
+
+    # 前沿点太多时按净利润排序后等距抽样，保留整条曲线的形状
+    order = np.argsort(-archive.objectives[:, 0], kind="stable")
+    if len(order) > request.max_points:
+        order = order[np.linspace(0, len(order) - 1, request.max_points).round().astype(int)]
+
+    # 返回值用精确的 Decimal 计算器重算，与 /calculate 保持一致
+    base_state = evaluate(request.input)
+    candidates = []
+    for i in order:
+        params = {n: float(v) for n, v in zip(names, archive.params[i])}
+        state, _changed = evaluate_incremental(
+            base_state, apply_patch(base_state.input, _parameter_patch(params))
+        )
+        result = state.result()
+        candidates.append(
+            ParetoPoint(
+                parameters=params,
+                net_profit=result.value("summary.netProfit"),
+                roi=result.value("summary.roi"),
+                total_investment=float(_q2(state.values["total_investment"])),
+                net_profit_margin=result.value("summary.netProfitMargin"),
+                break_even_days=result.value("summary.breakEvenDays"),
+            )
+        )
+
+    # 批量公式是 float64 近似：按精确结果重新检查约束，并去掉因此变成被支配的点
+    exact = {
+        "net_profit": np.array([p.net_profit for p in candidates], dtype=np.float64),
+        "roi": np.array([p.roi for p in candidates], dtype=np.float64),
+        "total_investment": np.array([p.total_investment for p in candidates], dtype=np.float64),
+        "net_profit_margin": np.array(
+            [p.net_profit_margin for p in candidates], dtype=np.float64
+        ),
+        "break_even_days": np.array(
+            [np.inf if p.break_even_days is None else p.break_even_days for p in candidates],
+            dtype=np.float64,
+        ),
+    }
+    keep = _feasible(exact, request.constraints)
+    objectives = np.column_stack([exact[o] for o in _OBJECTIVES]) * _OBJECTIVE_SIGNS
+    keep[keep] = pareto_mask(objectives[keep])
+    points = [p for p, kept in zip(candidates, keep) if kept]
+    return ParetoOptimizeResponse(
+        evaluated=archive.evaluated, feasible=archive.feasible, rounds=rounds, points=points
+    )
@@ -1,44 +1,99 @@
 from __future__ import annotations
 
+import html
+import itertools
 import json
+import re
 import uuid
-from datetime import datetime, timezone
-from typing import Optional
+from typing import Any, Optional
 
-from sqlalchemy import delete, select
+from pydantic import ValidationError
+from sqlalchemy import bindparam, delete, select, text
 from sqlalchemy.orm import Session
 
-from backend.models.database import Project, Setting
+from backend.models.database import PROJECT_FTS_INSERT, PROJECT_FTS_TABLE, Project, Setting
 from backend.models.schemas import (
     BranchCreateRequest,
-    FBACalculationResult,
-    FBACalculatorInput,
+    BranchPatch,
+    BulkBranchCreateRequest,
+    BulkBranchCreateResponse,
     ProjectCreateRequest,
-    ProjectNode,
+    ProjectSearchHit,
+    ProjectSearchResponse,
     ProjectUpdateRequest,
-    SavedProject,
     SavedProjectSummary,
     Settings,
 )
-from backend.services.calculator import calculate_fba_profit
-from backend.utils.helpers import alpha_to_index, index_to_alpha
+from backend.services.calculator import (
+    apply_patch,
+    calculate,
+    evaluate,
+    evaluate_incremental,
+)
+from backend.services.project_tree import (
+    bump_tree_version,
+    patch_project_tree,
+    summary_json,
+)
+from backend.services.revisions import (
+    claim_revision,
+    delete_revisions,
+    record_revision,
+)
+from backend.utils.helpers import (
+    CJK_CHARS,
+    CJK_RUN,
+    alpha_to_index,
+    cjk_bigrams,
+    index_to_alpha,
+    json_dumps,
+    now_iso,
+)
 
 SETTINGS_EXCHANGE_RATE_KEY = "exchange_rate"
 
-
-def _now_iso() -> str:
-    return datetime.now(timezone.utc).astimezone().isoformat()
-
-
-def _json_dumps(data) -> str:
-    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+_SEARCH_TOKEN = re.compile(rf"[{CJK_CHARS}]+|[^\W{CJK_CHARS}]+")
+# FTS 高亮先用控制字符占位，转义 HTML 后再替换成 <mark>，避免项目名里的标签被客户端渲染
+_MARK_OPEN = "\x02"
+_MARK_CLOSE = "\x03"
+_MARKED = re.compile(f"({_MARK_OPEN}.*?{_MARK_CLOSE})", re.S)
+
+_FTS_DELETE = text(
+    f"DELETE FROM {PROJECT_FTS_TABLE} "
+    "WHERE rowid IN (SELECT rowid FROM projects WHERE id IN :ids)"
+).bindparams(bindparam("ids", expanding=True))
+_FTS_INSERT = text(f"{PROJECT_FTS_INSERT} FROM projects WHERE id IN :ids").bindparams(
+    bindparam("ids", expanding=True)
+)
+_FTS_COUNT = text(f"SELECT count(*) FROM {PROJECT_FTS_TABLE} WHERE {PROJECT_FTS_TABLE} MATCH :q")
+_FTS_SEARCH = text(
+    f"""
+    SELECT p.id, p.name, p.description, p.parent_id, p.branch_path,
+           p.created_at, p.updated_at,
+           highlight({PROJECT_FTS_TABLE}, 0, :open, :close),
+           snippet({PROJECT_FTS_TABLE}, 1, :open, :close, '…', 16),
+           {PROJECT_FTS_TABLE}.rank
+    FROM {PROJECT_FTS_TABLE}
+    JOIN projects AS p ON p.rowid = {PROJECT_FTS_TABLE}.rowid
+    WHERE {PROJECT_FTS_TABLE} MATCH :q
+    ORDER BY {PROJECT_FTS_TABLE}.rank
+    LIMIT :limit OFFSET :offset
+    """
+)
 
 
 def _json_loads(data: str):
     return json.loads(data)
 
 
-def _next_segment(existing_segments: list[str]) -> str:
+class BranchPatchError(ValueError):
+    def __init__(self, loc: tuple[Any, ...], errors: list[dict[str, Any]]):
+        super().__init__(f"Invalid input patch at {loc}")
+        self.loc = loc
+        self.errors = errors
+
+
+def _next_index(existing_segments: list[str]) -> int:
     indices: list[int] = []
     for seg in existing_segments:
         try:
@@ -46,8 +101,12 @@ def _next_segment(existing_segments: list[str]) -> str:
         except ValueError:
             continue
     if not indices:
-        return "A"
-    return index_to_alpha(max(indices) + 1)
+        return 0
+    return max(indices) + 1
+
+
+def _next_segment(existing_segments: list[str]) -> str:
+    return index_to_alpha(_next_index(existing_segments))
 
 
 def _project_to_summary(p: Project) -> SavedProjectSummary:
@@ -62,13 +121,59 @@ def _project_to_summary(p: Project) -> SavedProjectSummary:
     )
 
 
-def _project_to_saved_project(p: Project) -> SavedProject:
-    input_model = FBACalculatorInput.model_validate(_json_loads(p.input_json))
-    result_model = FBACalculationResult.model_validate(_json_loads(p.result_json))
-    return SavedProject(
-        **_project_to_summary(p).model_dump(),
-        input=input_model,
-        result=result_model,
+def saved_project_json(p: Project) -> str:
+    """Serialize a project as a SavedProject payload.
+
+    ``input_json``/``result_json`` are already camelCase JSON, so they are
+    spliced in as-is instead of being parsed and validated again.
+    """
+    summary = summary_json(
+        p.id, p.name, p.description, p.parent_id, p.branch_path, p.created_at, p.updated_at
+    )
+    return f'{summary[:-1]},"input":{p.input_json},"result":{p.result_json}}}'
+
+
+def _index_projects(db: Session, project_ids: list[str]) -> None:
+    db.flush()
+    db.execute(_FTS_DELETE, {"ids": project_ids})
+    db.execute(_FTS_INSERT, {"ids": project_ids})
+
+
+def _unindex_projects(db: Session, project_ids: list[str]) -> None:
+    db.execute(_FTS_DELETE, {"ids": project_ids})
+
+
+def _fts_query(query: str) -> Optional[str]:
+    # 拉丁词按前缀匹配；CJK 片段拆成相邻二字的短语，单字按前缀匹配；多个词之间为 AND
+    terms = []
+    for token in _SEARCH_TOKEN.findall(query):
+        if len(token) > 1 and CJK_RUN.fullmatch(token):
+            terms.append(f'"{" ".join(cjk_bigrams(token))}"')
+        else:
+            terms.append(f'"{token}"*')
+    return " ".join(terms) or None
+
+
+def _mark_cjk(fragment: str, query: str) -> str:
+    # highlight() 只能标出整段 token，CJK 子串命中在这里补上标记
+    runs = sorted(set(CJK_RUN.findall(query)), key=len, reverse=True)
+    if not runs:
+        return fragment
+    pattern = re.compile("|".join(map(re.escape, runs)))
+    parts = _MARKED.split(fragment)
+    return "".join(
+        part
+        if part.startswith(_MARK_OPEN)
+        else pattern.sub(lambda m: f"{_MARK_OPEN}{m.group()}{_MARK_CLOSE}", part)
+        for part in parts
+    )
+
+
+def _render_marks(fragment: str) -> str:
+    return (
+        html.escape(fragment, quote=False)
+        .replace(_MARK_OPEN, "<mark>")
+        .replace(_MARK_CLOSE, "</mark>")
     )
 
 
@@ -93,80 +198,72 @@ def update_settings(db: Session, settings: Settings) -> Settings:
     return settings
 
 
-def list_projects_tree(db: Session) -> list[ProjectNode]:
-    projects = db.execute(select(Project).order_by(Project.branch_path.asc())).scalars().all()
-
-    nodes_by_id: dict[str, ProjectNode] = {}
-    roots: list[ProjectNode] = []
+def get_project(db: Session, project_id: str) -> Optional[Project]:
+    return db.get(Project, project_id)
 
-    for p in projects:
-        nodes_by_id[p.id] = ProjectNode(project=_project_to_summary(p), children=[])
 
-    for p in projects:
-        node = nodes_by_id[p.id]
-        if p.parent_id and p.parent_id in nodes_by_id:
-            nodes_by_id[p.parent_id].children.append(node)
-        else:
-            roots.append(node)
-
-    return roots
-
-
-def get_project(db: Session, project_id: str) -> Optional[SavedProject]:
-    p = db.get(Project, project_id)
-    if p is None:
-        return None
-    return _project_to_saved_project(p)
-
-
-def create_project(db: Session, payload: ProjectCreateRequest) -> SavedProject:
+def create_project(db: Session, payload: ProjectCreateRequest) -> Project:
     existing_roots = (
         db.execute(select(Project.branch_path).where(Project.parent_id.is_(None))).scalars().all()
     )
     next_root = _next_segment(list(existing_roots))
 
     project_id = str(uuid.uuid4())
-    created_at = _now_iso()
+    created_at = now_iso()
 
-    result = calculate_fba_profit(payload.input)
+    result = calculate(payload.input)
     p = Project(
         id=project_id,
         name=payload.name,
         description=payload.description,
         parent_id=None,
         branch_path=next_root,
-        input_json=_json_dumps(payload.input.model_dump(mode="json", by_alias=True)),
-        result_json=_json_dumps(result.model_dump(mode="json", by_alias=True)),
+        input_json=json_dumps(payload.input.model_dump(mode="json", by_alias=True)),
+        result_json=result.to_json(),
         created_at=created_at,
         updated_at=created_at,
     )
     db.add(p)
+    record_revision(db, p)
+    _index_projects(db, [project_id])
+    version = bump_tree_version(db)
     db.commit()
-    return _project_to_saved_project(p)
+    patch_project_tree(db, version, upserted=[p])
+    return p
 
 
 def update_project(
     db: Session, project_id: str, payload: ProjectUpdateRequest
-) -> Optional[SavedProject]:
+) -> Optional[Project]:
     p = db.get(Project, project_id)
     if p is None:
         return None
 
-    result = calculate_fba_profit(payload.input)
+    result = calculate(payload.input)
 
+    # 并发保存同一项目时修订号按提交顺序递增，增量基于最新已提交的内容
+    revision, previous_input_json = claim_revision(db, p)
     p.name = payload.name
     p.description = payload.description
-    p.input_json = _json_dumps(payload.input.model_dump(mode="json", by_alias=True))
-    p.result_json = _json_dumps(result.model_dump(mode="json", by_alias=True))
-    p.updated_at = _now_iso()
+    p.input_json = json_dumps(payload.input.model_dump(mode="json", by_alias=True))
+    p.result_json = result.to_json()
+    p.updated_at = now_iso()
+    record_revision(db, p, previous_input_json, revision)
 
+    _index_projects(db, [project_id])
+    version = bump_tree_version(db)
     db.commit()
-    return _project_to_saved_project(p)
+    patch_project_tree(db, version, upserted=[p])
+    return p
+
+
+def _branch_suffixes(branch_paths: list[str]) -> list[str]:
+    return [path.split("-")[-1] for path in branch_paths]
 
 
 def create_branch(
     db: Session, parent_id: str, payload: BranchCreateRequest
-) -> Optional[SavedProject]:
+) -> Optional[Project]:
     parent = db.get(Project, parent_id)
     if parent is None:
         return None
@@ -176,12 +273,11 @@ def create_branch(
         .scalars()
         .all()
     )
-    sibling_suffixes = [path.split("-")[-1] for path in sibling_paths]
-    next_suffix = _next_segment(sibling_suffixes)
+    next_suffix = _next_segment(_branch_suffixes(sibling_paths))
     branch_path = f"{parent.branch_path}-{next_suffix}"
 
     project_id = str(uuid.uuid4())
-    now = _now_iso()
+    now = now_iso()
 
     p = Project(
         id=project_id,
@@ -195,8 +291,92 @@ def create_branch(
         updated_at=now,
     )
     db.add(p)
+    record_revision(db, p)
+    _index_projects(db, [project_id])
+    version = bump_tree_version(db)
+    db.commit()
+    patch_project_tree(db, version, upserted=[p])
+    return p
+
+
+def _grid_branches(payload: BulkBranchCreateRequest, parent_name: str) -> list[BranchPatch]:
+    if not payload.grid:
+        return []
+    prefix = payload.name_prefix or parent_name
+    paths = list(payload.grid)
+    branches = []
+    for values in itertools.product(*payload.grid.values()):
+        label = ", ".join(f"{path}={value}" for path, value in zip(paths, values))
+        branches.append(
+            BranchPatch(
+                name=f"{prefix} ({label})"[:200],
+                description=payload.description,
+                patch=dict(zip(paths, values)),
+            )
+        )
+    return branches
+
+
+def create_branches_bulk(
+    db: Session, parent_id: str, payload: BulkBranchCreateRequest
+) -> Optional[BulkBranchCreateResponse]:
+    parent = db.get(Project, parent_id)
+    if parent is None:
+        return None
+
+    # 父节点只完整计算一次，每个分支在其基础上增量求值
+    base = evaluate(_json_loads(parent.input_json))
+    specs = [(("branches", i), b) for i, b in enumerate(payload.branches)]
+    specs += [(("grid", i), b) for i, b in enumerate(_grid_branches(payload, parent.name))]
+
+    states = []
+    for loc, spec in specs:
+        try:
+            state, _changed = evaluate_incremental(base, apply_patch(base.input, spec.patch))
+        except ValidationError as exc:
+            raise BranchPatchError(
+                loc, exc.errors(include_url=False, include_context=False, include_input=False)
+            ) from exc
+        except ValueError as exc:
+            # 费率表查询等非字段校验错误（如未知类目）同样定位到具体分支
+            raise BranchPatchError(
+                loc, [{"type": "value_error", "loc": (), "msg": str(exc)}]
+            ) from exc
+        states.append(state)
+
+    sibling_paths = (
+        db.execute(select(Project.branch_path).where(Project.parent_id == parent_id))
+        .scalars()
+        .all()
+    )
+    first_index = _next_index(_branch_suffixes(sibling_paths))
+
+    now = now_iso()
+    rows = []
+    for i, ((_loc, spec), state) in enumerate(zip(specs, states)):
+        rows.append(
+            Project(
+                id=str(uuid.uuid4()),
+                name=spec.name,
+                description=spec.description,
+                parent_id=parent_id,
+                branch_path=f"{parent.branch_path}-{index_to_alpha(first_index + i)}",
+                input_json=json_dumps(state.input.model_dump(mode="json", by_alias=True)),
+                result_json=state.result().to_json(),
+                created_at=now,
+                updated_at=now,
+            )
+        )
+    db.add_all(rows)
+    for p in rows:
+        record_revision(db, p)
+    _index_projects(db, [p.id for p in rows])
+    version = bump_tree_version(db)
     db.commit()
-    return _project_to_saved_project(p)
+    patch_project_tree(db, version, upserted=rows)
+    return BulkBranchCreateResponse(
+        parent_id=parent_id, created=[_project_to_summary(p) for p in rows]
+    )
 
 
 def delete_project_cascade(db: Session, project_id: str) -> list[str]:
@@ -218,26 +398,64 @@ def delete_project_cascade(db: Session, project_id: str) -> list[str]:
         deleted.append(current)
         stack.extend(children_by_parent.get(current, []))
 
+    _unindex_projects(db, deleted)
+    delete_revisions(db, deleted)
     db.execute(delete(Project).where(Project.id.in_(deleted)))
+    version = bump_tree_version(db)
     db.commit()
+    patch_project_tree(db, version, removed=deleted)
     return deleted
 
 
-def export_project(db: Session, project_id: str, format: str = "json"):
+def search_projects(
+    db: Session, query: str, limit: int = 20, offset: int = 0
+) -> ProjectSearchResponse:
+    match = _fts_query(query)
+    if match is None:
+        return ProjectSearchResponse(query=query, total=0, limit=limit, offset=offset, items=[])
+
+    total = db.execute(_FTS_COUNT, {"q": match}).scalar_one()
+    rows = db.execute(
+        _FTS_SEARCH,
+        {
+            "q": match,
+            "open": _MARK_OPEN,
+            "close": _MARK_CLOSE,
+            "limit": limit,
+            "offset": offset,
+        },
+    ).all()
+    items = [
+        ProjectSearchHit(
+            project=SavedProjectSummary(
+                id=row[0],
+                name=row[1],
+                description=row[2],
+                parent_id=row[3],
+                branch_path=row[4],
+                created_at=row[5],
+                updated_at=row[6],
+            ),
+            name_highlight=_render_marks(_mark_cjk(row[7], query)),
+            description_snippet=_render_marks(_mark_cjk(row[8], query)),
+            score=-row[9],
+        )
+        for row in rows
+    ]
+    return ProjectSearchResponse(query=query, total=total, limit=limit, offset=offset, items=items)
+
+
+def export_project(db: Session, project_id: str, format: str = "json") -> Optional[str]:
     project = get_project(db, project_id)
     if project is None:
         return None
 
     if format == "csv":
-        s = project.result.summary
-        rows = [
-            ["metric", "value_usd", "value_cny"],
-            ["totalRevenue", s.total_revenue.usd, s.total_revenue.cny],
-            ["totalCost", s.total_cost.usd, s.total_cost.cny],
-            ["grossProfit", s.gross_profit.usd, s.gross_profit.cny],
-            ["netProfit", s.net_profit.usd, s.net_profit.cny],
-        ]
+        s = _json_loads(project.result_json)["summary"]
+        rows = [["metric", "value_usd", "value_cny"]]
+        for metric in ("totalRevenue", "totalCost", "grossProfit", "netProfit"):
+            rows.append([metric, s[metric]["usd"], s[metric]["cny"]])
         out_lines = [",".join(map(str, r)) for r in rows]
         return "\n".join(out_lines) + "\n"
 
-    return project.model_dump(mode="json", by_alias=True)
+    return saved_project_json(project)
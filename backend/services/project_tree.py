@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import bisect
+import threading
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from backend.models.database import Project, Setting
+from backend.utils.helpers import json_dumps
+
+# projects 树每次写入都在同一事务里把版本号 +1；各进程只需比较这一行即可判断快照是否过期
+TREE_VERSION_KEY = "project_tree_version"
+TREE_CACHE_SIZE = 32
+
+_SUMMARY_COLUMNS = (
+    Project.id,
+    Project.name,
+    Project.description,
+    Project.parent_id,
+    Project.branch_path,
+    Project.created_at,
+    Project.updated_at,
+)
+
+_BUMP_VERSION = text(
+    "INSERT INTO settings(key, value) VALUES (:key, '1') "
+    "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1 "
+    "RETURNING value"
+)
+
+
+def summary_json(
+    id: str,
+    name: str,
+    description: str,
+    parent_id: Optional[str],
+    branch_path: str,
+    created_at: str,
+    updated_at: str,
+) -> str:
+    return json_dumps(
+        {
+            "id": id,
+            "name": name,
+            "description": description,
+            "parentId": parent_id,
+            "branchPath": branch_path,
+            "createdAt": created_at,
+            "updatedAt": updated_at,
+        }
+    )
+
+
+def _summary_row(p: Project) -> tuple:
+    return (
+        p.id,
+        p.name,
+        p.description,
+        p.parent_id,
+        p.branch_path,
+        p.created_at,
+        p.updated_at,
+    )
+
+
+class _TreeNode:
+    __slots__ = ("id", "parent_id", "branch_path", "summary_json", "children", "subtree_json")
+
+    def __init__(self, row: tuple):
+        self.id = row[0]
+        self.parent_id = row[3]
+        self.branch_path = row[4]
+        self.summary_json = summary_json(*row)
+        self.children: list[str] = []
+        self.subtree_json: Optional[str] = None
+
+
+class ProjectTreeSnapshot:
+    """In-memory project tree with per-subtree JSON fragments.
+
+    Nodes keep their serialized summary and subtree; a write only clears the
+    fragments on the path from the touched node to its root, so the next read
+    re-joins those strings and reuses everything else.
+    """
+
+    __slots__ = ("version", "nodes", "roots", "tree_json")
+
+    def __init__(self, version: int, rows: Iterable[tuple]):
+        self.version = version
+        self.nodes: dict[str, _TreeNode] = {}
+        self.roots: list[str] = []
+        self.tree_json: Optional[str] = None
+        rows = list(rows)
+        for row in rows:
+            self.nodes[row[0]] = _TreeNode(row)
+        # 行已按 branch_path 排序，顺序追加即保持子节点有序
+        for row in rows:
+            node = self.nodes[row[0]]
+            self._siblings(node).append(node.id)
+
+    def _siblings(self, node: _TreeNode) -> list[str]:
+        parent = self.nodes.get(node.parent_id) if node.parent_id else None
+        return parent.children if parent is not None else self.roots
+
+    def _invalidate(self, node_id: Optional[str]) -> None:
+        self.tree_json = None
+        node = self.nodes.get(node_id) if node_id else None
+        # 祖先的片段包含子树，若某个节点已失效，其祖先必然也已失效
+        while node is not None and node.subtree_json is not None:
+            node.subtree_json = None
+            node = self.nodes.get(node.parent_id) if node.parent_id else None
+
+    def _attach(self, node: _TreeNode) -> None:
+        siblings = self._siblings(node)
+        keys = [self.nodes[i].branch_path for i in siblings]
+        siblings.insert(bisect.bisect_right(keys, node.branch_path), node.id)
+
+    def _detach(self, node: _TreeNode) -> None:
+        siblings = self._siblings(node)
+        if node.id in siblings:
+            siblings.remove(node.id)
+
+    def upsert(self, row: tuple) -> None:
+        node = self.nodes.get(row[0])
+        if node is None:
+            node = self.nodes[row[0]] = _TreeNode(row)
+            self._attach(node)
+            self._invalidate(node.parent_id)
+            return
+        self._invalidate(node.id)
+        if node.parent_id != row[3] or node.branch_path != row[4]:
+            self._detach(node)
+            node.parent_id = row[3]
+            node.branch_path = row[4]
+            self._attach(node)
+            self._invalidate(node.parent_id)
+        node.summary_json = summary_json(*row)
+
+    def remove(self, project_ids: Iterable[str]) -> None:
+        for project_id in project_ids:
+            node = self.nodes.get(project_id)
+            if node is None:
+                continue
+            self._invalidate(node.id)
+            self._detach(node)
+            del self.nodes[project_id]
+            for child_id in node.children:
+                child = self.nodes.get(child_id)
+                if child is not None:
+                    self._attach(child)
+
+    def _subtree(self, node_id: str) -> str:
+        # 迭代式后序遍历，分支链再深也不会触发递归上限
+        stack = [(node_id, False)]
+        while stack:
+            current, expanded = stack.pop()
+            node = self.nodes[current]
+            if node.subtree_json is not None:
+                continue
+            if not expanded:
+                stack.append((current, True))
+                stack.extend((child, False) for child in node.children)
+                continue
+            children = ",".join(self.nodes[child].subtree_json for child in node.children)
+            node.subtree_json = f'{{"project":{node.summary_json},"children":[{children}]}}'
+        return self.nodes[node_id].subtree_json
+
+    def to_json(self) -> str:
+        if self.tree_json is None:
+            self.tree_json = "[" + ",".join(self._subtree(i) for i in self.roots) + "]"
+        return self.tree_json
+
+
+_snapshots: OrderedDict[str, ProjectTreeSnapshot] = OrderedDict()
+_lock = threading.Lock()
+
+
+def _cache_key(db: Session) -> str:
+    # 每个工作区是独立的数据库文件，按连接 URL 区分快照
+    return str(db.get_bind().url)
+
+
+def tree_version(db: Session) -> int:
+    value = db.execute(select(Setting.value).where(Setting.key == TREE_VERSION_KEY)).scalar()
+    return int(value) if value is not None else 0
+
+
+def bump_tree_version(db: Session) -> int:
+    """Increment the shared tree version inside the caller's write transaction."""
+    return int(db.execute(_BUMP_VERSION, {"key": TREE_VERSION_KEY}).scalar_one())
+
+
+def project_tree_json(db: Session) -> str:
+    key = _cache_key(db)
+    # 先读版本再读行：两次查询之间若有其他进程写入，快照只会被标成旧版本，下次读取时重建
+    version = tree_version(db)
+    with _lock:
+        snapshot = _snapshots.get(key)
+        if snapshot is not None and snapshot.version == version:
+            _snapshots.move_to_end(key)
+            return snapshot.to_json()
+
+    rows = db.execute(select(*_SUMMARY_COLUMNS).order_by(Project.branch_path.asc())).all()
+    snapshot = ProjectTreeSnapshot(version, (tuple(row) for row in rows))
+    with _lock:
+        current = _snapshots.get(key)
+        if current is None or current.version <= version:
+            _snapshots[key] = snapshot
+            _snapshots.move_to_end(key)
+            while len(_snapshots) > TREE_CACHE_SIZE:
+                _snapshots.popitem(last=False)
+        return snapshot.to_json()
+
+
+def patch_project_tree(
+    db: Session,
+    version: int,
+    upserted: Iterable[Project] = (),
+    removed: Iterable[str] = (),
+) -> None:
+    """Apply a committed write to the cached snapshot.
+
+    ``version`` is the value returned by :func:`bump_tree_version` for that
+    write. The snapshot is patched only when it was exactly one version
+    behind; otherwise another process wrote in between and it is dropped.
+    """
+    key = _cache_key(db)
+    with _lock:
+        snapshot = _snapshots.get(key)
+        if snapshot is None:
+            return
+        if snapshot.version != version - 1:
+            del _snapshots[key]
+            return
+        for p in upserted:
+            snapshot.upsert(_summary_row(p))
+        snapshot.remove(removed)
+        snapshot.version = version
+
+
+def clear_project_tree_cache() -> None:
+    with _lock:
+        _snapshots.clear()
@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import json
+from functools import lru_cache
+from typing import Any, Optional
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.orm import Session
+
+from backend.models.database import Project, ProjectRevision
+from backend.models.schemas import (
+    FBACalculatorInput,
+    FieldChange,
+    ProjectRevisionDiff,
+    ProjectRevisionInfo,
+)
+from backend.services.calculator import calculate
+from backend.utils.helpers import json_dumps
+
+# 每隔 N 个修订存一次完整快照，重建任意修订最多回放 N - 1 个增量
+REVISION_SNAPSHOT_INTERVAL = 16
+
+# 在写事务里原子地占用下一个修订号；这条 UPDATE 同时拿到 SQLite 写锁，
+# 之后读到的 input_json 就是最后一次已提交的内容
+_CLAIM_REVISION = text(
+    "UPDATE projects SET revision = revision + 1 WHERE id = :id RETURNING revision, input_json"
+)
+
+
+def _flatten(data: dict[str, Any], prefix: str = "") -> dict[str, Any]:
+    out: dict[str, Any] = {}
+    for key, value in data.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict) and value:
+            out.update(_flatten(value, f"{path}."))
+        else:
+            out[path] = value
+    return out
+
+
+def _input_delta(before: dict[str, Any], after: dict[str, Any]) -> dict[str, Any]:
+    old = _flatten(before)
+    new = _flatten(after)
+    return {
+        "set": {
+            path: value for path, value in new.items() if path not in old or old[path] != value
+        },
+        "unset": [path for path in old if path not in new],
+    }
+
+
+def _apply_delta(data: dict[str, Any], delta: dict[str, Any]) -> None:
+    # 先删后写：可选子对象在 None 与对象之间切换时两边都有记录
+    for path in delta["unset"]:
+        *parents, leaf = path.split(".")
+        node: Any = data
+        for key in parents:
+            node = node.get(key)
+            if not isinstance(node, dict):
+                break
+        else:
+            node.pop(leaf, None)
+    for path, value in delta["set"].items():
+        *parents, leaf = path.split(".")
+        node = data
+        for key in parents:
+            child = node.get(key)
+            if not isinstance(child, dict):
+                child = node[key] = {}
+            node = child
+        node[leaf] = value
+
+
+def _add_revision(
+    db: Session, project: Project, revision: int, is_snapshot: bool, data_json: str
+) -> None:
+    db.add(
+        ProjectRevision(
+            project_id=project.id,
+            revision=revision,
+            is_snapshot=is_snapshot,
+            data_json=data_json,
+            name=project.name,
+            description=project.description,
+            created_at=project.updated_at,
+        )
+    )
+    project.revision = revision
+
+
+def claim_revision(db: Session, project: Project) -> tuple[int, str]:
+    """Reserve the next revision number for an existing project.
+
+    Must run before ``project`` is modified. Returns the claimed number and
+    the committed input JSON the new revision's delta is based on; a project
+    created before revision history existed gets that input as revision 1.
+    """
+    revision, input_json = db.execute(_CLAIM_REVISION, {"id": project.id}).one()
+    if revision == 1:
+        _add_revision(db, project, 1, True, input_json)
+        revision, input_json = db.execute(_CLAIM_REVISION, {"id": project.id}).one()
+    project.revision = revision
+    return revision, input_json
+
+
+def record_revision(
+    db: Session,
+    project: Project,
+    previous_input_json: Optional[str] = None,
+    revision: Optional[int] = None,
+) -> None:
+    if revision is None:
+        revision = (project.revision or 0) + 1
+    if previous_input_json is None or (revision - 1) % REVISION_SNAPSHOT_INTERVAL == 0:
+        _add_revision(db, project, revision, True, project.input_json)
+        return
+    delta = _input_delta(json.loads(previous_input_json), json.loads(project.input_json))
+    _add_revision(db, project, revision, False, json_dumps(delta))
+
+
+def delete_revisions(db: Session, project_ids: list[str]) -> None:
+    db.execute(delete(ProjectRevision).where(ProjectRevision.project_id.in_(project_ids)))
+
+
+def list_revisions(
+    db: Session, project_id: str, limit: int = 50, offset: int = 0
+) -> Optional[list[ProjectRevisionInfo]]:
+    if db.get(Project, project_id) is None:
+        return None
+    rows = db.execute(
+        select(
+            ProjectRevision.revision,
+            ProjectRevision.name,
+            ProjectRevision.description,
+            ProjectRevision.is_snapshot,
+            ProjectRevision.created_at,
+        )
+        .where(ProjectRevision.project_id == project_id)
+        .order_by(ProjectRevision.revision.desc())
+        .limit(limit)
+        .offset(offset)
+    ).all()
+    return [
+        ProjectRevisionInfo(
+            revision=revision,
+            name=name,
+            description=description,
+            is_snapshot=is_snapshot,
+            created_at=created_at,
+        )
+        for revision, name, description, is_snapshot, created_at in rows
+    ]
+
+
+def _revision_input(db: Session, project_id: str, revision: int) -> Optional[dict[str, Any]]:
+    snapshot = db.execute(
+        select(func.max(ProjectRevision.revision)).where(
+            ProjectRevision.project_id == project_id,
+            ProjectRevision.revision <= revision,
+            ProjectRevision.is_snapshot.is_(True),
+        )
+    ).scalar_one()
+    if snapshot is None:
+        return None
+    rows = db.execute(
+        select(ProjectRevision.revision, ProjectRevision.data_json)
+        .where(
+            ProjectRevision.project_id == project_id,
+            ProjectRevision.revision >= snapshot,
+            ProjectRevision.revision <= revision,
+        )
+        .order_by(ProjectRevision.revision.asc())
+    ).all()
+    if not rows or rows[-1][0] != revision:
+        return None
+    data = json.loads(rows[0][1])
+    for _revision, data_json in rows[1:]:
+        _apply_delta(data, json.loads(data_json))
+    return data
+
+
+@lru_cache(maxsize=256)
+def _result_json(input_json: str) -> str:
+    # 修订不可变，按规范化后的输入 JSON 缓存计算结果
+    return calculate(json.loads(input_json)).to_json()
+
+
+def _load_revision(
+    db: Session, project_id: str, revision: int
+) -> Optional[tuple[Project, ProjectRevision, str, str]]:
+    project = db.get(Project, project_id)
+    if project is None:
+        return None
+    row = db.execute(
+        select(ProjectRevision).where(
+            ProjectRevision.project_id == project_id, ProjectRevision.revision == revision
+        )
+    ).scalar_one_or_none()
+    if row is None:
+        return None
+    if revision == project.revision:
+        # 最新修订直接读 projects 行，不需要回放
+        return project, row, project.input_json, project.result_json
+    data = _revision_input(db, project_id, revision)
+    if data is None:
+        return None
+    input_json = json_dumps(
+        FBACalculatorInput.model_validate(data).model_dump(mode="json", by_alias=True)
+    )
+    return project, row, input_json, _result_json(input_json)
+
+
+def get_revision_json(db: Session, project_id: str, revision: int) -> Optional[str]:
+    loaded = _load_revision(db, project_id, revision)
+    if loaded is None:
+        return None
+    _project, row, input_json, result_json = loaded
+    header = json_dumps(
+        {
+            "revision": row.revision,
+            "name": row.name,
+            "description": row.description,
+            "isSnapshot": row.is_snapshot,
+            "createdAt": row.created_at,
+            "projectId": project_id,
+        }
+    )
+    return f'{header[:-1]},"input":{input_json},"result":{result_json}}}'
+
+
+def _changes(before: dict[str, Any], after: dict[str, Any]) -> list[FieldChange]:
+    old = _flatten(before)
+    new = _flatten(after)
+    paths = list(old) + [path for path in new if path not in old]
+    return [
+        FieldChange(path=path, before=old.get(path), after=new.get(path))
+        for path in paths
+        if old.get(path) != new.get(path)
+    ]
+
+
+def diff_revisions(
+    db: Session, project_id: str, from_revision: int, to_revision: int
+) -> Optional[ProjectRevisionDiff]:
+    before = _load_revision(db, project_id, from_revision)
+    after = _load_revision(db, project_id, to_revision)
+    if before is None or after is None:
+        return None
+    return ProjectRevisionDiff(
+        project_id=project_id,
+        from_revision=from_revision,
+        to_revision=to_revision,
+        input_changes=_changes(json.loads(before[2]), json.loads(after[2])),
+        result_changes=_changes(json.loads(before[3]), json.loads(after[3])),
+    )
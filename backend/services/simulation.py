@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Optional, Union
+
+import numpy as np
+
+from backend.models.schemas import DailySeries, FBACalculatorInput, Money
+from backend.services.calculator import (
+    RETURN_PROCESSING_FEE_CAP,
+    RETURN_PROCESSING_FEE_RATE,
+    STORAGE_DAYS_PER_MONTH,
+    _money,
+    _money_input_usd,
+    apply_fee_profile,
+)
+
+DEFAULT_HORIZON_DAYS = 365
+DEFAULT_RETURN_LAG_DAYS = 30
+BILLING_CYCLE_DAYS = STORAGE_DAYS_PER_MONTH
+
+
+def _col(values) -> np.ndarray:
+    return np.asarray(values, dtype=np.float64).reshape(-1, 1)
+
+
+def simulate_daily_batch(
+    *,
+    unit_cost,
+    quantity,
+    shipping_per_unit,
+    selling_price,
+    daily_sales,
+    sales_days,
+    daily_ad_budget,
+    ad_rate,
+    referral_fee_rate,
+    fba_fee_per_unit,
+    monthly_storage_fee,
+    return_rate,
+    resellable_rate,
+    horizon_days: int = DEFAULT_HORIZON_DAYS,
+    return_lag_days: int = DEFAULT_RETURN_LAG_DAYS,
+) -> dict[str, np.ndarray]:
+    """Simulate N SKUs day by day over ``horizon_days``.
+
+    Every argument is a scalar or a length-N array of USD amounts, counts or
+    fractions (rates in 0..1). Returned arrays have shape ``(N, horizon_days)``,
+    except ``break_even_day`` (1-based, ``-1`` when never reached).
+    """
+    if horizon_days < 1:
+        raise ValueError("horizon_days must be >= 1")
+    if return_lag_days < 0:
+        raise ValueError("return_lag_days must be >= 0")
+
+    unit_cost = _col(unit_cost)
+    quantity = _col(quantity)
+    shipping_per_unit = _col(shipping_per_unit)
+    selling_price = _col(selling_price)
+    daily_sales = _col(daily_sales)
+    sales_days = _col(sales_days)
+    daily_ad_budget = _col(daily_ad_budget)
+    ad_rate = _col(ad_rate)
+    referral_fee_rate = _col(referral_fee_rate)
+    fba_fee_per_unit = _col(fba_fee_per_unit)
+    monthly_storage_fee = _col(monthly_storage_fee)
+    return_rate = _col(return_rate)
+    resellable_rate = _col(resellable_rate)
+
+    days = np.arange(horizon_days, dtype=np.float64)[None, :]
+    selling = days < sales_days
+
+    # ========== 售中 ==========
+    planned_cum = daily_sales * np.minimum(days + 1, sales_days)
+    sold_cum = np.minimum(planned_cum, quantity)
+    units_sold = np.diff(sold_cum, axis=1, prepend=0.0)
+
+    revenue = units_sold * selling_price
+    referral_fee = revenue * referral_fee_rate
+    fba_fee = units_sold * fba_fee_per_unit
+    advertising_cost = np.where(selling, daily_ad_budget, 0.0) + revenue * ad_rate
+
+    # ========== 售后（退货延迟到达） ==========
+    units_returned = np.zeros_like(units_sold)
+    if return_lag_days < horizon_days:
+        units_returned[:, return_lag_days:] = (
+            units_sold[:, : horizon_days - return_lag_days] * return_rate
+        )
+    resellable = units_returned * resellable_rate
+    unsellable = units_returned - resellable
+
+    return_processing_fee_per_unit = np.minimum(
+        selling_price * referral_fee_rate * float(RETURN_PROCESSING_FEE_RATE),
+        float(RETURN_PROCESSING_FEE_CAP),
+    )
+    return_cash = (
+        units_returned * selling_price * (referral_fee_rate - 1.0)
+        - units_returned * return_processing_fee_per_unit
+        - unsellable * fba_fee_per_unit
+    )
+
+    # ========== 库存与月度仓储费 ==========
+    inventory = quantity - sold_cum + np.cumsum(resellable, axis=1)
+
+    billing_days = np.arange(BILLING_CYCLE_DAYS - 1, horizon_days, BILLING_CYCLE_DAYS)
+    if billing_days.size == 0 or billing_days[-1] != horizon_days - 1:
+        billing_days = np.append(billing_days, horizon_days - 1)
+    unit_days = np.cumsum(inventory, axis=1)[:, billing_days]
+    unit_days = np.diff(unit_days, axis=1, prepend=0.0)
+    storage_fee = np.zeros_like(inventory)
+    storage_fee[:, billing_days] = unit_days * (monthly_storage_fee / BILLING_CYCLE_DAYS)
+
+    # ========== 现金流 ==========
+    net_cash_flow = revenue - referral_fee - fba_fee - advertising_cost - storage_fee + return_cash
+    net_cash_flow[:, 0] -= ((unit_cost + shipping_per_unit) * quantity)[:, 0]
+    cumulative_cash = np.cumsum(net_cash_flow, axis=1)
+
+    recovered = cumulative_cash >= 0
+    break_even_day = np.where(recovered.any(axis=1), recovered.argmax(axis=1) + 1, -1)
+
+    return {
+        "inventory": inventory,
+        "units_sold": units_sold,
+        "units_returned": units_returned,
+        "revenue": revenue,
+        "advertising_cost": advertising_cost,
+        "storage_fee": storage_fee,
+        "net_cash_flow": net_cash_flow,
+        "cumulative_cash": cumulative_cash,
+        "break_even_day": break_even_day,
+    }
+
+
+def _round_list(values: np.ndarray) -> list[float]:
+    return np.round(values, 2).tolist()
+
+
+def simulate_daily(
+    input_data: Union[FBACalculatorInput, dict],
+    horizon_days: int = DEFAULT_HORIZON_DAYS,
+    return_lag_days: int = DEFAULT_RETURN_LAG_DAYS,
+) -> DailySeries:
+    if not isinstance(input_data, FBACalculatorInput):
+        input_data = FBACalculatorInput.model_validate(input_data)
+    input_data = apply_fee_profile(input_data)
+
+    exchange_rate = input_data.settings.exchange_rate
+    pre = input_data.pre_purchase
+    during = input_data.during_sale
+    after = input_data.after_sale
+
+    daily_ad_budget = Decimal("0")
+    ad_rate = Decimal("0")
+    if during.advertising_mode == "budget":
+        daily_ad_budget = _money_input_usd(during.daily_ad_budget, exchange_rate)
+    else:
+        ad_rate = (during.ad_percentage or Decimal("0")) / Decimal("100")
+
+    sim = simulate_daily_batch(
+        unit_cost=float(_money_input_usd(pre.unit_cost, exchange_rate)),
+        quantity=pre.quantity,
+        shipping_per_unit=float(_money_input_usd(pre.shipping_per_unit, exchange_rate)),
+        selling_price=float(_money_input_usd(during.selling_price, exchange_rate)),
+        daily_sales=during.daily_sales,
+        sales_days=during.sales_days,
+        daily_ad_budget=float(daily_ad_budget),
+        ad_rate=float(ad_rate),
+        referral_fee_rate=float(during.referral_fee_rate / Decimal("100")),
+        fba_fee_per_unit=float(_money_input_usd(during.fba_fee_per_unit, exchange_rate)),
+        monthly_storage_fee=float(_money_input_usd(during.monthly_storage_fee, exchange_rate)),
+        return_rate=float(after.return_rate / Decimal("100")),
+        resellable_rate=float(after.resellable_rate / Decimal("100")),
+        horizon_days=horizon_days,
+        return_lag_days=return_lag_days,
+    )
+
+    cumulative_cash = sim["cumulative_cash"][0]
+    break_even_day: Optional[int] = int(sim["break_even_day"][0])
+    if break_even_day < 0:
+        break_even_day = None
+
+    def money(value: float) -> Money:
+        return _money(Decimal(repr(float(value))), exchange_rate)
+
+    return DailySeries(
+        horizon_days=horizon_days,
+        return_lag_days=return_lag_days,
+        inventory=_round_list(sim["inventory"][0]),
+        units_sold=_round_list(sim["units_sold"][0]),
+        units_returned=_round_list(sim["units_returned"][0]),
+        revenue_usd=_round_list(sim["revenue"][0]),
+        advertising_cost_usd=_round_list(sim["advertising_cost"][0]),
+        storage_fee_usd=_round_list(sim["storage_fee"][0]),
+        net_cash_flow_usd=_round_list(sim["net_cash_flow"][0]),
+        cumulative_cash_usd=_round_list(cumulative_cash),
+        break_even_day=break_even_day,
+        final_cash=money(cumulative_cash[-1]),
+        peak_capital=money(max(0.0, -float(cumulative_cash.min()))),
+    )
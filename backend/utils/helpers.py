@@ -1,5 +1,37 @@
 from __future__ import annotations
 
+import json
+import math
+import re
+from collections.abc import Callable
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+
+# 中日韩文字之间没有空格，unicode61 会把整段当成一个词；这里切成相邻二字供全文索引使用
+CJK_CHARS = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+CJK_RUN = re.compile(f"[{CJK_CHARS}]+")
+
+
+def cjk_bigrams(run: str) -> list[str]:
+    return [run[i : i + 2] for i in range(len(run) - 1)]
+
+
+def cjk_terms(text: Optional[str]) -> str:
+    """Index terms for the CJK runs in ``text``.
+
+    Each run becomes its overlapping bigrams followed by its last character,
+    so any substring of two or more characters is a phrase of consecutive
+    bigrams and any single character is a prefix of some term.
+    """
+    if not text:
+        return ""
+    terms: list[str] = []
+    for run in CJK_RUN.findall(text):
+        terms.extend(cjk_bigrams(run))
+        terms.append(run[-1])
+    return " ".join(terms)
+
 
 def index_to_alpha(index: int) -> str:
     if index < 0:
@@ -25,3 +57,18 @@ def alpha_to_index(s: str) -> int:
         n = n * 26 + (ord(c) - ord("A") + 1)
     return n - 1
 
+
+def json_dumps(data, default: Optional[Callable[[Any], Any]] = None) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=default)
+
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).astimezone().isoformat()
+
+
+def step_range(low: float, high: float, step: float) -> tuple[float, float]:
+    """Smallest and largest multiples of ``step`` (cents or whole units) in ``[low, high]``."""
+    # 先按 1e-6 取整消除 20.99 / 0.01 = 2098.9999… 这类浮点误差
+    first = math.ceil(round(low / step, 6)) * step
+    last = math.floor(round(high / step, 6)) * step
+    return round(first, 2), round(last, 2)
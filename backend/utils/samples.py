@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+# 标准示例输入（snake_case），供基准脚本与测试共用
+SAMPLE_CALCULATOR_INPUT = {
+    "pre_purchase": {
+        "unit_cost": {"usd": 10.00},
+        "quantity": 100,
+        "shipping_per_unit": {"usd": 2.00},
+    },
+    "during_sale": {
+        "selling_price": {"usd": 29.99},
+        "daily_sales": 5,
+        "sales_days": 20,
+        "advertising_mode": "percentage",
+        "ad_percentage": 10,
+        "referral_fee_rate": 15,
+        "fba_fee_per_unit": {"usd": 4.50},
+        "monthly_storage_fee": {"usd": 0.50},
+    },
+    "after_sale": {"return_rate": 5, "resellable_rate": 80},
+    "settings": {"exchange_rate": 7.25},
+}
@@ -1,19 +1,31 @@
 import type {
   BranchCreateRequest,
+  BulkBranchCreateRequest,
+  BulkBranchCreateResponse,
   FBACalculationResult,
   FBACalculatorInput,
+  ParetoOptimizeRequest,
+  ParetoOptimizeResponse,
   ProjectCreateRequest,
   ProjectNode,
+  ProjectSearchResponse,
   ProjectUpdateRequest,
   SavedProject,
   Settings
 } from "../types";
 
+let workspaceId: string | null = null;
+
+export function setWorkspaceId(id: string | null): void {
+  workspaceId = id;
+}
+
 async function requestJson<T>(path: string, init?: RequestInit): Promise<T> {
   const res = await fetch(path, {
     ...init,
     headers: {
       "Content-Type": "application/json",
+      ...(workspaceId ? { "X-Workspace-Id": workspaceId } : {}),
       ...(init?.headers ?? {})
     }
   });
@@ -35,6 +47,15 @@ export async function apiCalculate(
   });
 }
 
+export async function apiOptimizePareto(
+  payload: ParetoOptimizeRequest
+): Promise<ParetoOptimizeResponse> {
+  return requestJson<ParetoOptimizeResponse>("/api/optimize/pareto", {
+    method: "POST",
+    body: JSON.stringify(payload)
+  });
+}
+
 export async function apiGetSettings(): Promise<Settings> {
   return requestJson<Settings>("/api/settings");
 }
@@ -50,6 +71,19 @@ export async function apiListProjects(): Promise<ProjectNode[]> {
   return requestJson<ProjectNode[]>("/api/projects");
 }
 
+export async function apiSearchProjects(
+  query: string,
+  limit = 20,
+  offset = 0
+): Promise<ProjectSearchResponse> {
+  const params = new URLSearchParams({
+    q: query,
+    limit: String(limit),
+    offset: String(offset)
+  });
+  return requestJson<ProjectSearchResponse>(`/api/projects/search?${params}`);
+}
+
 export async function apiGetProject(id: string): Promise<SavedProject> {
   return requestJson<SavedProject>(`/api/projects/${encodeURIComponent(id)}`);
 }
@@ -92,3 +126,16 @@ export async function apiCreateBranch(
   );
 }
 
+export async function apiCreateBranchesBulk(
+  parentId: string,
+  payload: BulkBranchCreateRequest
+): Promise<BulkBranchCreateResponse> {
+  return requestJson<BulkBranchCreateResponse>(
+    `/api/projects/${encodeURIComponent(parentId)}/branches/bulk`,
+    {
+      method: "POST",
+      body: JSON.stringify(payload)
+    }
+  );
+}
+
@@ -81,13 +81,13 @@ export function DuringSaleInputs() {
 
         <MoneyInput
           label="单件 FBA 配送费"
-          value={input.duringSale.fbaFeePerUnit}
+          value={input.duringSale.fbaFeePerUnit ?? { usd: 0, cny: 0, primaryCurrency: "USD" }}
           exchangeRate={input.settings.exchangeRate}
           onChange={(v) => setMoney("duringSale.fbaFeePerUnit", v)}
         />
         <MoneyInput
           label="单件月均仓储费"
-          value={input.duringSale.monthlyStorageFee}
+          value={input.duringSale.monthlyStorageFee ?? { usd: 0, cny: 0, primaryCurrency: "USD" }}
           exchangeRate={input.settings.exchangeRate}
           onChange={(v) => setMoney("duringSale.monthlyStorageFee", v)}
         />
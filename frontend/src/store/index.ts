@@ -83,8 +83,12 @@ function syncAllMoneyInputs(input: FBACalculatorInput): FBACalculatorInput {
       dailyAdBudget: input.duringSale.dailyAdBudget
         ? syncMoneyInput(input.duringSale.dailyAdBudget, rate)
         : undefined,
-      fbaFeePerUnit: syncMoneyInput(input.duringSale.fbaFeePerUnit, rate),
-      monthlyStorageFee: syncMoneyInput(input.duringSale.monthlyStorageFee, rate)
+      fbaFeePerUnit: input.duringSale.fbaFeePerUnit
+        ? syncMoneyInput(input.duringSale.fbaFeePerUnit, rate)
+        : undefined,
+      monthlyStorageFee: input.duringSale.monthlyStorageFee
+        ? syncMoneyInput(input.duringSale.monthlyStorageFee, rate)
+        : undefined
     }
   };
 }
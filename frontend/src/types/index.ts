@@ -11,6 +11,16 @@ export interface Money {
   cny: number;
 }
 
+export interface FeeProfile {
+  lengthIn: number;
+  widthIn: number;
+  heightIn: number;
+  weightLb: number;
+  category?: string | null;
+  season?: "off_peak" | "peak";
+  scheduleVersion?: string | null;
+}
+
 export interface FBACalculatorInput {
   prePurchase: {
     unitCost: MoneyInput;
@@ -25,8 +35,9 @@ export interface FBACalculatorInput {
     dailyAdBudget?: MoneyInput;
     adPercentage?: number;
     referralFeeRate: number;
-    fbaFeePerUnit: MoneyInput;
-    monthlyStorageFee: MoneyInput;
+    fbaFeePerUnit?: MoneyInput;
+    monthlyStorageFee?: MoneyInput;
+    feeProfile?: FeeProfile | null;
   };
   afterSale: {
     returnRate: number;
@@ -69,6 +80,23 @@ export interface FBACalculationResult {
     unsellableQuantity: number;
     returnProcessingFeePerUnit: Money;
   };
+  dailySeries?: DailySeries | null;
+}
+
+export interface DailySeries {
+  horizonDays: number;
+  returnLagDays: number;
+  inventory: number[];
+  unitsSold: number[];
+  unitsReturned: number[];
+  revenueUsd: number[];
+  advertisingCostUsd: number[];
+  storageFeeUsd: number[];
+  netCashFlowUsd: number[];
+  cumulativeCashUsd: number[];
+  breakEvenDay: number | null;
+  finalCash: Money;
+  peakCapital: Money;
 }
 
 export interface SavedProjectSummary {
@@ -91,6 +119,21 @@ export interface ProjectNode {
   children: ProjectNode[];
 }
 
+export interface ProjectSearchHit {
+  project: SavedProjectSummary;
+  nameHighlight: string;
+  descriptionSnippet: string;
+  score: number;
+}
+
+export interface ProjectSearchResponse {
+  query: string;
+  total: number;
+  limit: number;
+  offset: number;
+  items: ProjectSearchHit[];
+}
+
 export interface Settings {
   exchangeRate: number;
 }
@@ -112,3 +155,121 @@ export interface BranchCreateRequest {
   description: string;
 }
 
+export interface BranchPatch {
+  name: string;
+  description?: string;
+  patch: Record<string, unknown>;
+}
+
+export interface BulkBranchCreateRequest {
+  branches?: BranchPatch[];
+  grid?: Record<string, unknown[]>;
+  namePrefix?: string;
+  description?: string;
+}
+
+export interface BulkBranchCreateResponse {
+  parentId: string;
+  created: SavedProjectSummary[];
+}
+
+export interface ProjectRevisionInfo {
+  revision: number;
+  name: string;
+  description: string;
+  isSnapshot: boolean;
+  createdAt: string;
+}
+
+export interface ProjectRevisionDetail extends ProjectRevisionInfo {
+  projectId: string;
+  input: FBACalculatorInput;
+  result: FBACalculationResult;
+}
+
+export interface FieldChange {
+  path: string;
+  before: unknown;
+  after: unknown;
+}
+
+export interface ProjectRevisionDiff {
+  projectId: string;
+  fromRevision: number;
+  toRevision: number;
+  inputChanges: FieldChange[];
+  resultChanges: FieldChange[];
+}
+
+export interface FeeScheduleInfo {
+  version: string;
+  marketplace: string;
+  effectiveFrom: string;
+  sizeTiers: string[];
+  categories: string[];
+}
+
+export interface FeeEstimate {
+  scheduleVersion: string;
+  sizeTier: string;
+  shippingWeightLb: number;
+  cubicFeet: number;
+  fbaFeePerUnit: Money;
+  monthlyStorageFee: Money;
+  referralFee: Money;
+  referralFeeRate: number;
+}
+
+export interface CalculationSession {
+  sessionId: string;
+  result: FBACalculationResult;
+}
+
+export interface CalculationDiff {
+  sessionId: string;
+  changed: Record<string, Money | number | null>;
+}
+
+export type OptimizerParameter =
+  | "sellingPrice"
+  | "adPercentage"
+  | "dailyAdBudget"
+  | "quantity";
+
+export interface ParameterBounds {
+  min: number;
+  max: number;
+}
+
+export interface OptimizerConstraints {
+  maxBreakEvenDays?: number | null;
+  minNetProfit?: number | null;
+  minRoi?: number | null;
+  minNetProfitMargin?: number | null;
+  maxTotalInvestment?: number | null;
+}
+
+export interface ParetoOptimizeRequest {
+  input: FBACalculatorInput;
+  bounds: Partial<Record<OptimizerParameter, ParameterBounds>>;
+  constraints?: OptimizerConstraints;
+  gridPoints?: number;
+  refineRounds?: number;
+  maxPoints?: number;
+}
+
+export interface ParetoPoint {
+  parameters: Partial<Record<OptimizerParameter, number>>;
+  netProfit: number;
+  roi: number;
+  totalInvestment: number;
+  netProfitMargin: number;
+  breakEvenDays: number | null;
+}
+
+export interface ParetoOptimizeResponse {
+  evaluated: number;
+  feasible: number;
+  rounds: number;
+  points: ParetoPoint[];
+}
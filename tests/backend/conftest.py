@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import copy
+import random
+from decimal import Decimal
+
+import pytest
+
+from backend.models.schemas import FBACalculatorInput
+from backend.utils.samples import SAMPLE_CALCULATOR_INPUT
+
+
+@pytest.fixture
+def make_input():
+    """Return a factory for fresh, mutable copies of the standard input."""
+    return lambda: copy.deepcopy(SAMPLE_CALCULATOR_INPUT)
+
+
+@pytest.fixture
+def standard_input_json(make_input):
+    """The standard input as the camelCase JSON the API accepts."""
+    return FBACalculatorInput.model_validate(make_input()).model_dump(mode="json", by_alias=True)
+
+
+def _random_money(rng: random.Random, low: float, high: float, rate: Decimal) -> dict:
+    if rng.random() < 0.25:
+        return {"cny": round(rng.uniform(low, high) * float(rate), 2), "primary_currency": "CNY"}
+    return {"usd": round(rng.uniform(low, high), 2)}
+
+
+@pytest.fixture
+def make_random_input(make_input):
+    """Return a factory for random inputs (snake_case), seeded by the caller's ``rng``."""
+
+    def factory(rng: random.Random, rate: Decimal) -> dict:
+        data = make_input()
+        data["settings"]["exchange_rate"] = rate
+        data["pre_purchase"] = {
+            "unit_cost": _random_money(rng, 0.5, 80, rate),
+            "quantity": rng.randint(0, 2000),
+            "shipping_per_unit": _random_money(rng, 0, 10, rate),
+        }
+        data["during_sale"].update(
+            selling_price=_random_money(rng, 1, 200, rate),
+            daily_sales=rng.randint(0, 60),
+            sales_days=rng.randint(1, 180),
+            ad_percentage=round(rng.uniform(0, 40), 2),
+            referral_fee_rate=round(rng.uniform(5, 20), 2),
+            fba_fee_per_unit=_random_money(rng, 2, 15, rate),
+            monthly_storage_fee=_random_money(rng, 0, 3, rate),
+        )
+        data["after_sale"] = {
+            "return_rate": round(rng.uniform(0, 30), 2),
+            "resellable_rate": round(rng.uniform(0, 100), 2),
+        }
+        return data
+
+    return factory
@@ -1,34 +1,113 @@
 from __future__ import annotations
 
+import random
+from decimal import ROUND_HALF_UP, Decimal
+
 import pytest
 
-from backend.services.calculator import calculate_fba_profit
-
-
-def test_fba_calculation_standard_case():
-    input_data = {
-        "pre_purchase": {
-            "unit_cost": {"usd": 10.00},
-            "quantity": 100,
-            "shipping_per_unit": {"usd": 2.00},
-        },
-        "during_sale": {
-            "selling_price": {"usd": 29.99},
-            "daily_sales": 5,
-            "sales_days": 20,
-            "advertising_mode": "percentage",
-            "ad_percentage": 10,
-            "referral_fee_rate": 15,
-            "fba_fee_per_unit": {"usd": 4.50},
-            "monthly_storage_fee": {"usd": 0.50},
-        },
-        "after_sale": {"return_rate": 5, "resellable_rate": 80},
-        "settings": {"exchange_rate": 7.25},
-    }
+from backend.models.schemas import FBACalculatorInput
+from backend.services import calc_sessions
+from backend.services.calculator import (
+    apply_patch,
+    calculate,
+    calculate_fba_profit,
+    evaluate,
+    evaluate_incremental,
+)
+
 
-    result = calculate_fba_profit(input_data)
+def test_fba_calculation_standard_case(make_input):
+    result = calculate_fba_profit(make_input())
 
     assert result.summary.total_revenue.usd == pytest.approx(2999.00, rel=0.01)
     assert result.summary.net_profit_margin > 0
     assert result.intermediate_values.storage_coefficient == pytest.approx(0.3333, rel=0.1)
 
+
+def test_incremental_evaluation_returns_only_changed_outputs(make_input):
+    state = evaluate(make_input())
+
+    patched = apply_patch(state.input, {"afterSale.returnRate": 8})
+    new_state, changed = evaluate_incremental(state, patched)
+
+    full = evaluate(patched)
+    assert new_state.outputs() == full.outputs()
+    assert "summary.netProfit" in changed
+    assert "intermediateValues.returnQuantity" in changed
+    assert "summary.totalRevenue" not in changed
+    assert "costBreakdown.purchaseCost" not in changed
+    assert changed == {
+        path: value for path, value in full.outputs().items() if state.outputs()[path] != value
+    }
+
+
+def test_incremental_evaluation_with_unchanged_input_is_empty(make_input):
+    state = evaluate(make_input())
+
+    _new_state, changed = evaluate_incremental(
+        state, apply_patch(state.input, {"during_sale.daily_sales": 5})
+    )
+
+    assert changed == {}
+
+
+def _money_outputs(node, path=""):
+    if isinstance(node, dict) and set(node) == {"usd", "cny"}:
+        yield path, node
+    elif isinstance(node, dict):
+        for key, value in node.items():
+            yield from _money_outputs(value, f"{path}.{key}" if path else key)
+
+
+def _decimal_cny(usd: float, rate: Decimal) -> float:
+    # 旧实现的换算方式：美元先取两位，再按 ROUND_HALF_UP 换算成人民币
+    return float((Decimal(repr(usd)) * rate).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
+
+
+def test_compact_result_cny_matches_decimal_rounding(make_random_input):
+    rng = random.Random(20240607)
+    # 汇率为 x.5 时奇数分的金额恰好落在半分上，覆盖 ROUND_HALF_UP 的进位边界
+    tie_rates = [Decimal("0.5"), Decimal("1.5"), Decimal("6.5"), Decimal("7.25")]
+    ties = 0
+    for i in range(200):
+        rate = tie_rates[i % 4] if i % 2 else Decimal(f"{rng.uniform(0.1, 10):.4f}")
+        result = calculate(make_random_input(rng, rate))
+        for path, money in _money_outputs(result.to_json_dict()):
+            assert money["cny"] == _decimal_cny(money["usd"], rate), (path, money, rate)
+            assert result.output(path) == money
+            assert result.value(path) == money["usd"]
+            ties += (Decimal(repr(money["usd"])) * rate * 100) % 1 == Decimal("0.5")
+    assert ties > 100
+
+
+def test_exchange_rate_change_marks_money_outputs_changed(make_input):
+    state = evaluate(make_input())
+    _new_state, changed = evaluate_incremental(
+        state, apply_patch(state.input, {"settings.exchangeRate": 7.1})
+    )
+    assert changed["summary.totalRevenue"] == {"usd": 2999.0, "cny": 21292.9}
+
+
+def test_concurrent_session_patches_are_not_lost(monkeypatch, make_input):
+    session = calc_sessions.create_calculation_session(
+        FBACalculatorInput.model_validate(make_input())
+    )
+    original = calc_sessions.evaluate_incremental
+    calls = []
+
+    def interleaved(state, new_input):
+        calls.append(new_input)
+        if len(calls) == 1:
+            # 第一次计算期间另一个请求先写入了补丁
+            calc_sessions.patch_calculation_session(
+                session.session_id, {"afterSale.returnRate": 8}
+            )
+        return original(state, new_input)
+
+    monkeypatch.setattr(calc_sessions, "evaluate_incremental", interleaved)
+    calc_sessions.patch_calculation_session(session.session_id, {"duringSale.dailySales": 6})
+
+    state = calc_sessions._sessions[session.session_id]
+    assert state.input.after_sale.return_rate == 8
+    assert state.input.during_sale.daily_sales == 6
+    calc_sessions.delete_calculation_session(session.session_id)
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from backend.models.schemas import FBACalculatorInput, FeeEstimateRequest, FeeProfile
+from backend.services.calculator import apply_fee_profile, calculate_fba_profit, estimate_fees
+from backend.services.fees import FeeScheduleError, lookup_fees, lookup_fees_batch
+
+
+def test_fee_lookup_size_tiers_and_referral_minimum():
+    small = lookup_fees(
+        FeeProfile(length_in=10, width_in=6, height_in=0.5, weight_lb=0.3), 1.50
+    )
+    assert small["size_tier"] == "small_standard"
+    assert small["fulfillment_fee"] == pytest.approx(3.24)
+    assert small["referral_fee"] == pytest.approx(0.30)
+
+    large = lookup_fees(
+        FeeProfile(
+            length_in=12, width_in=9, height_in=4, weight_lb=4, category="electronics_accessories"
+        ),
+        150,
+    )
+    assert large["size_tier"] == "large_standard"
+    # 4 lb 超出 3 lb 档位 4 个 0.25 lb 间隔
+    assert large["fulfillment_fee"] == pytest.approx(6.62 + 4 * 0.08)
+    # 前 100 美元 15%，超出部分 8%
+    assert large["referral_fee"] == pytest.approx(15 + 50 * 0.08)
+    assert large["monthly_storage_fee"] == pytest.approx(12 * 9 * 4 / 1728 * 0.78)
+
+    with pytest.raises(FeeScheduleError):
+        lookup_fees(FeeProfile(length_in=1, width_in=1, height_in=1, weight_lb=1, category="x"), 10)
+
+
+def test_fee_lookup_batch_matches_single_lookup():
+    n = 100_000
+    rng = np.random.default_rng(0)
+    dims = rng.uniform(0.2, 40, size=(3, n))
+    weight = rng.uniform(0.05, 80, size=n)
+    price = rng.uniform(5, 300, size=n)
+    category = np.where(np.arange(n) % 2, "beauty_health_personal_care", "jewelry")
+
+    out = lookup_fees_batch(dims[0], dims[1], dims[2], weight, price, category)
+
+    assert out["fulfillment_fee"].shape == (n,)
+    for i in (0, 1, n - 1):
+        single = lookup_fees(
+            FeeProfile(
+                length_in=dims[0, i],
+                width_in=dims[1, i],
+                height_in=dims[2, i],
+                weight_lb=weight[i],
+                category=str(category[i]),
+            ),
+            price[i],
+        )
+        assert single["fulfillment_fee"] == pytest.approx(out["fulfillment_fee"][i])
+        assert single["referral_fee"] == pytest.approx(out["referral_fee"][i])
+
+
+def test_fee_lookup_rejects_prices_outside_the_key_range():
+    profile = FeeProfile(
+        length_in=10, width_in=6, height_in=2, weight_lb=0.9, category="amazon_device_accessories"
+    )
+    # 价格上限内仍按本类目计佣；越界时原本会串到下一个类目的佣金分段，现在直接报错
+    assert lookup_fees(profile, 999_999.99)["referral_fee_rate"] == pytest.approx(0.45)
+    with pytest.raises(FeeScheduleError):
+        lookup_fees(profile, 1_000_000)
+    with pytest.raises(FeeScheduleError):
+        lookup_fees_batch([10, 10], 6, 2, 0.9, np.array([20.0, -1.0]), "jewelry")
+
+
+def test_fee_estimate_matches_the_fees_used_by_the_calculator(make_input):
+    profile = {"length_in": 10, "width_in": 6, "height_in": 2, "weight_lb": 0.9}
+    data = make_input()
+    data["during_sale"]["fee_profile"] = profile
+
+    estimate = estimate_fees(
+        FeeEstimateRequest(profile=profile, selling_price=data["during_sale"]["selling_price"])
+    )
+    during = apply_fee_profile(FBACalculatorInput.model_validate(data)).during_sale
+
+    # 仓储费按四位小数参与计算，估算接口不能只给出取整到分的值
+    assert estimate.monthly_storage_fee.usd == float(during.monthly_storage_fee.usd) == 0.0542
+    assert estimate.monthly_storage_fee.cny == float(during.monthly_storage_fee.cny)
+    assert estimate.fba_fee_per_unit.usd == float(during.fba_fee_per_unit.usd)
+    assert estimate.referral_fee_rate == float(during.referral_fee_rate)
+
+
+def test_calculator_fills_fees_from_fee_profile():
+    result = calculate_fba_profit(
+        {
+            "pre_purchase": {
+                "unit_cost": {"usd": 10.00},
+                "quantity": 100,
+                "shipping_per_unit": {"usd": 2.00},
+            },
+            "during_sale": {
+                "selling_price": {"usd": 29.99},
+                "daily_sales": 5,
+                "sales_days": 20,
+                "advertising_mode": "percentage",
+                "ad_percentage": 10,
+                "fee_profile": {
+                    "length_in": 10,
+                    "width_in": 6,
+                    "height_in": 2,
+                    "weight_lb": 0.9,
+                },
+            },
+            "after_sale": {"return_rate": 5, "resellable_rate": 80},
+            "settings": {"exchange_rate": 7.25},
+        }
+    )
+
+    assert result.cost_breakdown.fba_fee.usd == pytest.approx(4.55 * 100)
+    assert result.cost_breakdown.storage_fee.usd > 0
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import json
+import time
+from pathlib import Path
+
+import pytest
+
+from backend.models.database import Base, Job, sessionmaker_for_path
+from backend.models.schemas import JobSubmitRequest
+from backend.services.jobs import (
+    JobResultUnavailable,
+    JobRunner,
+    cancel_job,
+    get_job,
+    get_job_result,
+    submit_job,
+)
+from backend.services.job_tasks import run_monte_carlo, run_sweep
+
+
+def _sessions(tmp_path):
+    db_path = str(tmp_path / "jobs.db")
+    sessions = sessionmaker_for_path(db_path)
+    Base.metadata.create_all(bind=sessions.kw["bind"])
+    return db_path, sessions
+
+
+def _wait_finished(sessions, job_id, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with sessions() as db:
+            info = get_job(db, job_id)
+        if info.status in ("succeeded", "failed", "cancelled"):
+            return info
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_job_runner_executes_jobs_and_spills_large_results(tmp_path, monkeypatch, make_input):
+    monkeypatch.setenv("JOB_INLINE_RESULT_BYTES", "2000")
+    monkeypatch.setenv("JOB_RETENTION", "1")
+    db_path, sessions = _sessions(tmp_path)
+
+    with sessions() as db:
+        small = submit_job(
+            db,
+            JobSubmitRequest(
+                kind="sweep",
+                params={"input": make_input(), "grid": {"afterSale.returnRate": [0, 10]}},
+            ),
+        )
+        large = submit_job(
+            db,
+            JobSubmitRequest(
+                kind="sweep",
+                params={
+                    "input": make_input(),
+                    "grid": {
+                        "duringSale.sellingPrice.usd": [20, 25, 30, 35],
+                        "prePurchase.quantity": [100, 200, 300],
+                    },
+                },
+            ),
+        )
+
+    runner = JobRunner(db_path=db_path, workers=1, poll_interval=0.05)
+    runner.start()
+    try:
+        assert _wait_finished(sessions, large.id).status == "succeeded"
+        with sessions() as db:
+            _status, raw = get_job_result(db, large.id)
+            job = db.get(Job, large.id)
+            assert job.result_json is None
+            assert job.result_path is not None
+        points = json.loads(raw)["points"]
+        assert len(points) == 12
+        assert points[0]["summary"]["totalRevenue"]["usd"] == 2000.0
+
+        Path(job.result_path).unlink()
+        with sessions() as db, pytest.raises(JobResultUnavailable):
+            get_job_result(db, large.id)
+
+        # 保留上限为 1：较早完成的任务被清理
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            with sessions() as db:
+                if get_job(db, small.id) is None:
+                    break
+            time.sleep(0.05)
+        with sessions() as db:
+            assert get_job(db, small.id) is None
+    finally:
+        runner.stop()
+
+
+def test_cancel_queued_job_and_requeue_orphaned_running_job(tmp_path):
+    db_path, sessions = _sessions(tmp_path)
+
+    with sessions() as db:
+        queued = submit_job(db, JobSubmitRequest(kind="recompute_projects"))
+        assert cancel_job(db, queued.id).status == "cancelled"
+
+        orphan = submit_job(db, JobSubmitRequest(kind="export_projects"))
+        job = db.get(Job, orphan.id)
+        job.status = "running"
+        job.attempts = 1
+        job.owner_pid = 2**22 + 1
+        db.commit()
+
+        cancelled_orphan = submit_job(db, JobSubmitRequest(kind="export_projects"))
+        job = db.get(Job, cancelled_orphan.id)
+        job.status = "running"
+        job.attempts = 1
+        job.owner_pid = 2**22 + 1
+        db.commit()
+        assert cancel_job(db, cancelled_orphan.id).cancel_requested
+
+    runner = JobRunner(db_path=db_path, workers=1)
+    assert runner.recover_orphaned_jobs() == 2
+    with sessions() as db:
+        assert get_job(db, orphan.id).status == "queued"
+        # 取消请求在重新排队时不会丢失
+        assert get_job(db, cancelled_orphan.id).status == "cancelled"
+
+        db.get(Job, orphan.id).cancel_requested = True
+        db.commit()
+    runner.start()
+    try:
+        info = _wait_finished(sessions, orphan.id)
+        assert (info.status, info.attempts) == ("cancelled", 1)
+    finally:
+        runner.stop()
+
+
+def test_fee_schedule_errors_are_recorded_per_point(make_input):
+    data = make_input()
+    data["during_sale"]["fee_profile"] = {
+        "length_in": 8,
+        "width_in": 5,
+        "height_in": 2,
+        "weight_lb": 0.6,
+    }
+
+    sweep = run_sweep(
+        {"input": data, "grid": {"duringSale.feeProfile.category": ["jewelry", "nope"]}},
+        lambda _fraction, _message: None,
+        "",
+    )
+    assert "summary" in sweep["points"][0]
+    assert sweep["points"][1]["error"] == "Unknown referral category: nope"
+
+    # 售价超出费率表查询上限的抽样记为无效，而不是让整个任务失败
+    monte_carlo = run_monte_carlo(
+        {
+            "input": data,
+            "distributions": {
+                "duringSale.sellingPrice.usd": {
+                    "type": "uniform",
+                    "low": 999_000,
+                    "high": 1_001_000,
+                }
+            },
+            "iterations": 200,
+            "seed": 7,
+        },
+        lambda _fraction, _message: None,
+        "",
+    )
+    assert monte_carlo["valid"] > 0 and monte_carlo["invalid"] > 0
+    assert monte_carlo["valid"] + monte_carlo["invalid"] == 200
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+from backend.main import create_app
+
+
+def test_live_calculation_coalesces_patch_bursts(monkeypatch, standard_input_json):
+    monkeypatch.setenv("LIVE_CALC_COALESCE_MS", "200")
+    client = TestClient(create_app())
+
+    with client.websocket_connect("/api/calculate/live") as ws:
+        ws.send_json({"type": "init", "input": standard_input_json})
+        first = ws.receive_json()
+        assert first["type"] == "result"
+        assert first["result"]["summary"]["totalRevenue"]["usd"] == 2999.0
+
+        for rate in (6, 7, 8):
+            ws.send_json({"type": "patch", "patch": {"afterSale.returnRate": rate}})
+        diff = ws.receive_json()
+
+        assert diff["type"] == "diff"
+        assert diff["seq"] == first["seq"] + 1
+        assert diff["changed"]["costBreakdown.returnLoss"] == {"usd": 19.2, "cny": 139.2}
+        assert "summary.totalRevenue" not in diff["changed"]
+        assert not any(path.startswith("intermediateValues.") for path in diff["changed"])
+
+        ws.send_json({"type": "patch", "patch": {"afterSale.returnRate": 800}})
+        assert ws.receive_json()["type"] == "error"
+
+
+def test_live_calculation_reports_errors_and_keeps_serving(monkeypatch, standard_input_json):
+    monkeypatch.setenv("LIVE_CALC_COALESCE_MS", "0")
+    client = TestClient(create_app())
+    bad_profile = {
+        "lengthIn": 8,
+        "widthIn": 5,
+        "heightIn": 2,
+        "weightLb": 0.6,
+        "category": "no_such_category",
+    }
+
+    with client.websocket_connect("/api/calculate/live") as ws:
+        ws.send_text("{not json")
+        assert ws.receive_json() == {"type": "error", "detail": "Invalid JSON"}
+
+        bad_input = dict(standard_input_json)
+        bad_input["duringSale"] = {**bad_input["duringSale"], "feeProfile": bad_profile}
+        ws.send_json({"type": "init", "input": bad_input})
+        error = ws.receive_json()
+        assert error["type"] == "error" and "no_such_category" in error["detail"]
+
+        ws.send_json({"type": "init", "input": standard_input_json})
+        first = ws.receive_json()
+        assert first["type"] == "result"
+
+        ws.send_json({"type": "patch", "patch": {"duringSale.feeProfile": bad_profile}})
+        assert ws.receive_json()["type"] == "error"
+
+        ws.send_json({"type": "patch", "patch": {"afterSale.returnRate": 6}})
+        diff = ws.receive_json()
+        assert diff["type"] == "diff" and diff["seq"] == first["seq"] + 1
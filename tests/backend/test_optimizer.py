@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import random
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from backend.models.schemas import FBACalculatorInput, ParetoOptimizeRequest
+from backend.services.calculator import apply_patch, calculate
+from backend.services.fees import get_fee_schedule
+from backend.services.optimizer import (
+    calculate_batch,
+    optimize_pareto,
+    pareto_mask,
+)
+
+
+def test_pareto_mask_keeps_only_non_dominated_rows():
+    objectives = np.array([[3, 1], [1, 3], [2, 2], [1, 1], [3, 1], [0, 4]], dtype=float)
+    assert pareto_mask(objectives).tolist() == [True, True, True, False, False, True]
+
+
+def test_batch_formulas_match_calculator(make_input):
+    input_data = FBACalculatorInput.model_validate(make_input())
+    prices = np.array([12.5, 29.99, 45.0])
+    budgets = np.array([0.0, 15.0, 40.0])
+    quantities = np.array([50, 100, 400])
+
+    out = calculate_batch(
+        input_data, selling_price=prices, daily_ad_budget=budgets, quantity=quantities
+    )
+
+    for i in range(3):
+        patch = {
+            "duringSale.sellingPrice": {"usd": prices[i], "primaryCurrency": "USD"},
+            "duringSale.advertisingMode": "budget",
+            "duringSale.dailyAdBudget": {"usd": budgets[i], "primaryCurrency": "USD"},
+            "prePurchase.quantity": int(quantities[i]),
+        }
+        result = calculate(apply_patch(input_data, patch))
+        assert out["net_profit"][i] == pytest.approx(result.value("summary.netProfit"), abs=0.01)
+        assert out["roi"][i] == pytest.approx(result.value("summary.roi"), abs=0.01)
+
+
+def test_batch_formulas_match_calculator_on_random_inputs(make_random_input):
+    rng = random.Random(20240611)
+    categories = get_fee_schedule().category_names
+    for i in range(200):
+        data = make_random_input(rng, Decimal(f"{rng.uniform(0.1, 10):.4f}"))
+        during = data["during_sale"]
+        if i % 3 == 0:
+            during["advertising_mode"] = "budget"
+            during["daily_ad_budget"] = {"usd": round(rng.uniform(0, 80), 2)}
+        if i % 4 == 0:
+            during["fee_profile"] = {
+                "length_in": round(rng.uniform(1, 30), 1),
+                "width_in": round(rng.uniform(1, 20), 1),
+                "height_in": round(rng.uniform(0.5, 15), 1),
+                "weight_lb": round(rng.uniform(0.1, 40), 2),
+                "category": rng.choice(categories),
+                "season": rng.choice(["off_peak", "peak"]),
+            }
+        input_data = FBACalculatorInput.model_validate(data)
+
+        out = calculate_batch(input_data)
+        result = calculate(input_data)
+        for key, path in [
+            ("net_profit", "summary.netProfit"),
+            ("roi", "summary.roi"),
+            ("net_profit_margin", "summary.netProfitMargin"),
+        ]:
+            assert out[key].item() == pytest.approx(result.value(path), abs=0.01), (i, key)
+        break_even = result.value("summary.breakEvenDays")
+        expected = np.inf if break_even is None else break_even
+        assert out["break_even_days"].item() == pytest.approx(expected, abs=0.01), i
+
+
+def test_optimizer_snaps_parameters_inside_bounds(make_input):
+    request = ParetoOptimizeRequest.model_validate(
+        {
+            "input": make_input(),
+            "bounds": {
+                "sellingPrice": {"min": 15.005, "max": 60.123},
+                "quantity": {"min": 20.5, "max": 30.5},
+            },
+        }
+    )
+
+    response = optimize_pareto(request)
+
+    assert response.points
+    for point in response.points:
+        quantity = point.parameters["quantity"]
+        price = point.parameters["sellingPrice"]
+        assert quantity == int(quantity) and 21 <= quantity <= 30
+        assert round(price, 2) == price and 15.01 <= price <= 60.12
+
+
+def test_optimizer_returns_feasible_pareto_set(make_input):
+    request = ParetoOptimizeRequest.model_validate(
+        {
+            "input": make_input(),
+            "bounds": {
+                "sellingPrice": {"min": 15, "max": 60},
+                "adPercentage": {"min": 0, "max": 30},
+                "quantity": {"min": 20, "max": 500},
+            },
+            "constraints": {"maxBreakEvenDays": 60, "minNetProfit": 100},
+        }
+    )
+
+    response = optimize_pareto(request)
+
+    assert response.rounds > 0 and response.points
+    objectives = np.array([[p.net_profit, p.roi, -p.total_investment] for p in response.points])
+    assert pareto_mask(objectives).all()
+    for point in response.points:
+        assert point.break_even_days is not None and point.break_even_days <= 60
+        assert point.net_profit >= 100
+        assert 15 <= point.parameters["sellingPrice"] <= 60
+        assert point.parameters["quantity"] == int(point.parameters["quantity"])
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from backend.models.database import Project, init_db, sessionmaker_for_path
+from backend.models.schemas import (
+    BranchCreateRequest,
+    BulkBranchCreateRequest,
+    ProjectCreateRequest,
+    ProjectUpdateRequest,
+)
+from backend.services.calculator import calculate_fba_profit
+from backend.services.project import (
+    BranchPatchError,
+    create_branch,
+    create_branches_bulk,
+    create_project,
+    delete_project_cascade,
+    search_projects,
+    update_project,
+)
+from backend.services.project_tree import bump_tree_version, project_tree_json
+
+
+def test_bulk_branches_apply_patches_and_allocate_suffixes(tmp_path, make_input):
+    sessions = sessionmaker_for_path(str(tmp_path / "projects.db"))
+    init_db(sessions.kw["bind"])
+
+    with sessions() as db:
+        parent = create_project(db, ProjectCreateRequest(name="Mug", input=make_input()))
+        create_branch(db, parent.id, BranchCreateRequest(name="Manual"))
+
+        created = create_branches_bulk(
+            db,
+            parent.id,
+            BulkBranchCreateRequest.model_validate(
+                {
+                    "branches": [
+                        {"name": "Cheaper", "patch": {"duringSale.sellingPrice.usd": 24.99}}
+                    ],
+                    "grid": {"duringSale.dailySales": [3, 8], "afterSale.returnRate": [2, 10]},
+                }
+            ),
+        ).created
+
+        assert [p.branch_path for p in created] == ["A-B", "A-C", "A-D", "A-E", "A-F"]
+        assert created[1].name == "Mug (duringSale.dailySales=3, afterSale.returnRate=2)"
+
+        cheaper = db.get(Project, created[0].id)
+        expected_input = make_input()
+        expected_input["during_sale"]["selling_price"]["usd"] = 24.99
+        expected = calculate_fba_profit(expected_input).model_dump(
+            mode="json", by_alias=True, exclude={"daily_series"}
+        )
+        assert json.loads(cheaper.input_json)["duringSale"]["sellingPrice"]["usd"] == 24.99
+        assert json.loads(cheaper.result_json) == expected
+        assert search_projects(db, "cheaper").items[0].project.id == cheaper.id
+
+        with pytest.raises(BranchPatchError) as exc_info:
+            create_branches_bulk(
+                db,
+                parent.id,
+                BulkBranchCreateRequest.model_validate(
+                    {"grid": {"duringSale.dailySales": [4, -1]}}
+                ),
+            )
+        assert exc_info.value.loc == ("grid", 1)
+
+        bad_profile = {"lengthIn": 8, "widthIn": 5, "heightIn": 2, "weightLb": 0.6}
+        with pytest.raises(BranchPatchError) as exc_info:
+            create_branches_bulk(
+                db,
+                parent.id,
+                BulkBranchCreateRequest.model_validate(
+                    {
+                        "branches": [
+                            {"name": "ok", "patch": {"duringSale.dailySales": 4}},
+                            {
+                                "name": "bad",
+                                "patch": {
+                                    "duringSale.feeProfile": {**bad_profile, "category": "nope"}
+                                },
+                            },
+                        ]
+                    }
+                ),
+            )
+        assert exc_info.value.loc == ("branches", 1)
+        assert exc_info.value.errors[0]["msg"] == "Unknown referral category: nope"
+        assert db.query(Project).count() == 7
+
+
+def _tree(db):
+    def walk(nodes):
+        return [
+            (n["project"]["branchPath"], n["project"]["name"], walk(n["children"])) for n in nodes
+        ]
+
+    return walk(json.loads(project_tree_json(db)))
+
+
+def test_tree_snapshot_is_patched_by_writes_and_reloaded_when_stale(tmp_path, make_input):
+    sessions = sessionmaker_for_path(str(tmp_path / "tree.db"))
+
+    with sessions() as db:
+        root = create_project(db, ProjectCreateRequest(name="Mug", input=make_input()))
+        other = create_project(db, ProjectCreateRequest(name="Lamp", input=make_input()))
+        assert _tree(db) == [("A", "Mug", []), ("B", "Lamp", [])]
+
+        child = create_branch(db, root.id, BranchCreateRequest(name="Manual"))
+        create_branches_bulk(
+            db,
+            child.id,
+            BulkBranchCreateRequest.model_validate(
+                {"branches": [{"name": "Deep", "patch": {}}]}
+            ),
+        )
+        update_project(db, root.id, ProjectUpdateRequest(name="Mug v2", input=make_input()))
+        assert _tree(db) == [
+            ("A", "Mug v2", [("A-A", "Manual", [("A-A-A", "Deep", [])])]),
+            ("B", "Lamp", []),
+        ]
+
+        delete_project_cascade(db, child.id)
+        assert _tree(db) == [("A", "Mug v2", []), ("B", "Lamp", [])]
+        summary = json.loads(project_tree_json(db))[1]["project"]
+        assert summary["id"] == other.id and "input" not in summary
+
+    # 模拟另一个进程直接写库：版本号变化后本进程的快照必须重建
+    with sessions() as db:
+        db.get(Project, other.id).name = "Lamp (renamed elsewhere)"
+        bump_tree_version(db)
+        db.commit()
+        assert _tree(db) == [("A", "Mug v2", []), ("B", "Lamp (renamed elsewhere)", [])]
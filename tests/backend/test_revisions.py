@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import json
+import threading
+
+from backend.models.database import Project, ProjectRevision, init_db, sessionmaker_for_path
+from backend.models.schemas import ProjectCreateRequest, ProjectUpdateRequest
+from backend.services.project import create_project, delete_project_cascade, update_project
+from backend.services.revisions import (
+    REVISION_SNAPSHOT_INTERVAL,
+    diff_revisions,
+    get_revision_json,
+    list_revisions,
+)
+
+
+def test_revisions_replay_deltas_and_diff(tmp_path, make_input):
+    sessions = sessionmaker_for_path(str(tmp_path / "revisions.db"))
+    init_db(sessions.kw["bind"])
+
+    with sessions() as db:
+        p = create_project(db, ProjectCreateRequest(name="Mug", input=make_input()))
+        saved = {1: (p.input_json, p.result_json)}
+        for i in range(2, 2 * REVISION_SNAPSHOT_INTERVAL + 3):
+            data = make_input()
+            data["during_sale"]["daily_sales"] = i
+            if i % 5 == 0:
+                # 在 feeProfile 对象与 None 之间切换，覆盖增量里的删除路径
+                data["during_sale"]["fee_profile"] = {
+                    "length_in": 8,
+                    "width_in": 5,
+                    "height_in": 2,
+                    "weight_lb": 0.6,
+                }
+            update_project(db, p.id, ProjectUpdateRequest(name=f"Mug v{i}", input=data))
+            saved[i] = (p.input_json, p.result_json)
+
+        latest = p.revision
+        assert latest == 2 * REVISION_SNAPSHOT_INTERVAL + 2
+        revisions = list_revisions(db, p.id, limit=500)
+        assert [r.revision for r in revisions] == list(range(latest, 0, -1))
+        assert [r.revision for r in revisions if r.is_snapshot] == [33, 17, 1]
+
+        for revision, (input_json, result_json) in saved.items():
+            detail = json.loads(get_revision_json(db, p.id, revision))
+            assert detail["input"] == json.loads(input_json)
+            assert detail["result"] == json.loads(result_json)
+        assert json.loads(get_revision_json(db, p.id, 7))["name"] == "Mug v7"
+        assert get_revision_json(db, p.id, latest + 1) is None
+
+        diff = diff_revisions(db, p.id, 3, 4)
+        assert [c.path for c in diff.input_changes] == ["duringSale.dailySales"]
+        assert (diff.input_changes[0].before, diff.input_changes[0].after) == (3, 4)
+        assert "summary.netProfit.usd" in {c.path for c in diff.result_changes}
+
+        # 创建于修订历史之前的项目，首次保存时补一份快照
+        p.revision = 0
+        db.query(ProjectRevision).delete()
+        db.commit()
+        update_project(db, p.id, ProjectUpdateRequest(name="Mug", input=make_input()))
+        assert [r.revision for r in list_revisions(db, p.id)] == [2, 1]
+        assert json.loads(get_revision_json(db, p.id, 1))["input"] == json.loads(
+            saved[latest][0]
+        )
+
+        delete_project_cascade(db, p.id)
+        assert db.query(ProjectRevision).count() == 0
+        assert db.get(Project, p.id) is None
+
+
+def test_concurrent_updates_get_consecutive_revisions(tmp_path, make_input):
+    sessions = sessionmaker_for_path(str(tmp_path / "concurrent.db"))
+    with sessions() as db:
+        project_id = create_project(db, ProjectCreateRequest(name="Mug", input=make_input())).id
+
+    barrier = threading.Barrier(6)
+    errors: list[BaseException] = []
+
+    def save(daily_sales: int) -> None:
+        data = make_input()
+        data["during_sale"]["daily_sales"] = daily_sales
+        with sessions() as db:
+            barrier.wait()
+            try:
+                update_project(db, project_id, ProjectUpdateRequest(name="Mug", input=data))
+            except Exception as exc:
+                errors.append(exc)
+
+    threads = [threading.Thread(target=save, args=(i,)) for i in range(10, 16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    with sessions() as db:
+        assert [r.revision for r in list_revisions(db, project_id)] == list(range(7, 0, -1))
+        latest = db.get(Project, project_id)
+        assert latest.revision == 7
+        # 每个增量都基于前一个已提交的修订，最新修订能还原出最终保存的内容
+        assert json.loads(get_revision_json(db, project_id, 7))["input"] == json.loads(
+            latest.input_json
+        )
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from backend.models.database import init_db, sessionmaker_for_path
+from backend.models.schemas import (
+    BranchCreateRequest,
+    ProjectCreateRequest,
+    ProjectUpdateRequest,
+)
+from backend.services.project import (
+    create_branch,
+    create_project,
+    delete_project_cascade,
+    search_projects,
+    update_project,
+)
+
+
+def test_project_search_tracks_writes_and_ranks_name_matches(tmp_path, make_input):
+    sessions = sessionmaker_for_path(str(tmp_path / "search.db"))
+    init_db(sessions.kw["bind"])
+
+    with sessions() as db:
+        bottle = create_project(
+            db,
+            ProjectCreateRequest(
+                name="Steel water bottle <1L>", description="insulated", input=make_input()
+            ),
+        )
+        lamp = create_project(
+            db,
+            ProjectCreateRequest(
+                name="Desk lamp", description="ships with a water bottle clip", input=make_input()
+            ),
+        )
+        branch = create_branch(db, bottle.id, BranchCreateRequest(name="Bottle promo"))
+
+        result = search_projects(db, "bott")
+        assert result.total == 3
+        assert result.items[-1].project.id == lamp.id
+        assert result.items[-1].description_snippet == "ships with a water <mark>bottle</mark> clip"
+        hit = next(item for item in result.items if item.project.id == bottle.id)
+        assert hit.name_highlight == "Steel water <mark>bottle</mark> &lt;1L&gt;"
+
+        page = search_projects(db, "bott", limit=1, offset=1)
+        assert page.total == 3 and len(page.items) == 1
+
+        assert [i.project.id for i in search_projects(db, "water insul").items] == [bottle.id]
+
+        update_project(
+            db, lamp.id, ProjectUpdateRequest(name="Floor lamp", description="", input=make_input())
+        )
+        assert search_projects(db, "bottle").total == 2
+        assert [i.project.id for i in search_projects(db, "floor").items] == [lamp.id]
+
+        delete_project_cascade(db, bottle.id)
+        assert search_projects(db, "bottle").total == 0
+        assert search_projects(db, "promo").total == 0
+        assert branch.id not in {i.project.id for i in search_projects(db, "lamp").items}
+        assert search_projects(db, "  ").total == 0
+
+
+def test_project_search_matches_cjk_substrings(tmp_path, make_input):
+    sessions = sessionmaker_for_path(str(tmp_path / "search_cjk.db"))
+
+    with sessions() as db:
+        earbuds = create_project(
+            db,
+            ProjectCreateRequest(
+                name="蓝牙耳机 Pro", description="降噪，续航30小时", input=make_input()
+            ),
+        )
+        create_project(
+            db, ProjectCreateRequest(name="机械键盘", description="", input=make_input())
+        )
+
+        result = search_projects(db, "耳机")
+        assert [i.project.id for i in result.items] == [earbuds.id]
+        assert result.items[0].name_highlight == "蓝牙<mark>耳机</mark> Pro"
+
+        assert search_projects(db, "牙耳机").total == 1
+        assert search_projects(db, "续航").items[0].description_snippet == (
+            "降噪，<mark>续航</mark>30小时"
+        )
+        assert search_projects(db, "机").total == 2
+        assert search_projects(db, "耳机 pro").total == 1
+        assert search_projects(db, "机耳").total == 0
+        assert search_projects(db, "键盘耳机").total == 0
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from backend.services.simulation import simulate_daily, simulate_daily_batch
+
+
+def test_daily_simulation_tracks_inventory_returns_and_cash(make_input):
+    series = simulate_daily(make_input(), horizon_days=60, return_lag_days=10)
+
+    assert len(series.cumulative_cash_usd) == 60
+    assert sum(series.units_sold) == pytest.approx(100)
+    assert series.inventory[19] == pytest.approx(10 * 0.25 * 0.8)
+    # 退货在 10 天后到达，可售部分重新入库
+    assert series.units_returned[9] == 0
+    assert series.units_returned[10] == pytest.approx(0.25)
+    assert series.inventory[-1] == pytest.approx(100 * 0.05 * 0.8)
+    # 仓储费按月在第 30 / 60 天收取
+    assert series.storage_fee_usd[29] > 0
+    assert series.storage_fee_usd[28] == 0
+    assert series.cumulative_cash_usd[0] < 0
+    assert series.break_even_day is not None
+    assert series.final_cash.usd == pytest.approx(series.cumulative_cash_usd[-1], abs=0.01)
+    assert series.peak_capital.usd > 1000
+
+
+def test_daily_simulation_batch_shapes_and_budget_ads():
+    n = 1000
+    sim = simulate_daily_batch(
+        unit_cost=np.full(n, 10.0),
+        quantity=np.full(n, 300.0),
+        shipping_per_unit=2.0,
+        selling_price=np.linspace(15, 40, n),
+        daily_sales=5,
+        sales_days=60,
+        daily_ad_budget=20.0,
+        ad_rate=0.0,
+        referral_fee_rate=0.15,
+        fba_fee_per_unit=4.5,
+        monthly_storage_fee=0.5,
+        return_rate=0.05,
+        resellable_rate=0.8,
+    )
+
+    assert sim["cumulative_cash"].shape == (n, 365)
+    assert sim["advertising_cost"][0, 59] == pytest.approx(20.0)
+    assert sim["advertising_cost"][0, 60] == 0
+    assert sim["break_even_day"][0] == -1
+    assert sim["break_even_day"][-1] > 0
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+
+from backend.main import create_app
+from backend.models import database
+from backend.models.database import (
+    Project,
+    WorkspaceEnginePool,
+    WorkspaceError,
+    sessionmaker_for_path,
+)
+from backend.services.project import search_projects
+
+
+def test_workspace_pool_evicts_lru_and_idle_engines_but_not_busy_ones(tmp_path, monkeypatch):
+    monkeypatch.setenv("WORKSPACE_DIR", str(tmp_path))
+    pool = WorkspaceEnginePool(max_size=2, idle_seconds=3600)
+
+    with pool.session("alpha") as db:
+        assert db.info["workspace_id"] == "alpha"
+        assert search_projects(db, "anything").total == 0
+        # alpha 仍有会话在用，超出容量时也不能被淘汰
+        with pool.session("beta"), pool.session("gamma"):
+            assert {w["workspace_id"] for w in pool.metrics()["workspaces"]} == {
+                "alpha",
+                "beta",
+                "gamma",
+            }
+    with pool.session("delta"):
+        pass
+
+    # gamma 释放时 alpha/beta 都在用，只能淘汰它；delta 打开时挤掉最久未用的 alpha
+    metrics = pool.metrics()
+    assert [w["workspace_id"] for w in metrics["workspaces"]] == ["beta", "delta"]
+    assert metrics["opened"] == 4 and metrics["evicted"] == 2
+    assert (tmp_path / "alpha.db").exists()
+    assert metrics["workspaces"][0]["sessions"] == 1
+
+    pool.idle_seconds = 0
+    assert pool.metrics()["workspaces"] == []
+
+    with pytest.raises(WorkspaceError):
+        with pool.session("../escape"):
+            pass
+    pool.dispose()
+
+
+def test_workspace_sweeper_closes_idle_engines_without_traffic(tmp_path, monkeypatch):
+    monkeypatch.setenv("WORKSPACE_DIR", str(tmp_path))
+    pool = WorkspaceEnginePool(max_size=4, idle_seconds=0.05)
+    with pool.session("alpha"):
+        pass
+    assert pool.evicted == 0
+
+    pool.start_sweeper(interval=0.02)
+    try:
+        deadline = time.monotonic() + 5
+        while pool.evicted == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert pool.evicted == 1
+    finally:
+        pool.dispose()
+
+
+def _run_together(target, count: int = 8) -> list[BaseException]:
+    barrier = threading.Barrier(count)
+    errors: list[BaseException] = []
+
+    def run() -> None:
+        barrier.wait()
+        try:
+            target()
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=run) for _ in range(count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return errors
+
+
+def test_new_workspace_opened_concurrently_is_created_once(tmp_path, monkeypatch):
+    monkeypatch.setenv("WORKSPACE_DIR", str(tmp_path))
+    pool = WorkspaceEnginePool(max_size=4, idle_seconds=3600)
+
+    def open_workspace() -> None:
+        with pool.session("fresh") as db:
+            db.execute(select(func.count()).select_from(Project)).scalar_one()
+
+    try:
+        for _ in range(5):
+            assert _run_together(open_workspace) == []
+            assert pool.opened == 1
+    finally:
+        pool.dispose()
+
+
+def test_path_sessionmakers_initialize_a_new_database_concurrently(tmp_path):
+    # sessionmaker_for_path 在锁外建库；多个 worker 同时打开同一个新库时 init_db 必须能并发执行
+    for i in range(5):
+        db_path = str(tmp_path / f"new-{i}.db")
+        factories = []
+        assert _run_together(lambda: factories.append(sessionmaker_for_path(db_path))) == []
+        assert len({id(f) for f in factories}) == 1
+
+
+def test_path_sessionmakers_are_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "PATH_SESSIONMAKER_CACHE_SIZE", 2)
+    first = sessionmaker_for_path(str(tmp_path / "one.db"))
+    disposed = []
+    monkeypatch.setattr(first.kw["bind"], "dispose", lambda: disposed.append("one"))
+
+    assert sessionmaker_for_path(str(tmp_path / "one.db")) is first
+    sessionmaker_for_path(str(tmp_path / "two.db"))
+    sessionmaker_for_path(str(tmp_path / "three.db"))
+
+    assert disposed == ["one"]
+    assert sessionmaker_for_path(str(tmp_path / "one.db")) is not first
+
+
+def test_projects_are_isolated_per_workspace_header(tmp_path, monkeypatch, standard_input_json):
+    monkeypatch.setenv("WORKSPACE_DIR", str(tmp_path))
+    client = TestClient(create_app())
+
+    created = client.post(
+        "/api/projects",
+        json={"name": "Mug", "input": standard_input_json},
+        headers={"X-Workspace-Id": "acme"},
+    )
+    assert created.status_code == 200
+
+    acme = client.get("/api/projects", headers={"X-Workspace-Id": "acme"}).json()
+    other = client.get("/api/projects", headers={"X-Workspace-Id": "globex"}).json()
+    assert [node["project"]["name"] for node in acme] == ["Mug"]
+    assert other == []
+    assert client.get("/api/projects", headers={"X-Workspace-Id": "a/b"}).status_code == 400
+
+    metrics = client.get("/api/workspaces/metrics").json()
+    acme_metrics = next(w for w in metrics["workspaces"] if w["workspaceId"] == "acme")
+    assert acme_metrics["sessions"] == 2 and acme_metrics["databaseBytes"] > 0
+
+    with sessionmaker_for_path(str(tmp_path / "acme.db"))() as db:
+        assert db.execute(select(Project.name)).scalars().all() == ["Mug"]